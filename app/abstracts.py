@@ -0,0 +1,114 @@
+import html
+import logging
+import re
+from functools import lru_cache
+from typing import List
+from app.config import Config
+from app.models import Paper
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to an estimate
+    tiktoken = None
+
+# Elements whose content is never part of the abstract
+_DROP_ELEMENTS = re.compile(r'<(script|style|figure|figcaption|table|svg)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_BLOCK_TAGS = re.compile(r'<\s*/?\s*(?:br|p|div|li|ul|ol|h[1-6]|section|blockquote)\b[^>]*>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]*>')
+_WHITESPACE = re.compile(r'\s+')
+_SENTENCE_END = re.compile(r'[.!?](?=\s|$)')
+
+# Whole lines of publisher boilerplate, matched after markup is stripped
+_BOILERPLATE_LINES = [re.compile(p, re.IGNORECASE) for p in (
+    r'^[\w&.,\' -]+, Published online: \d{1,2} \w+ \d{4}; doi:\S+$',  # Nature
+    r'^[\w&.,\' -]+, Volume \d+, Issue \d+.*$',  # Science, PNAS
+    r'^(?:Publication date|Source|Author\(s\)):.*$',  # Cell Press / Elsevier
+    r'^by [^.]+$',  # PLOS author line
+    r'^(?:Graphical )?Abstract:?$',
+    r'^(?:Highlights|Significance|Summary):?$',
+)]
+# Boilerplate inside running text
+_BOILERPLATE_INLINE = re.compile(
+    r'This article is protected by copyright\. All rights reserved\.?'
+    r'|\[Figure: see text\]'
+    r'|Read the full article at \S+'
+    r'|Continue reading\.*',
+    re.IGNORECASE
+)
+
+def clean_abstract(text: str, title: str = None) -> str:
+    """Strip markup and publisher boilerplate from a feed abstract and collapse whitespace."""
+    if not text:
+        return ''
+    text = _DROP_ELEMENTS.sub(' ', text)
+    text = _BLOCK_TAGS.sub('\n', text)
+    text = html.unescape(_TAGS.sub('', text))
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not any(pattern.match(line) for pattern in _BOILERPLATE_LINES):
+            lines.append(line)
+    text = _WHITESPACE.sub(' ', _BOILERPLATE_INLINE.sub(' ', ' '.join(lines))).strip()
+    # Some feeds repeat the title as the first line of the summary
+    if title and text.lower().startswith(title.strip().lower()) and len(text) > len(title.strip()):
+        text = text[len(title.strip()):].lstrip(' .:-')
+    return text
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """tiktoken encoding for Config.OPENAI_MODEL, or None if unavailable (e.g. offline)."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(Config.OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text to at most max_tokens, preferring to end on a sentence boundary
+    in the second half of the kept text, otherwise on a word boundary.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        trimmed = text[:max_tokens * 4]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        trimmed = encoding.decode(tokens[:max_tokens])
+    ends = [match.end() for match in _SENTENCE_END.finditer(trimmed)]
+    if ends and ends[-1] >= len(trimmed) // 2:
+        return trimmed[:ends[-1]]
+    return trimmed.rsplit(' ', 1)[0].rstrip(' ,;:') + '…'
+
+def prepare_abstracts(papers: List[Paper], max_tokens: int = None) -> List[Paper]:
+    """
+    Clean and trim every paper's abstract in place before it is sent to the API,
+    recording its token count before and after.
+    """
+    max_tokens = max_tokens or Config.ABSTRACT_MAX_TOKENS
+    for paper in papers:
+        raw = paper.abstract or ''
+        paper.abstract_tokens_raw = count_tokens(raw)
+        paper.abstract = trim_to_tokens(clean_abstract(raw, paper.title), max_tokens)
+        paper.abstract_tokens = count_tokens(paper.abstract)
+    raw_total = sum(paper.abstract_tokens_raw for paper in papers)
+    total = sum(paper.abstract_tokens for paper in papers)
+    if papers:
+        logger.info(f"Abstracts cut from {raw_total} to {total} tokens ({raw_total - total} saved)")
+    return papers
@@ -0,0 +1,252 @@
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import requests
+from app.config import Config
+from app.feed_registry import feed_url
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ArchivedFetch:
+    url: str
+    fetched_at: float
+    digest: str
+    size: int
+    partial: bool = False
+
+class FeedArchive:
+    """
+    Content-addressed archive of raw feed bodies.
+    Bodies are gzip-compressed under objects/<aa>/<sha256>.gz and stored once per
+    distinct content; a manifest indexed by (url, fetched_at) records every fetch.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.ARCHIVE_DIR or os.path.join(Config.CACHE_DIR, 'archive')
+        self.objects_dir = os.path.join(self.root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.root, 'manifest.sqlite3'), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetches ("
+            " url TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " partial INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_url_time ON fetches (url, fetched_at)")
+        self._conn.commit()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def store(self, url: str, body: bytes, fetched_at: float = None, partial: bool = False) -> str:
+        """Archive a fetched body and record the fetch. Returns the body's digest."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # gzip container
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressor.compress(body))
+                f.write(compressor.flush())
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fetches (url, fetched_at, digest, size, partial) VALUES (?, ?, ?, ?, ?)",
+                (url, fetched_at or time.time(), digest, len(body), int(partial))
+            )
+            self._conn.commit()
+        return digest
+
+    def lookup(self, url: str, as_of: datetime = None) -> Optional[ArchivedFetch]:
+        """
+        Latest archived fetch of a feed at or before as_of (default: now).
+        Complete bodies win over newer partial ones; a partial body is only
+        returned when no complete fetch exists.
+        """
+        cutoff = as_of.timestamp() if as_of else time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, fetched_at, digest, size, partial FROM fetches "
+                "WHERE url = ? AND fetched_at <= ? ORDER BY partial, fetched_at DESC LIMIT 1",
+                (url, cutoff)
+            ).fetchone()
+        return ArchivedFetch(*row[:4], bool(row[4])) if row else None
+
+    def history(self, url: str) -> List[ArchivedFetch]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, fetched_at, digest, size, partial FROM fetches WHERE url = ? ORDER BY fetched_at",
+                (url,)
+            ).fetchall()
+        return [ArchivedFetch(*row[:4], bool(row[4])) for row in rows]
+
+    def iter_body(self, digest: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Stream-decompress an archived body from a memory-mapped object file."""
+        with open(self.object_path(digest), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                decompressor = zlib.decompressobj(31)
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, len(view), chunk_size):
+                        chunk = decompressor.decompress(view[offset:offset + chunk_size])
+                        if chunk:
+                            yield chunk
+                    tail = decompressor.flush()
+                    if tail:
+                        yield tail
+                finally:
+                    view.release()
+
+    def read(self, digest: str) -> bytes:
+        return b''.join(self.iter_body(digest))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            fetches, feeds = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM fetches").fetchone()
+            raw_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM fetches)"
+            ).fetchone()[0]
+        objects, stored_bytes = 0, 0
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                if name.endswith('.gz'):
+                    objects += 1
+                    stored_bytes += os.path.getsize(os.path.join(dirpath, name))
+        return {'fetches': fetches, 'feeds': feeds, 'objects': objects,
+                'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ArchivingSession(requests.Session):
+    """requests.Session that archives every successfully fetched feed body."""
+
+    def __init__(self, archive: FeedArchive):
+        super().__init__()
+        self.archive = archive
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        if response.status_code != 200:
+            return response
+        if not kwargs.get('stream'):
+            self.archive.store(url, response.content)
+            return response
+
+        # Streamed bodies are archived as far as they were read
+        iter_content = response.iter_content
+        archive = self.archive
+
+        def tee(chunk_size=1, decode_unicode=False):
+            chunks = []
+            complete = False
+            try:
+                for chunk in iter_content(chunk_size, decode_unicode):
+                    chunks.append(chunk)
+                    yield chunk
+                complete = True
+            finally:
+                archive.store(url, b''.join(chunks), partial=not complete)
+
+        response.iter_content = tee
+        return response
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response backed by an archived body."""
+
+    def __init__(self, archive: FeedArchive, url: str, fetch: Optional[ArchivedFetch]):
+        self.url = url
+        self.headers = {}
+        self.status_code = 200 if fetch else 404
+        self._archive = archive
+        self._fetch = fetch
+
+    @property
+    def content(self) -> bytes:
+        return self._archive.read(self._fetch.digest) if self._fetch else b''
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        if self._fetch:
+            yield from self._archive.iter_body(self._fetch.digest, max(chunk_size or 0, 4096))
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(f"{self.url} is not in the archive", response=self)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ReplaySession:
+    """Session stand-in that serves feeds from the archive as they were at as_of."""
+
+    def __init__(self, archive: FeedArchive, as_of: datetime = None):
+        self.archive = archive
+        self.as_of = as_of
+        self.headers = {}
+
+    def get(self, url, **kwargs) -> ReplayResponse:
+        return ReplayResponse(self.archive, url, self.archive.lookup(url, self.as_of))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the raw feed archive.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show archive size and deduplication")
+    history = subparsers.add_parser('history', help="List archived fetches of a feed")
+    history.add_argument('feed', help="Feed URL or journal name")
+    show = subparsers.add_parser('show', help="Print an archived body")
+    show.add_argument('digest')
+    args = parser.parse_args()
+
+    with FeedArchive() as archive:
+        if args.command == 'stats':
+            stats = archive.stats()
+            print(f"{stats['fetches']} fetches of {stats['feeds']} feeds, {stats['objects']} distinct bodies, "
+                  f"{stats['raw_bytes']} bytes raw, {stats['stored_bytes']} bytes stored")
+        elif args.command == 'history':
+            url = feed_url(args.feed)
+            for fetch in archive.history(url):
+                partial = " (partial)" if fetch.partial else ""
+                print(f"{datetime.fromtimestamp(fetch.fetched_at):%Y-%m-%d %H:%M:%S} {fetch.digest} {fetch.size}{partial}")
+        else:
+            print(archive.read(args.digest).decode('utf-8', errors='replace'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import requests
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+@dataclass
+class BatchJob:
+    batch_id: str
+    kind: str
+    input_path: str
+    requests: int
+    status: str
+    submitted_at: float
+    finished_at: Optional[float] = None
+
+@dataclass
+class BatchReport:
+    batch_id: str
+    requests: int
+    succeeded: int = 0
+    failed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    elapsed: float = 0.0  # seconds from submission to results
+
+    @property
+    def sync_cost(self) -> float:
+        """What the same tokens would have cost as synchronous requests, in USD."""
+        return (self.prompt_tokens * Config.OPENAI_INPUT_PRICE +
+                self.completion_tokens * Config.OPENAI_OUTPUT_PRICE) / 1_000_000
+
+    @property
+    def cost(self) -> float:
+        return self.sync_cost * Config.BATCH_DISCOUNT
+
+    def __str__(self) -> str:
+        rate = self.requests / self.elapsed if self.elapsed else 0.0
+        return (f"batch {self.batch_id}: {self.succeeded}/{self.requests} succeeded in {self.elapsed:.0f}s "
+                f"({rate:.2f} requests/s), {self.prompt_tokens}+{self.completion_tokens} tokens, "
+                f"${self.cost:.4f} (${self.sync_cost:.4f} synchronous)")
+
+class BatchClient:
+    """Minimal client for the Files and Batch endpoints of the OpenAI API."""
+
+    def __init__(self, base_url: str = None, api_key: str = None, session: requests.Session = None):
+        self.base_url = (base_url or Config.OPENAI_BASE_URL).rstrip('/')
+        self.session = session or requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {api_key or Config.OPENAI_API_KEY}"
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        response = self.session.request(method, f"{self.base_url}{path}", timeout=Config.SUMMARY_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def upload(self, path: str) -> str:
+        """Upload a JSONL request file and return its file ID."""
+        with open(path, 'rb') as f:
+            files = {'file': (os.path.basename(path), f, 'application/jsonl')}
+            return self._request('POST', '/files', data={'purpose': 'batch'}, files=files).json()['id']
+
+    def create(self, input_file_id: str, endpoint: str = CHAT_COMPLETIONS) -> dict:
+        return self._request('POST', '/batches', json={
+            'input_file_id': input_file_id,
+            'endpoint': endpoint,
+            'completion_window': '24h',
+        }).json()
+
+    def retrieve(self, batch_id: str) -> dict:
+        return self._request('GET', f'/batches/{batch_id}').json()
+
+    def content(self, file_id: str) -> bytes:
+        return self._request('GET', f'/files/{file_id}/content').content
+
+class BatchJobStore:
+    """Persistent record of submitted batch jobs, so unfinished ones are resumed after a restart."""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'batch_jobs.sqlite3')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batch_jobs ("
+            " batch_id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " input_path TEXT NOT NULL,"
+            " requests INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " submitted_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        self._conn.commit()
+
+    def add(self, batch_id: str, kind: str, input_path: str, requests: int, status: str) -> BatchJob:
+        job = BatchJob(batch_id, kind, input_path, requests, status, time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO batch_jobs (batch_id, kind, input_path, requests, status, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (batch_id, kind, input_path, requests, status, job.submitted_at)
+            )
+            self._conn.commit()
+        return job
+
+    def update(self, batch_id: str, status: str):
+        finished_at = time.time() if status in TERMINAL_STATUSES else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_jobs SET status = ?, finished_at = ? WHERE batch_id = ?",
+                (status, finished_at, batch_id)
+            )
+            self._conn.commit()
+
+    def unfinished(self, kind: str) -> List[BatchJob]:
+        """Unfinished jobs of a kind, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch_id, kind, input_path, requests, status, submitted_at, finished_at FROM batch_jobs "
+                "WHERE kind = ? AND finished_at IS NULL ORDER BY submitted_at",
+                (kind,)
+            ).fetchall()
+        return [BatchJob(*row) for row in rows]
+
+    def all(self) -> List[BatchJob]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch_id, kind, input_path, requests, status, submitted_at, finished_at FROM batch_jobs "
+                "ORDER BY submitted_at"
+            ).fetchall()
+        return [BatchJob(*row) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_requests(path: str, bodies: Dict[str, dict], endpoint: str = CHAT_COMPLETIONS):
+    """Write one batch request line per custom ID."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        for custom_id, body in bodies.items():
+            f.write(json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': endpoint, 'body': body}) + '\n')
+
+def request_ids(path: str) -> Set[str]:
+    """Custom IDs of the requests in a batch input file."""
+    if not os.path.exists(path):
+        logger.warning(f"Batch input file {path} is missing; its requests will be submitted again")
+        return set()
+    with open(path) as f:
+        return {json.loads(line)['custom_id'] for line in f if line.strip()}
+
+def parse_results(content: bytes) -> Dict[str, dict]:
+    """Result lines of an output or error file, by custom ID."""
+    results = {}
+    for line in content.decode('utf-8').splitlines():
+        if line.strip():
+            result = json.loads(line)
+            results[result['custom_id']] = result
+    return results
+
+def completion_text(result: Optional[dict]) -> Optional[str]:
+    """Message content of a successful chat completion result line."""
+    response = (result or {}).get('response') or {}
+    if response.get('status_code') != 200:
+        return None
+    try:
+        return response['body']['choices'][0]['message']['content'].strip()
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+def wait_for(client: BatchClient, store: BatchJobStore, job: BatchJob,
+             poll_interval: float = None, max_wait: float = None) -> Optional[dict]:
+    """Poll a job until it finishes. Returns None if max_wait runs out first."""
+    poll_interval = Config.BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    max_wait = Config.BATCH_MAX_WAIT if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = client.retrieve(job.batch_id)
+        if batch['status'] != job.status:
+            logger.info(f"Batch {job.batch_id} is {batch['status']}")
+            job.status = batch['status']
+            store.update(job.batch_id, job.status)
+        if job.status in TERMINAL_STATUSES:
+            return batch
+        if time.monotonic() >= deadline:
+            logger.warning(f"Batch {job.batch_id} still {job.status}; it will be resumed on the next run")
+            return None
+        time.sleep(poll_interval)
+
+def collect(client: BatchClient, job: BatchJob, batch: dict) -> Tuple[Dict[str, dict], BatchReport]:
+    """Download the results of a finished job and summarize its cost."""
+    results = {}
+    for key in ('output_file_id', 'error_file_id'):
+        if batch.get(key):
+            results.update(parse_results(client.content(batch[key])))
+    report = BatchReport(job.batch_id, job.requests, elapsed=time.time() - job.submitted_at)
+    for result in results.values():
+        if completion_text(result) is None:
+            report.failed += 1
+            continue
+        report.succeeded += 1
+        usage = result['response']['body'].get('usage') or {}
+        report.prompt_tokens += usage.get('prompt_tokens', 0)
+        report.completion_tokens += usage.get('completion_tokens', 0)
+    report.failed += max(0, job.requests - len(results))
+    return results, report
+
+def run_batch(bodies: Dict[str, dict], kind: str, client: BatchClient = None, store: BatchJobStore = None,
+              poll_interval: float = None, max_wait: float = None) -> Tuple[Dict[str, dict], List[BatchReport]]:
+    """
+    Run chat completion requests through the Batch API.
+    Unfinished jobs of the same kind left by earlier runs are resumed, and
+    requests none of them covers are submitted as a new job straight away,
+    before any waiting. Results of resumed jobs for requests no longer asked
+    for are dropped. Returns result lines by custom ID (possibly partial, if
+    a job is still running when max_wait runs out) and a report per finished job.
+    """
+    client = client or BatchClient()
+    own_store = store is None
+    store = store or BatchJobStore()
+    max_wait = Config.BATCH_MAX_WAIT if max_wait is None else max_wait
+    results, reports = {}, []
+    try:
+        jobs = store.unfinished(kind)
+        covered = set()
+        for job in jobs:
+            logger.info(f"Resuming batch {job.batch_id} submitted {datetime.fromtimestamp(job.submitted_at):%Y-%m-%d %H:%M}")
+            covered |= request_ids(job.input_path)
+
+        remaining = {custom_id: body for custom_id, body in bodies.items() if custom_id not in covered}
+        if remaining:
+            input_path = os.path.join(Config.CACHE_DIR, 'batches', f"{kind}-{time.time():.0f}.jsonl")
+            write_requests(input_path, remaining)
+            batch = client.create(client.upload(input_path))
+            jobs.append(store.add(batch['id'], kind, input_path, len(remaining), batch['status']))
+            logger.info(f"Submitted batch {batch['id']} with {len(remaining)} requests")
+
+        # Every job shares one deadline; once it has passed, each is still checked once
+        deadline = time.monotonic() + max_wait
+        for job in jobs:
+            batch = wait_for(client, store, job, poll_interval, max(0.0, deadline - time.monotonic()))
+            if batch is None:
+                continue
+            job_results, report = collect(client, job, batch)
+            reports.append(report)
+            logger.info(str(report))
+            wanted = {custom_id: result for custom_id, result in job_results.items() if custom_id in bodies}
+            if len(wanted) < len(job_results):
+                logger.info(f"Dropped {len(job_results) - len(wanted)} results of batch {job.batch_id} "
+                            f"for requests no longer pending")
+            results.update(wanted)
+    finally:
+        if own_store:
+            store.close()
+    return results, reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect Batch API jobs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="List submitted batch jobs")
+    status = subparsers.add_parser('status', help="Fetch the current status of a job")
+    status.add_argument('batch_id')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        batch = BatchClient().retrieve(args.batch_id)
+        print(f"{batch['id']}: {batch['status']} {batch.get('request_counts', '')}")
+        return
+    with BatchJobStore() as store:
+        for job in store.all():
+            submitted = datetime.fromtimestamp(job.submitted_at)
+            print(f"{job.batch_id} {job.kind}: {job.requests} requests, {job.status}, submitted {submitted:%Y-%m-%d %H:%M}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from app.config import Config
+from app.feed_registry import feed_url
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+@dataclass
+class FeedCadence:
+    url: str
+    last_poll: Optional[float] = None
+    last_change: Optional[float] = None  # Publication time of the newest entry seen
+    mean_interval: Optional[float] = None  # Smoothed seconds between new entries
+    changes: int = 0
+
+    def next_due(self) -> Optional[float]:
+        """When the feed is next expected to have new entries, or None if unknown."""
+        if self.changes < Config.CADENCE_MIN_OBSERVATIONS or not self.mean_interval:
+            return None
+        return self.last_change + self.mean_interval * Config.CADENCE_SAFETY_FACTOR
+
+class CadenceModel:
+    """
+    Per-feed update cadence learned from the publication times of new entries.
+    Feeds that are unlikely to have changed since the last poll are skipped,
+    but never for longer than CADENCE_MAX_SKIP_DAYS.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'cadence.sqlite3')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cadence ("
+            " url TEXT PRIMARY KEY,"
+            " last_poll REAL,"
+            " last_change REAL,"
+            " mean_interval REAL,"
+            " changes INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> FeedCadence:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, last_poll, last_change, mean_interval, changes FROM cadence WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return FeedCadence(*row) if row else FeedCadence(url)
+
+    def is_due(self, url: str, now: float = None) -> bool:
+        """Whether a feed should be polled on this run."""
+        now = now or time.time()
+        cadence = self.get(url)
+        due_at = cadence.next_due()
+        if cadence.last_poll is None or due_at is None:
+            return True
+        if now - cadence.last_poll >= Config.CADENCE_MAX_SKIP_DAYS * DAY:
+            return True
+        return now >= due_at
+
+    def window(self, url: str, days: Tuple[date, ...]) -> Tuple[date, ...]:
+        """
+        Dates to accept entries from: the usual days plus every day since the
+        feed was last polled, so papers published while it was skipped are kept.
+        """
+        cadence = self.get(url)
+        if cadence.last_poll is None:
+            return days
+        start = max(
+            date.fromtimestamp(cadence.last_poll),
+            max(days) - timedelta(days=Config.CADENCE_MAX_SKIP_DAYS)
+        )
+        extra = []
+        day = start
+        while day < min(days):
+            extra.append(day)
+            day += timedelta(days=1)
+        return tuple(days) + tuple(extra)
+
+    def record_poll(self, url: str, newest: Optional[datetime] = None, now: float = None):
+        """Record a successful poll and, if it found newer entries, a change."""
+        now = now or time.time()
+        cadence = self.get(url)
+        cadence.last_poll = now
+        newest_ts = newest.timestamp() if newest else None
+        if newest_ts and (cadence.last_change is None or newest_ts > cadence.last_change):
+            if cadence.last_change is not None:
+                interval = newest_ts - cadence.last_change
+                if cadence.mean_interval is None:
+                    cadence.mean_interval = interval
+                else:
+                    alpha = Config.CADENCE_SMOOTHING
+                    cadence.mean_interval = alpha * interval + (1 - alpha) * cadence.mean_interval
+            cadence.last_change = newest_ts
+            cadence.changes += 1
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cadence (url, last_poll, last_change, mean_interval, changes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, cadence.last_poll, cadence.last_change, cadence.mean_interval, cadence.changes)
+            )
+            self._conn.commit()
+
+    def all(self) -> List[FeedCadence]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, last_poll, last_change, mean_interval, changes FROM cadence ORDER BY url"
+            ).fetchall()
+        return [FeedCadence(*row) for row in rows]
+
+    def reset(self, url: str = None) -> int:
+        """Forget cadence history for one feed or all feeds."""
+        with self._lock:
+            if url:
+                cursor = self._conn.execute("DELETE FROM cadence WHERE url = ?", (url,))
+            else:
+                cursor = self._conn.execute("DELETE FROM cadence")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the per-feed polling cadence model.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show learned cadence and next due time per feed")
+    reset = subparsers.add_parser('reset', help="Forget cadence history")
+    reset.add_argument('--feed', help="Feed URL or journal name (default: all feeds)")
+    args = parser.parse_args()
+
+    with CadenceModel() as model:
+        if args.command == 'reset':
+            url = feed_url(args.feed) if args.feed else None
+            print(f"Reset {model.reset(url)} feed(s)")
+            return
+        now = time.time()
+        for cadence in model.all():
+            interval = f"{cadence.mean_interval / DAY:.1f}d" if cadence.mean_interval else "unknown"
+            due_at = cadence.next_due()
+            due = "due" if model.is_due(cadence.url, now) else \
+                f"next {datetime.fromtimestamp(due_at):%Y-%m-%d %H:%M}"
+            print(f"{cadence.url}: every {interval} ({cadence.changes} changes), {due}")
+
+if __name__ == "__main__":
+    main()
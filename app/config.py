@@ -41,7 +41,65 @@ class Config:
     # File paths
     PREFERENCES_FILE = "preferences.txt"
     DIGEST_PATH_FMT = "digests/{date}.html"
-    
+    INDEX_FILE = "index.html"
+    MANIFEST_FILE = "digests/manifest.jsonl"  # one line per published digest
+    ARCHIVE_PATH_FMT = "digests/archive/{month}.html"  # one archive page per month
+    INDEX_LATEST = int(os.getenv("INDEX_LATEST", "10"))  # digests listed on index.html
+    # Per-journal and per-topic pages across the archive, one page per month
+    SITE_PAGE_FMT = "{section}/{slug}/{page}.html"  # section is "journals" or "topics", page a month or "index"
+    SITE_SECTION_FMT = "{section}/index.html"
+    # Client-side search: postings sharded by term prefix, documents in fixed-size chunks
+    SEARCH_DIR = "search"
+    SEARCH_PREFIX_LEN = 2  # prefix length of new shards
+    SEARCH_SHARD_MAX_POSTINGS = 1000  # larger shards are split by the next letter of their terms
+    SEARCH_BLOCK_DOCS = 10000  # document IDs sharded separately, so new digests only touch the newest block
+    SEARCH_DOC_CHUNK = 1000
+
+    # Per-journal entry profiles; unlisted feeds are learned from their first entries.
+    # Example: {"Nature": {"date_field": "updated_parsed", "doi_field": "id"}}
+    FEED_PROFILES = {}
+
+    # Feed registry: OPML or JSON file; when unset, RSS_FEEDS above is used
+    FEEDS_FILE = os.getenv("FEEDS_FILE")
+
+    # Fetcher settings
+    FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+    FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "15"))  # seconds per feed
+    HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "4"))  # concurrent requests per host
+    HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", "4"))  # requests per second per host; 0 disables
+    HOST_BURST = 4
+    FETCH_RETRIES = 2
+    FETCH_BACKOFF = 1.0  # seconds, doubled on each retry and jittered
+    FETCH_STREAMING = os.getenv("FETCH_STREAMING", "0") == "1"  # incremental XML parsing with early cutoff
+    STREAM_STOP_AFTER_OLD = 3  # consecutive out-of-window entries before a streamed feed is abandoned
+    STREAM_CHUNK_SIZE = 16384
+    FETCH_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+    # Local cache settings
+    CACHE_DIR = os.getenv("PAPERRSS_CACHE_DIR", ".cache")
+    FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "1") == "1"
+    FEED_CACHE_MAX_ENTRIES = 1000
+    ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "1") == "1"  # keep every fetched feed body
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")  # defaults to CACHE_DIR/archive
+    SEEN_STORE_ENABLED = os.getenv("SEEN_STORE_ENABLED", "1") == "1"
+    SEEN_RETENTION_DAYS = int(os.getenv("SEEN_RETENTION_DAYS", "30"))
+    SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "1") == "1"
+    SUMMARY_CACHE_MAX_ENTRIES = 20000
+    SUMMARY_CACHE_MAX_AGE_DAYS = int(os.getenv("SUMMARY_CACHE_MAX_AGE_DAYS", "180"))
+
+    # Adaptive polling: skip feeds until their learned cadence says new entries are likely
+    ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "1") == "1"
+    CADENCE_MIN_OBSERVATIONS = 3  # changes seen before a feed may be skipped
+    CADENCE_SAFETY_FACTOR = 0.75  # poll once this fraction of the mean interval has passed
+    CADENCE_SMOOTHING = 0.3  # weight of the newest interval in the moving average
+    CADENCE_MAX_SKIP_DAYS = 7  # every feed is polled at least this often
+
+    # Duplicate detection
+    DEDUP_TITLE_THRESHOLD = 0.8  # Jaccard similarity of title shingles
+    DEDUP_MIN_TITLE_WORDS = 4  # Shorter titles are only matched by DOI
+    DEDUP_NUM_PERM = 64  # MinHash signature length
+    DEDUP_BANDS = 16  # LSH bands; DEDUP_NUM_PERM must be divisible by this
+
     # GitHub settings
     GITHUB_REPO = os.getenv("GITHUB_REPO")
     GITHUB_BRANCH = "simple_version"
@@ -49,6 +107,45 @@ class Config:
     # OpenAI settings
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = "gpt-4.1-mini"
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    OPENAI_INPUT_PRICE = 0.40  # USD per million prompt tokens, for cost reports
+    OPENAI_OUTPUT_PRICE = 1.60  # USD per million completion tokens
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))  # client-side requests per minute
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))  # client-side tokens per minute
+    ABSTRACT_MAX_TOKENS = int(os.getenv("ABSTRACT_MAX_TOKENS", "400"))  # abstracts are trimmed to this before LLM calls
+    SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "8"))
+    SUMMARY_MAX_RETRIES = 4
+    SUMMARY_BACKOFF = 1.0  # seconds, doubled on each retry and jittered
+    SUMMARY_TIMEOUT = 60.0  # seconds per request
+    SUMMARY_MAX_TOKENS = 200  # completion tokens assumed per summary when budgeting TPM
+    SUMMARY_MODE = os.getenv("SUMMARY_MODE", "single")  # "single", "packed" (several papers per request), "batch" or "local"
+    SUMMARY_LLM_TOP_N = int(os.getenv("SUMMARY_LLM_TOP_N", "0"))  # only the N most relevant papers go to the LLM (0 = all)
+    SUMMARY_LOCAL_FALLBACK = os.getenv("SUMMARY_LOCAL_FALLBACK", "1") == "1"  # extractive summary when the LLM fails
+    SUMMARY_PACK_TOKENS = int(os.getenv("SUMMARY_PACK_TOKENS", "8000"))  # token budget per packed request
+    SUMMARY_PACK_RETRIES = 1  # packed re-submissions of missing or malformed summaries
+
+    # Pipeline: "summarize_first" summarizes every paper before ranking; "rank_first" ranks on
+    # titles and abstracts, then summarizes only the SUMMARY_TOP_K papers shown in full
+    PIPELINE_MODE = os.getenv("PIPELINE_MODE", "summarize_first")
+    SUMMARY_TOP_K = int(os.getenv("SUMMARY_TOP_K", "20"))
+    SUMMARY_REST = os.getenv("SUMMARY_REST", "collapse")  # rank_first: "collapse" the rest, or "local" summaries
+
+    # Ranking: "llm" orders papers with OpenAI, "lexical" uses local BM25 scores only,
+    # "embedding" uses embedding similarity to the topics
+    RANKER = os.getenv("RANKER", "llm")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")  # or "local" (feature hashing, no network)
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+    RANK_CHUNK_SIZE = int(os.getenv("RANK_CHUNK_SIZE", "20"))  # papers scored per LLM request
+    RANK_MAX_WORKERS = 4  # chunks scored concurrently
+    RANK_REPAIR_RETRIES = 1  # re-submissions of papers left unscored
+    RANK_PREFILTER_TOP_N = int(os.getenv("RANK_PREFILTER_TOP_N", "0"))  # LLM ranks only the top lexical candidates (0 = all)
+    RANK_IMPACT_WEIGHT = int(os.getenv("RANK_IMPACT_WEIGHT", "5"))  # weight of impact on the field next to the topic weights
+
+    # Batch API settings (SUMMARY_MODE=batch)
+    BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "60"))  # seconds between status checks
+    BATCH_MAX_WAIT = float(os.getenv("BATCH_MAX_WAIT", "7200"))  # give up waiting; the job is resumed next run
+    BATCH_DISCOUNT = 0.5  # Batch API price relative to synchronous requests
     
     # Logging
     LOG_LEVEL = "INFO" 
\ No newline at end of file
@@ -0,0 +1,150 @@
+import logging
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Tuple
+from app.config import Config
+from app.models import Paper, PLACEHOLDER_DOI_PREFIX, normalize_doi
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r'[\W_]+')
+# Notices about another paper, which must never be merged into the paper they concern
+_NOTICE = re.compile(
+    r'^\s*(?:(?P<correction>(?:author\s+|publisher\s*[\'’]?s?\s+)?correction|corrigendum|erratum)'
+    r'|(?P<retraction>retraction(?:\s+note)?|retracted\s+article)'
+    r'|(?P<concern>(?:editorial\s+)?expression\s+of\s+concern))'
+    r'\s*(?:[:\-–—]|\bto\b:?)\s*',
+    re.IGNORECASE
+)
+
+def split_notice(title: str) -> Tuple[str, str]:
+    """
+    Split a correction, retraction or expression-of-concern prefix off a title.
+    Returns the kind of notice ("" for ordinary papers) and the remaining title.
+    """
+    match = _NOTICE.match(title)
+    if not match:
+        return '', title
+    return match.lastgroup, title[match.end():]
+
+def title_shingles(title: str, size: int = 4) -> FrozenSet[str]:
+    """Character shingles of a normalized title."""
+    text = _NON_WORD.sub(' ', title.casefold()).strip()
+    if len(text) <= size:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class MinHashLSH:
+    """
+    MinHash signatures with banded locality-sensitive hashing.
+    Items whose signatures agree on every row of at least one band become candidates.
+    """
+
+    def __init__(self, num_perm: int = None, bands: int = None, seed: int = 1):
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.bands = bands or Config.DEDUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.rows = self.num_perm // self.bands
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(self.num_perm)
+        ]
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+
+    def signature(self, shingles: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band, buckets in enumerate(self._buckets):
+            yield buckets, signature[band * self.rows:(band + 1) * self.rows]
+
+    def query(self, signature: Tuple[int, ...]) -> List[int]:
+        """Return inserted items sharing at least one band with the signature."""
+        candidates = set()
+        for buckets, key in self._bands(signature):
+            candidates.update(buckets.get(key, ()))
+        return sorted(candidates)
+
+    def insert(self, item: int, signature: Tuple[int, ...]):
+        for buckets, key in self._bands(signature):
+            buckets[key].append(item)
+
+def _merge(kept: Paper, duplicate: Paper):
+    """Fold a duplicate into the paper that is kept."""
+    for journal in [duplicate.journal] + duplicate.also_in:
+        if journal != kept.journal and journal not in kept.also_in:
+            kept.also_in.append(journal)
+    if kept.doi.startswith(PLACEHOLDER_DOI_PREFIX) and not duplicate.doi.startswith(PLACEHOLDER_DOI_PREFIX):
+        kept.doi = duplicate.doi
+    if len(duplicate.abstract or '') > len(kept.abstract or ''):
+        kept.abstract = duplicate.abstract
+    if not kept.summary and duplicate.summary:
+        kept.summary = duplicate.summary
+
+def deduplicate_papers(papers: List[Paper], threshold: float = None) -> List[Paper]:
+    """
+    Merge papers that appear more than once across feeds.
+    Exact duplicates share a normalized DOI; near duplicates have titles whose
+    shingle Jaccard similarity reaches the threshold (found via MinHash/LSH).
+    The first occurrence is kept, in order, with the other journals in also_in.
+    """
+    if not papers:
+        return papers
+    threshold = Config.DEDUP_TITLE_THRESHOLD if threshold is None else threshold
+
+    kept: List[Paper] = []
+    by_doi: Dict[str, Paper] = {}
+    shingles: List[FrozenSet[str]] = []
+    notices: List[str] = []
+    lsh = MinHashLSH()
+
+    for paper in papers:
+        doi = normalize_doi(paper.doi)
+        if not doi.startswith(PLACEHOLDER_DOI_PREFIX) and doi in by_doi:
+            _merge(by_doi[doi], paper)
+            continue
+
+        # Short, generic titles ("Research highlights") are only merged by DOI,
+        # as are titles with no word characters at all. Notices are compared
+        # without their prefix, and only with notices of the same kind.
+        notice, title = split_notice(paper.title)
+        paper_shingles = title_shingles(title)
+        signature = None
+        match = None
+        if paper_shingles and len(title.split()) >= Config.DEDUP_MIN_TITLE_WORDS:
+            signature = lsh.signature(paper_shingles)
+            for candidate in lsh.query(signature):
+                if notices[candidate] == notice and jaccard(paper_shingles, shingles[candidate]) >= threshold:
+                    match = kept[candidate]
+                    break
+        if match is not None:
+            _merge(match, paper)
+            if not doi.startswith(PLACEHOLDER_DOI_PREFIX):
+                by_doi.setdefault(doi, match)
+            continue
+
+        if signature is not None:
+            lsh.insert(len(kept), signature)
+        kept.append(paper)
+        shingles.append(paper_shingles)
+        notices.append(notice)
+        if not doi.startswith(PLACEHOLDER_DOI_PREFIX):
+            by_doi[doi] = paper
+
+    if len(kept) < len(papers):
+        logger.info(f"Merged {len(papers) - len(kept)} duplicate papers")
+    return kept
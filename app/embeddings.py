@@ -0,0 +1,288 @@
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from openai import OpenAI
+from app.config import Config
+from app.lexical import analyze, paper_text
+from app.llm import create_embeddings
+from app.models import Paper, paper_key
+
+logger = logging.getLogger(__name__)
+
+class HashingEmbedder:
+    """
+    Local embedding model: signed feature hashing of the lexical terms
+    (unigrams and bigrams), L2-normalized. Deterministic and needs no network.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for term in analyze(text):
+                h = zlib.crc32(term.encode('utf-8'))
+                vectors[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API, requested in batches within the shared rate budget."""
+
+    def __init__(self, model: str = None, dim: int = None, client=None, batch_size: int = 256):
+        self.name = model or Config.EMBEDDING_MODEL
+        self.dim = dim or Config.EMBEDDING_DIM
+        self.client = client or OpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0, timeout=Config.SUMMARY_TIMEOUT)
+        self.batch_size = batch_size
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            response = create_embeddings(self.client, list(texts[start:start + self.batch_size]), self.name, self.dim)
+            batches.append(np.array([item.embedding for item in response.data], dtype=np.float32))
+        vectors = np.vstack(batches)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+def get_embedder(backend: str = None):
+    backend = backend or Config.EMBEDDING_BACKEND
+    if backend == "openai":
+        return OpenAIEmbedder()
+    if backend == "local":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+VECTOR_FILE = re.compile(r'vectors(-\d+)?\.f32')
+
+class EmbeddingStore:
+    """
+    Append-only store of float32 vectors for one embedding model.
+    Vectors live in a raw file that is memory-mapped on demand, so opening the
+    store does not read it; a SQLite index maps keys (paper keys, topics) to rows.
+    Re-embedded keys append a new row; compact() writes a new file without
+    rows that are no longer referenced and switches the index to it.
+    """
+
+    def __init__(self, model: str, dim: int, root: str = None):
+        self.model = model
+        self.dim = dim
+        self.root = os.path.join(root or os.path.join(Config.CACHE_DIR, 'embeddings'), re.sub(r'[^\w.-]', '_', model))
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " key TEXT PRIMARY KEY,"
+            " row INTEGER NOT NULL,"
+            " added_at REAL NOT NULL)"
+        )
+        stored_dim = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if stored_dim and int(stored_dim[0]) != dim:
+            raise ValueError(f"Embedding store {self.root} holds {stored_dim[0]}-d vectors, not {dim}-d")
+        self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (str(dim),))
+        self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('vectors', 'vectors.f32')")
+        self._conn.commit()
+        vectors_file = self._conn.execute("SELECT value FROM meta WHERE name = 'vectors'").fetchone()[0]
+        self.vectors_path = os.path.join(self.root, vectors_file)
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, 'wb').close()
+        self._remove_stale_files()
+        self._drop_partial_row()
+
+    def _remove_stale_files(self):
+        """Delete vector files left behind by an interrupted compaction."""
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if VECTOR_FILE.fullmatch(name) and path != self.vectors_path:
+                logger.warning(f"Removing stale vector file {path}")
+                os.remove(path)
+
+    def _drop_partial_row(self):
+        """Truncate a partly written trailing row, so appended rows land where the index records them."""
+        size = os.path.getsize(self.vectors_path)
+        whole = size - size % (4 * self.dim)
+        if whole != size:
+            logger.warning(f"Dropping {size - whole} bytes of a partly written vector from {self.vectors_path}")
+            os.truncate(self.vectors_path, whole)
+            self._vectors = None
+
+    @property
+    def rows(self) -> int:
+        """Rows in the vector file, including ones no longer referenced."""
+        return os.path.getsize(self.vectors_path) // (4 * self.dim)
+
+    def _mapped(self) -> np.ndarray:
+        if self._vectors is None or len(self._vectors) != self.rows:
+            rows = self.rows
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim)) \
+                if rows else np.empty((0, self.dim), dtype=np.float32)
+        return self._vectors
+
+    def lookup(self, keys: Sequence[str]) -> Dict[str, int]:
+        """Row of each stored key."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, row FROM rows WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        return found
+
+    def get(self, keys: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectors for keys (zero rows where missing) and a mask of which were found."""
+        rows = self.lookup(keys)
+        found = np.array([key in rows for key in keys], dtype=bool)
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        if found.any():
+            with self._lock:
+                mapped = self._mapped()
+                vectors[found] = mapped[[rows[key] for key, hit in zip(keys, found) if hit]]
+        return vectors, found
+
+    def append(self, keys: Sequence[str], vectors: np.ndarray):
+        """Append vectors for keys; a key already stored now points at its new row."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"Expected {len(keys)} vectors of dimension {self.dim}, got {vectors.shape}")
+        with self._lock:
+            self._drop_partial_row()
+            start = self.rows
+            # The vectors must be on disk before the index points at them
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (key, row, added_at) VALUES (?, ?, ?)",
+                [(key, start + i, now) for i, key in enumerate(keys)]
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Number of keys stored."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def compact(self, max_age_days: float = None) -> int:
+        """
+        Rewrite the vector file with only referenced rows, optionally dropping
+        keys added more than max_age_days ago. Returns the number of rows removed.
+        """
+        with self._lock:
+            if max_age_days is not None:
+                self._conn.execute("DELETE FROM rows WHERE added_at < ?", (time.time() - max_age_days * 86400,))
+            live = self._conn.execute("SELECT key, row FROM rows ORDER BY row").fetchall()
+            before = self.rows
+            mapped = self._mapped()
+            # The compacted rows go to a new file that the index switches to in the
+            # same transaction as the row numbers; until then the old file stays valid
+            generation = 1
+            while os.path.exists(os.path.join(self.root, f'vectors-{generation}.f32')):
+                generation += 1
+            new_path = os.path.join(self.root, f'vectors-{generation}.f32')
+            with open(new_path, 'wb') as f:
+                for start in range(0, len(live), 4096):
+                    f.write(np.ascontiguousarray(mapped[[row for _, row in live[start:start + 4096]]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._vectors = None
+            del mapped
+            try:
+                self._conn.executemany("UPDATE rows SET row = ? WHERE key = ?", [(i, key) for i, (key, _) in enumerate(live)])
+                self._conn.execute("UPDATE meta SET value = ? WHERE name = 'vectors'", (os.path.basename(new_path),))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                os.remove(new_path)
+                raise
+            old_path, self.vectors_path = self.vectors_path, new_path
+            os.remove(old_path)
+        removed = before - len(live)
+        logger.info(f"Compacted embedding store {self.root}: {removed} rows removed")
+        return removed
+
+    def close(self):
+        self._vectors = None
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def embed_missing(store: EmbeddingStore, embedder, keys: List[str], texts: List[str]) -> np.ndarray:
+    """Vectors for keys, embedding and appending only those not yet stored."""
+    vectors, found = store.get(keys)
+    missing = [i for i, hit in enumerate(found) if not hit]
+    if missing:
+        # Embed each distinct key once, even if it appears several times
+        unique = list(dict.fromkeys(keys[i] for i in missing))
+        text_of = {keys[i]: texts[i] for i in missing}
+        new = embedder.embed([text_of[key] for key in unique])
+        store.append(unique, new)
+        row_of = {key: j for j, key in enumerate(unique)}
+        vectors[missing] = new[[row_of[keys[i]] for i in missing]]
+        logger.info(f"Embedded {len(unique)} new texts, reused {len(keys) - len(missing)}")
+    return vectors
+
+def embedding_scores(papers: List[Paper], preferences: Dict[str, int], embedder=None,
+                     store: EmbeddingStore = None) -> np.ndarray:
+    """Preference-weighted cosine similarity of each paper to the topics, shape (papers,)."""
+    embedder = embedder or get_embedder()
+    topics = list(preferences)
+    own_store = store is None
+    store = store or EmbeddingStore(embedder.name, embedder.dim)
+    try:
+        paper_vectors = embed_missing(store, embedder, [paper_key(p) for p in papers],
+                                      [paper_text(p, title_weight=1) for p in papers])
+        topic_vectors = embed_missing(store, embedder, [f"topic:{t}" for t in topics], topics)
+    finally:
+        if own_store:
+            store.close()
+    weights = np.array([preferences[t] for t in topics], dtype=np.float32)
+    return (paper_vectors @ topic_vectors.T) @ weights
+
+def embedding_rank(papers: List[Paper], preferences: Dict[str, int], embedder=None,
+                   store: EmbeddingStore = None) -> List[Paper]:
+    """Papers ordered by embedding similarity to the weighted preferences; ties keep input order."""
+    if not papers or not preferences:
+        return list(papers)
+    scores = embedding_scores(papers, preferences, embedder, store)
+    return [papers[i] for i in np.argsort(-scores, kind='stable')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the embedding store.")
+    parser.add_argument('--backend', choices=['openai', 'local'], help="Embedding backend (default: EMBEDDING_BACKEND)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show stored keys and vector file size")
+    compact = subparsers.add_parser('compact', help="Drop unreferenced rows from the vector file")
+    compact.add_argument('--max-age-days', type=float, help="Also forget vectors added before this many days ago")
+    args = parser.parse_args()
+
+    local = (args.backend or Config.EMBEDDING_BACKEND) == "local"
+    model = HashingEmbedder().name if local else Config.EMBEDDING_MODEL
+    dim = HashingEmbedder().dim if local else Config.EMBEDDING_DIM
+    with EmbeddingStore(model, dim) as store:
+        if args.command == 'compact':
+            print(f"Removed {store.compact(args.max_age_days)} rows")
+        else:
+            size = os.path.getsize(store.vectors_path)
+            print(f"{store.count()} keys in {store.rows} rows ({size} bytes) at {store.root}")
+
+if __name__ == "__main__":
+    main()
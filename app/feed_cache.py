@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from app.config import Config
+from app.feed_registry import feed_url
+from app.models import Paper, paper_from_dict, paper_to_dict
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FeedValidators:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+    updated_at: float = 0.0
+
+class FeedCache:
+    """
+    Persistent store of HTTP validators (ETag, Last-Modified, body hash) per feed.
+    Used to send conditional requests and skip feeds that have not changed.
+    The papers last parsed from each feed are kept with its validators, so a
+    feed that has not changed still yields its papers on a rerun.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'feed_cache.sqlite3')
+        self.max_entries = max_entries or Config.FEED_CACHE_MAX_ENTRIES
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " body_hash TEXT,"
+            " updated_at REAL NOT NULL,"
+            " papers TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(validators)")}
+        if 'papers' not in columns:
+            self._conn.execute("ALTER TABLE validators ADD COLUMN papers TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_validators_updated ON validators (updated_at)")
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[FeedValidators]:
+        """Return the stored validators for a feed, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, body_hash, updated_at FROM validators WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return FeedValidators(*row) if row else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a feed."""
+        validators = self.get(url)
+        headers = {}
+        if validators:
+            if validators.etag:
+                headers['If-None-Match'] = validators.etag
+            if validators.last_modified:
+                headers['If-Modified-Since'] = validators.last_modified
+        return headers
+
+    def is_unchanged(self, url: str, body_hash: str) -> bool:
+        """Check whether a downloaded body matches the last one seen."""
+        validators = self.get(url)
+        return bool(validators and validators.body_hash == body_hash)
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], body_hash: str,
+              papers: List[Paper] = None):
+        """
+        Save validators for a feed and enforce the size limit.
+        Papers parsed from an earlier body are dropped unless new ones are given.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, body_hash, updated_at, papers) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body_hash, time.time(), self._encode(papers))
+            )
+            # Drop the least recently updated feeds beyond the limit
+            self._conn.execute(
+                "DELETE FROM validators WHERE url NOT IN "
+                "(SELECT url FROM validators ORDER BY updated_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _encode(papers: Optional[List[Paper]]) -> Optional[str]:
+        if papers is None:
+            return None
+        return json.dumps([paper_to_dict(paper) for paper in papers], ensure_ascii=False)
+
+    def store_papers(self, url: str, papers: List[Paper]):
+        """Keep the papers parsed from the body whose validators were last stored."""
+        with self._lock:
+            self._conn.execute("UPDATE validators SET papers = ? WHERE url = ?", (self._encode(papers), url))
+            self._conn.commit()
+
+    def papers(self, url: str, days: Iterable[date]) -> List[Paper]:
+        """Papers last parsed from a feed that were published on one of the given days."""
+        with self._lock:
+            row = self._conn.execute("SELECT papers FROM validators WHERE url = ?", (url,)).fetchone()
+        if not row or not row[0]:
+            return []
+        days = set(days)
+        papers = [paper_from_dict(data) for data in json.loads(row[0])]
+        return [paper for paper in papers if paper.published_date.date() in days]
+
+    def touch(self, url: str):
+        """Mark a feed as recently validated without changing its validators."""
+        with self._lock:
+            self._conn.execute("UPDATE validators SET updated_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def invalidate(self, url: str = None) -> int:
+        """
+        Remove validators for one feed, or for all feeds if no URL is given.
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            if url:
+                cursor = self._conn.execute("DELETE FROM validators WHERE url = ?", (url,))
+            else:
+                cursor = self._conn.execute("DELETE FROM validators")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        """Return the number of cached feeds."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM validators").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the conditional GET feed cache.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    clear = subparsers.add_parser('clear', help="Invalidate cached validators")
+    clear.add_argument('--feed', help="Feed URL or journal name to invalidate (default: all feeds)")
+    subparsers.add_parser('stats', help="Show the number of cached feeds")
+    args = parser.parse_args()
+
+    with FeedCache() as cache:
+        if args.command == 'clear':
+            url = feed_url(args.feed) if args.feed else None
+            removed = cache.invalidate(url)
+            print(f"Removed {removed} cached feed(s)")
+        else:
+            print(f"{cache.count()} cached feed(s) in {cache.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urlparse
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Feed:
+    journal: str
+    url: str
+    group: Optional[str] = None
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc.lower()
+
+def _load_opml(path: str) -> List[Feed]:
+    """Read feeds from the outline elements of an OPML file."""
+    feeds = []
+
+    def walk(node, group):
+        for outline in node.findall('outline'):
+            url = outline.get('xmlUrl')
+            title = outline.get('title') or outline.get('text')
+            if url:
+                feeds.append(Feed(journal=title or url, url=url, group=group))
+            else:
+                walk(outline, title or group)
+
+    body = ET.parse(path).getroot().find('body')
+    if body is not None:
+        walk(body, None)
+    return feeds
+
+def _load_json(path: str) -> List[Feed]:
+    """Read feeds from {"journal": "url"} or [{"journal": ..., "url": ..., "group": ...}]."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return [Feed(journal=journal, url=url) for journal, url in data.items()]
+    return [Feed(journal=item['journal'], url=item['url'], group=item.get('group')) for item in data]
+
+def load_feeds(path: str = None) -> List[Feed]:
+    """
+    Load the feed registry.
+    Reads Config.FEEDS_FILE (OPML or JSON) when set, otherwise Config.RSS_FEEDS.
+    Duplicate URLs are dropped, keeping the first entry.
+    """
+    path = path or Config.FEEDS_FILE
+    if path:
+        if path.lower().endswith('.json'):
+            feeds = _load_json(path)
+        else:
+            feeds = _load_opml(path)
+        logger.info(f"Loaded {len(feeds)} feeds from {path}")
+    else:
+        feeds = [Feed(journal=journal, url=url) for journal, url in Config.RSS_FEEDS.items()]
+
+    seen = set()
+    unique = []
+    for feed in feeds:
+        if feed.url not in seen:
+            seen.add(feed.url)
+            unique.append(feed)
+    return unique
+
+def feed_url(name: str, path: str = None) -> str:
+    """URL of a feed given by journal name (as listed in the registry) or by URL."""
+    for feed in load_feeds(path):
+        if feed.journal == name:
+            return feed.url
+    return name
+
+def to_opml(feeds: List[Feed], title: str = "PaperRSS feeds") -> str:
+    """Serialize feeds as OPML, grouping them by their group name."""
+    root = ET.Element('opml', version='2.0')
+    ET.SubElement(ET.SubElement(root, 'head'), 'title').text = title
+    body = ET.SubElement(root, 'body')
+    groups = {}
+    for feed in feeds:
+        parent = body
+        if feed.group:
+            if feed.group not in groups:
+                groups[feed.group] = ET.SubElement(body, 'outline', text=feed.group)
+            parent = groups[feed.group]
+        ET.SubElement(parent, 'outline', type='rss', text=feed.journal, title=feed.journal, xmlUrl=feed.url)
+    ET.indent(root)
+    return ET.tostring(root, encoding='unicode', xml_declaration=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export the feed registry.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="List feeds grouped by host")
+    export = subparsers.add_parser('export', help="Write the registry as OPML")
+    export.add_argument('output', nargs='?', help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    feeds = load_feeds()
+    if args.command == 'export':
+        opml = to_opml(feeds)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(opml)
+        else:
+            print(opml)
+    else:
+        hosts = {}
+        for feed in feeds:
+            hosts.setdefault(feed.host, []).append(feed)
+        for host, host_feeds in sorted(hosts.items(), key=lambda item: -len(item[1])):
+            print(f"{host} ({len(host_feeds)})")
+            for feed in host_feeds:
+                print(f"  {feed.journal}: {feed.url}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
+import hashlib
 import logging
 import feedparser
-from datetime import datetime, timedelta
-from typing import List
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
 from app.models import Paper
 from app.config import Config
-import re
+from app.archive import ArchivingSession, FeedArchive, ReplaySession
+from app.cadence import CadenceModel
+from app.feed_cache import FeedCache
+from app.feed_registry import load_feeds
+from app.normalizer import DOI_PATTERN, DOI_TRAILING_PUNCTUATION, EntryNormalizer, get_profile
+from app.scheduler import HostScheduler
+from app.streaming import StreamParseError, iter_entries
 
 logger = logging.getLogger(__name__)
 
@@ -47,66 +57,236 @@ def extract_doi(entry) -> str:
             # Look for DOI pattern in the value
             if '10.' in value:
                 # Extract DOI using more precise pattern matching
-                # First find the DOI pattern
-                doi_pattern = r'10\.\d{4,9}/[-\w.]+[-\w.:/]+[-\w.]+'
-                doi_match = re.search(doi_pattern, value, re.IGNORECASE)
+                doi_match = DOI_PATTERN.search(value)
                 if doi_match:
                     # Clean up any trailing punctuation
-                    doi = doi_match.group(0)
-                    doi = re.sub(r'[.,;)]+$', '', doi)
-                    return doi
+                    return DOI_TRAILING_PUNCTUATION.sub('', doi_match.group(0))
     
     # If no DOI found, generate a placeholder with timestamp
     logger.warning(f"No DOI found for entry: {entry.get('title', 'Unknown')}")
     return f"10.placeholder-{datetime.now().strftime('%Y%m%d%H%M%S')}"
 
-def fetch_today_articles() -> List[Paper]:
+def create_session(pool_size: int = None, archive: FeedArchive = None) -> requests.Session:
     """
-    Fetch articles from RSS feeds published today or yesterday.
-    Returns a list of Paper objects.
+    Create an HTTP session with pooled keep-alive connections.
+    Connections are pooled per host, so feeds sharing a host reuse sockets.
+    With an archive, every fetched body is also stored in it.
+    """
+    pool_size = pool_size or Config.FETCH_MAX_WORKERS
+    session = ArchivingSession(archive) if archive else requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': Config.FETCH_USER_AGENT})
+    return session
+
+def download_feed(session: requests.Session, feed_url: str, timeout: float = None,
+                  cache: FeedCache = None) -> Optional[bytes]:
+    """
+    Download the raw body of a feed.
+    With a cache, a conditional request is sent and None is returned
+    when the feed has not changed since the last fetch.
+    """
+    headers = cache.conditional_headers(feed_url) if cache else {}
+    response = session.get(feed_url, headers=headers, timeout=timeout or Config.FETCH_TIMEOUT)
+    if response.status_code == 304:
+        logger.info(f"Feed not modified: {feed_url}")
+        if cache:
+            cache.touch(feed_url)
+        return None
+    response.raise_for_status()
+    body = response.content
+
+    if cache:
+        body_hash = hashlib.sha256(body).hexdigest()
+        if cache.is_unchanged(feed_url, body_hash):
+            logger.info(f"Feed body unchanged: {feed_url}")
+            cache.touch(feed_url)
+            return None
+        cache.store(
+            feed_url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_hash=body_hash
+        )
+    return body
+
+def parse_entries(journal: str, entries, days: Tuple[date, ...],
+                  normalizer: EntryNormalizer = None) -> List[Paper]:
+    """
+    Convert feed entries into Paper objects.
+    Only entries published on one of the given days are kept.
+    With a normalizer, dates and DOIs are read through the feed's profile.
     """
     papers = []
-    today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
-    
-    for journal, feed_url in Config.RSS_FEEDS.items():
+    date_of = normalizer.parse_date if normalizer else parse_date
+    doi_of = normalizer.extract_doi if normalizer else extract_doi
+    for entry in entries:
         try:
-            logger.info(f"Fetching feed for {journal}")
-            feed = feedparser.parse(feed_url)
-            
-            if not feed.entries:
-                logger.warning(f"No entries found in feed for {journal}")
+            # Parse published date
+            published = date_of(entry)
+            if published.date() not in days:
                 continue
-            
-            for entry in feed.entries:
-                try:
-                    # Parse published date
-                    published = parse_date(entry)
-                    if published.date() not in [today, yesterday]:
-                        continue
-                    
-                    # Extract DOI
-                    doi = extract_doi(entry)
-                    
-                    # Create Paper object
-                    paper = Paper(
-                        title=entry.get('title', 'No Title'),
-                        doi=doi,
-                        link=entry.get('link', ''),
-                        abstract=entry.get('summary', 'No abstract available'),
-                        journal=journal,
-                        published_date=published
-                    )
-                    papers.append(paper)
-                    logger.info(f"Added paper: {paper.title}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing entry: {str(e)}")
-                    continue
-                    
+
+            # Extract DOI
+            doi = doi_of(entry)
+
+            # Create Paper object
+            paper = Paper(
+                title=entry.get('title', 'No Title'),
+                doi=doi,
+                link=entry.get('link', ''),
+                abstract=entry.get('summary', 'No abstract available'),
+                journal=journal,
+                published_date=published
+            )
+            papers.append(paper)
+            logger.info(f"Added paper: {paper.title}")
+
         except Exception as e:
-            logger.error(f"Error fetching feed {journal}: {str(e)}")
+            logger.error(f"Error processing entry: {str(e)}")
             continue
-    
+    return papers
+
+def stream_feed(session: requests.Session, journal: str, feed_url: str, days: Tuple[date, ...],
+                normalizer: EntryNormalizer, timeout: float = None, cache: FeedCache = None) -> List[Paper]:
+    """
+    Fetch a feed through the streaming parser.
+    Entries are parsed as the body downloads, and the download stops once
+    entries are confirmed older than the oldest accepted day.
+    Raises StreamParseError for malformed feeds.
+    """
+    headers = cache.conditional_headers(feed_url) if cache else {}
+    with session.get(feed_url, headers=headers, timeout=timeout or Config.FETCH_TIMEOUT, stream=True) as response:
+        if response.status_code == 304:
+            logger.info(f"Feed not modified: {feed_url}")
+            if cache:
+                cache.touch(feed_url)
+                return cache.papers(feed_url, days)
+            return []
+        response.raise_for_status()
+        entries = iter_entries(response.iter_content(Config.STREAM_CHUNK_SIZE), cutoff=min(days))
+        papers = parse_entries(journal, entries, days, normalizer)
+
+    # The body may not have been read in full, so only the HTTP validators are kept
+    if cache:
+        cache.store(
+            feed_url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_hash=None,
+            papers=papers
+        )
+    return papers
+
+def fetch_feed(session: requests.Session, journal: str, feed_url: str,
+               days: Tuple[date, ...], timeout: float = None, cache: FeedCache = None) -> List[Paper]:
+    """
+    Download and parse a single feed.
+    Runs inside a worker thread, so each body is parsed as soon as it arrives.
+    Unchanged feeds are not parsed again; the papers parsed from them last
+    time are returned instead.
+    """
+    logger.info(f"Fetching feed for {journal}")
+    profile = get_profile(feed_url, journal)
+    normalizer = EntryNormalizer(profile, parse_date, extract_doi)
+
+    if Config.FETCH_STREAMING and profile.streamable:
+        try:
+            return stream_feed(session, journal, feed_url, days, normalizer, timeout, cache)
+        except StreamParseError as e:
+            logger.warning(f"Streaming parse failed for {journal}, falling back to feedparser: {str(e)}")
+            profile.streamable = False
+
+    body = download_feed(session, feed_url, timeout, cache)
+    if body is None:
+        return cache.papers(feed_url, days) if cache else []
+    feed = feedparser.parse(body)
+
+    if not feed.entries:
+        logger.warning(f"No entries found in feed for {journal}")
+        papers = []
+    else:
+        papers = parse_entries(journal, feed.entries, days, normalizer)
+    if cache:
+        cache.store_papers(feed_url, papers)
+    return papers
+
+def fetch_today_articles(max_workers: int = None, timeout: float = None,
+                         use_cache: bool = None, scheduler: HostScheduler = None,
+                         force_refresh: bool = False, replay: date = None) -> List[Paper]:
+    """
+    Fetch articles from RSS feeds published today or yesterday.
+    Feeds come from the feed registry and are fetched concurrently under the
+    host scheduler's per-host limits; papers are returned in registry order.
+    With the feed cache enabled, feeds unchanged since the last run are not
+    parsed again, and yield the papers parsed from them last time.
+    With adaptive polling enabled, feeds not expected to have new entries are
+    not requested at all, unless force_refresh is set.
+    With a replay date, feeds are read from the raw feed archive as they were
+    at the end of that day, and that day is treated as today.
+    Returns a list of Paper objects.
+    """
+    today = replay or datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    days = (today, yesterday)
+
+    feeds = load_feeds()
+    if not feeds:
+        return []
+    position = {feed.url: i for i, feed in enumerate(feeds)}
+    results: List[List[Paper]] = [[] for _ in feeds]
+    archive = FeedArchive() if replay or Config.ARCHIVE_ENABLED else None
+    if replay:
+        # Replays are offline and must not disturb the live caches
+        cache = cadence = None
+        scheduler = scheduler or HostScheduler(rate=0, retries=0)
+    else:
+        if use_cache is None:
+            use_cache = Config.FEED_CACHE_ENABLED
+        cache = FeedCache() if use_cache else None
+        cadence = CadenceModel() if Config.ADAPTIVE_POLLING else None
+        scheduler = scheduler or HostScheduler()
+
+    if cadence and not force_refresh:
+        due = [feed for feed in feeds if cadence.is_due(feed.url)]
+        if len(due) < len(feeds):
+            logger.info(f"Skipping {len(feeds) - len(due)} feeds not expected to have new entries")
+        feeds = due
+    max_workers = max(1, min(max_workers or Config.FETCH_MAX_WORKERS, len(feeds) or 1))
+
+    def fetch(feed):
+        feed_days = cadence.window(feed.url, days) if cadence else days
+        papers = fetch_feed(session, feed.journal, feed.url, feed_days, timeout, cache)
+        if cadence:
+            newest = max((paper.published_date for paper in papers), default=None)
+            cadence.record_poll(feed.url, newest)
+        return papers
+
+    if replay:
+        session = ReplaySession(archive, as_of=datetime.combine(today, datetime.max.time()))
+    else:
+        session = create_session(max_workers, archive)
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(scheduler.run, feed, partial(fetch, feed)): feed
+            for feed in HostScheduler.order(feeds)
+        }
+        for future in as_completed(futures):
+            feed = futures[future]
+            try:
+                results[position[feed.url]] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching feed {feed.journal}: {str(e)}")
+
+    if cache:
+        cache.close()
+    if cadence:
+        cadence.close()
+    if archive:
+        archive.close()
+    logger.info(scheduler.report())
+    papers = [paper for feed_papers in results for paper in feed_papers]
     logger.info(f"Total papers fetched: {len(papers)}")
-    return papers 
\ No newline at end of file
+    return papers
@@ -0,0 +1,104 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence
+import numpy as np
+from app.models import Paper
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the their this to via we with".split()
+)
+
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """Light plural folding, so 'therapies' matches 'therapy' and 'devices' matches 'device'."""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def words(text: str) -> List[str]:
+    return [_stem(w) for w in _WORD.findall((text or '').lower()) if w not in STOPWORDS]
+
+def analyze(text: str) -> List[str]:
+    """Unigram terms plus adjacent bigrams, so multi-word topics reward exact phrases."""
+    unigrams = words(text)
+    return unigrams + [f"{a} {b}" for a, b in zip(unigrams, unigrams[1:])]
+
+def paper_text(paper: Paper, title_weight: int = 2) -> str:
+    """Title (repeated to weight it), abstract and summary as one document."""
+    return ' '.join([paper.title or ''] * title_weight + [paper.abstract or '', paper.summary or ''])
+
+class BM25Scorer:
+    """
+    BM25 relevance of papers to weighted preference topics.
+    Documents are indexed sparsely as (document, term, count) triples over the
+    topic vocabulary only, and all topics are scored at once with matrix products.
+    """
+
+    def __init__(self, preferences: Dict[str, int], k1: float = 1.5, b: float = 0.75):
+        self.topics = list(preferences)
+        self.weights = np.array([preferences[t] for t in self.topics], dtype=float)
+        self.k1, self.b = k1, b
+        topic_terms = [set(analyze(topic)) for topic in self.topics]
+        self.vocab = {term: i for i, term in enumerate(sorted(set().union(*topic_terms)))}
+        # (terms x topics) membership, normalized so long topics do not outweigh short ones
+        self.topic_matrix = np.zeros((len(self.vocab), len(self.topics)))
+        for j, terms in enumerate(topic_terms):
+            for term in terms:
+                self.topic_matrix[self.vocab[term], j] = 1 / len(terms)
+
+    def index(self, documents: Sequence[str]):
+        """Sparse term counts as parallel (doc, term, count) arrays, plus document lengths."""
+        vocab = self.vocab
+        docs, terms, lengths = [], [], np.zeros(len(documents))
+        for i, document in enumerate(documents):
+            unigrams = words(document)
+            lengths[i] = max(2 * len(unigrams) - 1, 0)  # unigrams plus bigrams, as analyze() counts them
+            previous = None
+            for word in unigrams:
+                term = vocab.get(word)
+                if term is not None:
+                    docs.append(i)
+                    terms.append(term)
+                    # Topic bigrams are made of topic words, so only pairs of them can match one
+                    if previous is not None:
+                        bigram = vocab.get(f"{previous} {word}")
+                        if bigram is not None:
+                            docs.append(i)
+                            terms.append(bigram)
+                    previous = word
+                else:
+                    previous = None
+        if not docs:
+            return np.empty(0, int), np.empty(0, int), np.empty(0), lengths
+        keys, counts = np.unique(np.array(docs) * len(vocab) + np.array(terms), return_counts=True)
+        return keys // len(vocab), keys % len(vocab), counts.astype(float), lengths
+
+    def topic_scores(self, documents: Sequence[str]) -> np.ndarray:
+        """BM25 score of every document for every topic, shape (documents, topics)."""
+        n = len(documents)
+        scores = np.zeros((n, len(self.vocab)))
+        doc_idx, term_idx, tf, lengths = self.index(documents)
+        if n and len(tf):
+            df = np.bincount(term_idx, minlength=len(self.vocab))
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1))
+            scores[doc_idx, term_idx] = idf[term_idx] * tf * (self.k1 + 1) / (tf + norm[doc_idx])
+        return scores @ self.topic_matrix
+
+    def score(self, papers: Sequence[Paper]) -> np.ndarray:
+        """Preference-weighted relevance of each paper."""
+        return self.topic_scores([paper_text(paper) for paper in papers]) @ self.weights
+
+def lexical_rank(papers: List[Paper], preferences: Dict[str, int]) -> List[Paper]:
+    """Papers ordered by BM25 relevance to the weighted preferences; ties keep input order."""
+    if not papers or not preferences:
+        return list(papers)
+    scores = BM25Scorer(preferences).score(papers)
+    order = np.argsort(-scores, kind='stable')
+    return [papers[i] for i in order]
@@ -0,0 +1,109 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+import openai
+from app.config import Config
+from app.scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Client-side requests-per-minute and tokens-per-minute budget."""
+
+    def __init__(self, rpm: int = None, tpm: int = None):
+        rpm = Config.OPENAI_RPM if rpm is None else rpm
+        tpm = Config.OPENAI_TPM if tpm is None else tpm
+        self.requests = TokenBucket(rpm / 60, rpm)
+        self.tokens = TokenBucket(tpm / 60, tpm)
+
+    def acquire(self, tokens: int):
+        self.requests.acquire()
+        self.tokens.acquire(tokens)
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter, so every stage shares the same API budget."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+def estimate_tokens(messages: List[Dict[str, str]], completion_tokens: int = 0) -> int:
+    """Rough token count (about 4 characters per token) for budgeting."""
+    return sum(len(m['content']) for m in messages) // 4 + 4 * len(messages) + completion_tokens
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limiting, server errors, timeouts and connection problems are retried."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+def failure_status(error: Exception) -> str:
+    """Short per-paper status describing why a request failed."""
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limited"
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection_error"
+    if isinstance(error, openai.APIStatusError):
+        return "server_error" if error.status_code >= 500 else f"http_{error.status_code}"
+    return "error"
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait as requested by the server, if any."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def _with_retries(call, tokens: int, limiter: RateLimiter = None, max_retries: int = None):
+    """
+    Run an API call within the rate budget.
+    Retryable failures are retried with jittered exponential backoff, honoring
+    Retry-After; the last error is raised once retries are exhausted.
+    """
+    limiter = limiter or get_limiter()
+    max_retries = Config.SUMMARY_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        limiter.acquire(tokens)
+        try:
+            return call()
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = Config.SUMMARY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            logger.warning(f"OpenAI request failed ({failure_status(e)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def create_completion(client, messages: List[Dict[str, str]], limiter: RateLimiter = None,
+                      completion_tokens: int = 0, max_retries: int = None, **kwargs):
+    """Call chat.completions.create within the rate budget, retrying transient failures."""
+    return _with_retries(
+        lambda: client.chat.completions.create(model=Config.OPENAI_MODEL, messages=messages, **kwargs),
+        estimate_tokens(messages, completion_tokens), limiter, max_retries
+    )
+
+def create_embeddings(client, texts: List[str], model: str, dimensions: int = None,
+                      limiter: RateLimiter = None, max_retries: int = None):
+    """Call embeddings.create within the rate budget, retrying transient failures."""
+    kwargs = {'dimensions': dimensions} if dimensions else {}
+    return _with_retries(
+        lambda: client.embeddings.create(model=model, input=texts, **kwargs),
+        sum(len(text) for text in texts) // 4, limiter, max_retries
+    )
@@ -0,0 +1,161 @@
+import argparse
+import glob
+import html
+import json
+import logging
+import os
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import Config
+from app.models import Paper, load_papers
+
+logger = logging.getLogger(__name__)
+
+# Paper cards in rendered digests, for digests saved without their papers
+_CARD = re.compile(
+    r'<div class="paper">\s*<h2><a href="([^"]*)">(.*?)</a></h2>\s*'
+    r'<div class="journal">([^<&]*)(?:&middot; also in ([^<]*))?</div>\s*'
+    r'<div class="doi">DOI: ([^<]*)</div>\s*<div class="summary">(.*?)</div>',
+    re.DOTALL
+)
+
+@dataclass
+class DigestEntry:
+    date: str  # YYYY-MM-DD
+    papers: int
+    journals: List[str] = field(default_factory=list)  # Most frequent first
+    top_titles: List[str] = field(default_factory=list)  # Highest ranked first
+
+    @property
+    def month(self) -> str:
+        return self.date[:7]
+
+def digest_entry(date: str, papers: List[Paper], top: int = 3) -> DigestEntry:
+    """Manifest entry for a digest of ranked papers."""
+    journals = Counter(paper.journal for paper in papers)
+    return DigestEntry(
+        date=date,
+        papers=len(papers),
+        journals=[journal for journal, _ in journals.most_common()],
+        top_titles=[paper.title for paper in papers[:top]]
+    )
+
+def papers_from_html(date: str, page: str) -> List[Paper]:
+    """Papers shown in full on a rendered digest page, in ranked order."""
+    published = datetime.strptime(date, '%Y-%m-%d')
+    return [
+        Paper(
+            title=html.unescape(title),
+            doi=html.unescape(doi).strip(),
+            link=html.unescape(link),
+            abstract='',
+            journal=html.unescape(journal).strip(),
+            published_date=published,
+            summary=html.unescape(summary).strip() or None,
+            also_in=[name.strip() for name in html.unescape(also_in).split(',')] if also_in else []
+        )
+        for link, title, journal, also_in, doi, summary in _CARD.findall(page)
+    ]
+
+def load_digest_papers(date: str, digest_dir: str = 'digests') -> List[Paper]:
+    """Papers of a published digest, from the papers saved with it or else from its page."""
+    papers_path = os.path.join(digest_dir, f"{date}.json")
+    if os.path.exists(papers_path):
+        return load_papers(papers_path)
+    page_path = os.path.join(digest_dir, f"{date}.html")
+    if not os.path.exists(page_path):
+        return []
+    with open(page_path) as f:
+        return papers_from_html(date, f.read())
+
+class DigestManifest:
+    """
+    Summary of every published digest, kept as an append-only JSON Lines file
+    next to the digests so it is published with them. Adding a digest appends
+    one line; a later line for the same date replaces the earlier one.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.MANIFEST_FILE
+        self._entries: Optional[Dict[str, DigestEntry]] = None
+
+    def _load(self) -> Dict[str, DigestEntry]:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = DigestEntry(**json.loads(line))
+                            self._entries[entry.date] = entry
+        return self._entries
+
+    def add(self, entry: DigestEntry):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(asdict(entry), ensure_ascii=False) + '\n')
+        if self._entries is not None:
+            self._entries[entry.date] = entry
+
+    def get(self, date: str) -> Optional[DigestEntry]:
+        return self._load().get(date)
+
+    def entries(self) -> List[DigestEntry]:
+        """All digests, newest first."""
+        return sorted(self._load().values(), key=lambda entry: entry.date, reverse=True)
+
+    def months(self) -> List[str]:
+        """Months (YYYY-MM) with at least one digest, newest first."""
+        return sorted({entry.month for entry in self._load().values()}, reverse=True)
+
+    def month(self, month: str) -> List[DigestEntry]:
+        """Digests of one month, newest first."""
+        return [entry for entry in self.entries() if entry.month == month]
+
+    def count(self) -> int:
+        return len(self._load())
+
+    def compact(self):
+        """Rewrite the file with one line per digest, oldest first."""
+        entries = sorted(self._load().values(), key=lambda entry: entry.date)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(asdict(entry), ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+
+def digest_sources(digest_dir: str = 'digests') -> Dict[str, str]:
+    """Published digests on disk by date: the saved papers, or the page for digests saved without them."""
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(digest_dir, '[0-9]' * 4 + '-[0-9][0-9]-[0-9][0-9].*'))):
+        date, ext = os.path.splitext(os.path.basename(path))
+        if ext == '.json' or (ext == '.html' and date not in sources):
+            sources[date] = path
+    return sources
+
+def rebuild(manifest: DigestManifest, digest_dir: str = 'digests') -> int:
+    """Recreate the manifest from the digests on disk. Returns the number of digests."""
+    manifest._entries = {date: digest_entry(date, load_digest_papers(date, digest_dir))
+                         for date in digest_sources(digest_dir)}
+    manifest.compact()
+    return manifest.count()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the digest manifest.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="List digests in the manifest")
+    subparsers.add_parser('rebuild', help="Recreate the manifest from the digests on disk")
+    args = parser.parse_args()
+
+    manifest = DigestManifest()
+    if args.command == 'rebuild':
+        print(f"Rebuilt {manifest.path} with {rebuild(manifest)} digests")
+    else:
+        for entry in manifest.entries():
+            print(f"{entry.date}  {entry.papers:4d} papers  {', '.join(entry.journals[:3])}")
+
+if __name__ == "__main__":
+    main()
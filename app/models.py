@@ -1,6 +1,15 @@
-from dataclasses import dataclass
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+PLACEHOLDER_DOI_PREFIX = "10.placeholder-"
+_DOI_URL_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+_DOI_TRAILING = re.compile(r'[.,;:)\]/]+$')
+# Publisher URL path segments that extract_doi can pick up after the DOI itself
+_DOI_URL_SUFFIX = re.compile(r'(?:/(?:abstract|full|fulltext|pdf|epdf|summary|figures?(?:/\d+)?|suppl\w*))+$', re.IGNORECASE)
 
 @dataclass
 class Paper:
@@ -11,8 +20,50 @@ class Paper:
     journal: str
     published_date: datetime
     summary: Optional[str] = None
+    summary_status: Optional[str] = None  # "ok", or why the summary could not be generated
+    also_in: List[str] = field(default_factory=list)  # Other journals carrying the same paper
+    abstract_tokens_raw: Optional[int] = None  # Token count of the abstract as fetched
+    abstract_tokens: Optional[int] = None  # Token count after cleaning and trimming
+    relevance: Optional[float] = None  # LLM relevance score (0-100) from the last ranking
     
     def __post_init__(self):
         # Ensure DOI is in the correct format
         if not self.doi.startswith('10.'):
-            self.doi = f"10.{self.doi}" 
\ No newline at end of file
+            self.doi = f"10.{self.doi}"
+
+def normalize_doi(doi: str) -> str:
+    """Normalize a DOI for comparison: strip URL/prefix, trailing path segments, punctuation and case."""
+    doi = _DOI_URL_PREFIX.sub('', doi.strip())
+    doi = _DOI_TRAILING.sub('', doi)
+    doi = _DOI_URL_SUFFIX.sub('', doi)
+    return _DOI_TRAILING.sub('', doi).lower()
+
+def paper_key(paper: Paper) -> str:
+    """
+    Stable identity key for a paper.
+    Uses the normalized DOI, or a hash of title and link for placeholder DOIs.
+    """
+    doi = normalize_doi(paper.doi)
+    if doi and not doi.startswith(PLACEHOLDER_DOI_PREFIX):
+        return f"doi:{doi}"
+    basis = f"{' '.join(paper.title.lower().split())}|{paper.link.strip()}"
+    return f"title:{hashlib.sha1(basis.encode('utf-8')).hexdigest()}"
+
+def paper_to_dict(paper: Paper) -> Dict[str, Any]:
+    data = asdict(paper)
+    data['published_date'] = paper.published_date.isoformat()
+    return data
+
+def paper_from_dict(data: Dict[str, Any]) -> Paper:
+    data = dict(data)
+    data['published_date'] = datetime.fromisoformat(data['published_date'])
+    return Paper(**data)
+
+def save_papers(path: str, papers: List[Paper]):
+    """Write papers as JSON, in order, e.g. alongside the digest they were rendered into."""
+    with open(path, 'w') as f:
+        json.dump([paper_to_dict(paper) for paper in papers], f, ensure_ascii=False)
+
+def load_papers(path: str) -> List[Paper]:
+    with open(path) as f:
+        return [paper_from_dict(data) for data in json.load(f)]
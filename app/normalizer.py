@@ -0,0 +1,132 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/[-\w.]+[-\w.:/]+[-\w.]+', re.IGNORECASE)
+DOI_TRAILING_PUNCTUATION = re.compile(r'[.,;)]+$')
+
+# Probe order mirrors app.fetcher.parse_date and app.fetcher.extract_doi
+PARSED_DATE_FIELDS = ('published_parsed', 'updated_parsed', 'created_parsed')
+STRING_DATE_FIELDS = ('published', 'updated', 'created')
+STRING_DATE_FORMATS = ('%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%d')
+DOI_FIELDS = ('id', 'link', 'guid', 'summary')
+
+@dataclass
+class FeedProfile:
+    """Where a feed keeps its entry dates and DOIs."""
+    date_field: Optional[str] = None
+    date_format: Optional[str] = None  # Only for string date fields
+    doi_field: Optional[str] = None
+    streamable: bool = True  # Cleared when the feed is not well-formed XML
+    hits: int = 0
+    misses: int = 0
+
+_profiles: Dict[str, FeedProfile] = {}
+_profiles_lock = threading.Lock()
+
+def get_profile(feed_url: str, journal: str = None) -> FeedProfile:
+    """
+    Return the cached profile for a feed.
+    Profiles declared in Config.FEED_PROFILES (by journal name) seed the cache;
+    otherwise the profile is learned from the first entries parsed.
+    """
+    with _profiles_lock:
+        profile = _profiles.get(feed_url)
+        if profile is None:
+            declared = Config.FEED_PROFILES.get(journal, {}) if journal else {}
+            profile = _profiles[feed_url] = FeedProfile(**declared)
+        return profile
+
+def clear_profiles():
+    """Forget all learned profiles."""
+    with _profiles_lock:
+        _profiles.clear()
+
+def _field(entry, name: str):
+    if isinstance(entry, dict):
+        return entry.get(name)
+    return getattr(entry, name, None)
+
+def _date_from_field(value, date_format: Optional[str]) -> datetime:
+    if date_format:
+        return datetime.strptime(value, date_format)
+    return datetime(*value[:6])
+
+def learn_date_field(entry) -> Tuple[Optional[str], Optional[str]]:
+    """Find the first field (and string format) that yields a date for this entry."""
+    for field in PARSED_DATE_FIELDS:
+        value = _field(entry, field)
+        if value is not None:
+            try:
+                _date_from_field(value, None)
+                return field, None
+            except (TypeError, ValueError):
+                continue
+    for field in STRING_DATE_FIELDS:
+        value = _field(entry, field)
+        if value is not None:
+            for date_format in STRING_DATE_FORMATS:
+                try:
+                    _date_from_field(value, date_format)
+                    return field, date_format
+                except (TypeError, ValueError):
+                    continue
+    return None, None
+
+def learn_doi_field(entry) -> Optional[str]:
+    """Find the first field that contains a DOI for this entry."""
+    for field in DOI_FIELDS:
+        value = _field(entry, field)
+        if isinstance(value, str) and '10.' in value and DOI_PATTERN.search(value):
+            return field
+    return None
+
+class EntryNormalizer:
+    """
+    Extracts dates and DOIs from the entries of a single feed.
+    Uses the feed profile for a single lookup per entry and falls back to the
+    probing functions only when the profile misses, re-learning it from that entry.
+    """
+
+    def __init__(self, profile: FeedProfile, parse_date: Callable, extract_doi: Callable):
+        self.profile = profile
+        self._parse_date = parse_date
+        self._extract_doi = extract_doi
+
+    def parse_date(self, entry) -> datetime:
+        profile = self.profile
+        if profile.date_field:
+            value = _field(entry, profile.date_field)
+            if value is not None:
+                try:
+                    result = _date_from_field(value, profile.date_format)
+                    profile.hits += 1
+                    return result
+                except (TypeError, ValueError):
+                    pass
+        profile.misses += 1
+        field, date_format = learn_date_field(entry)
+        if field:
+            profile.date_field, profile.date_format = field, date_format
+        return self._parse_date(entry)
+
+    def extract_doi(self, entry) -> str:
+        profile = self.profile
+        if profile.doi_field:
+            value = _field(entry, profile.doi_field)
+            if isinstance(value, str) and '10.' in value:
+                match = DOI_PATTERN.search(value)
+                if match:
+                    profile.hits += 1
+                    return DOI_TRAILING_PUNCTUATION.sub('', match.group(0))
+        profile.misses += 1
+        field = learn_doi_field(entry)
+        if field:
+            profile.doi_field = field
+        return self._extract_doi(entry)
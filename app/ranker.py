@@ -1,8 +1,16 @@
+import json
 import logging
-from typing import List, Dict, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 from openai import OpenAI
-from app.models import Paper
+from app.models import Paper, paper_key
 from app.config import Config
+from app.embeddings import embedding_rank
+from app.lexical import lexical_rank
+from app.llm import RateLimiter, create_completion, get_limiter
+from app.score_store import ScoreStore
 import os
 
 logger = logging.getLogger(__name__)
@@ -29,7 +37,13 @@ def load_preferences() -> Dict[str, int]:
 
 def rank_papers(papers: List[Paper]) -> List[Paper]:
     """
-    Rank papers based on user preferences using OpenAI.
+    Rank papers based on user preferences.
+    Papers are first scored locally with BM25 over the weighted topics.
+    Config.RANKER = "embedding" orders them by embedding similarity to the
+    topics instead. With "llm", OpenAI then scores the papers (or only the top
+    RANK_PREFILTER_TOP_N lexical candidates, the rest following in lexical
+    order) per topic, reusing cached scores; if that fails, the lexical order
+    is used.
     Returns the papers in ranked order.
     """
     if not papers:
@@ -41,62 +55,230 @@ def rank_papers(papers: List[Paper]) -> List[Paper]:
         logger.warning("No preferences loaded, returning papers in original order")
         return papers
 
+    lexical = lexical_rank(papers, preferences)
+    if Config.RANKER == "lexical":
+        logger.info("Ranked papers locally")
+        return lexical
+    if Config.RANKER == "embedding":
+        try:
+            ranked = embedding_rank(papers, preferences)
+            logger.info("Ranked papers by embedding similarity")
+            return ranked
+        except Exception as e:
+            logger.error(f"Error ranking by embeddings, using lexical order: {str(e)}")
+            return lexical
+
+    candidates, rest = lexical, []
+    if Config.RANK_PREFILTER_TOP_N and len(papers) > Config.RANK_PREFILTER_TOP_N:
+        candidates, rest = lexical[:Config.RANK_PREFILTER_TOP_N], lexical[Config.RANK_PREFILTER_TOP_N:]
+        logger.info(f"Sending the top {len(candidates)} of {len(papers)} papers to the LLM ranker")
+
+    ranked = llm_rank(candidates, preferences)
+    if ranked is None:
+        logger.warning("LLM ranking failed, using lexical order")
+        return lexical
+    return ranked + rest
+
+RANK_SYSTEM_PROMPT = "You are a scientific paper ranker. Score every paper and reply with JSON only."
+# Part of the score cache namespace; bump when the prompt changes how scores are assigned
+RANK_PROMPT_VERSION = "topics-1"
+# Scored like a research interest and weighted by Config.RANK_IMPACT_WEIGHT
+IMPACT_TOPIC = "impact on the field"
+
+def rank_scorer() -> str:
+    return f"{Config.OPENAI_MODEL}/{RANK_PROMPT_VERSION}"
+
+def rank_topics(preferences: Dict[str, int]) -> Dict[str, int]:
+    """Criteria the LLM scores papers on, with their weights: the preference topics plus impact."""
+    topics = dict(preferences)
+    if Config.RANK_IMPACT_WEIGHT > 0:
+        topics.setdefault(IMPACT_TOPIC, Config.RANK_IMPACT_WEIGHT)
+    return topics
+
+def paper_entry(paper: Paper) -> str:
+    """Prompt text for one paper, without its number."""
+    entry = (
+        f"Title: {paper.title}\n"
+        f"   DOI: {paper.doi}\n"
+        f"   Abstract: {paper.abstract}\n"
+    )
+    if paper.summary:
+        entry += f"   Summary: {paper.summary}\n"
+    return entry
+
+def build_rank_messages(topics: List[str], entries: List[str]) -> List[Dict[str, str]]:
+    criteria = ''.join(f"{j}. {topic}\n" for j, topic in enumerate(topics, 1))
+    numbered = ''.join(f"{i}. {entry}" for i, entry in enumerate(entries, 1))
+    prompt = (
+        "Here are the criteria to score papers on, mostly the user's research interests:\n"
+        f"{criteria}\n"
+        "Please score each of the following papers from 0 to 100 on every criterion separately, "
+        "by how well the paper matches that interest (or, for impact, by its impact on the field). "
+        "The user is a scientist in the field of biotechnology. "
+        'Reply with a JSON object of the form {"scores": {"<paper number>": {"<criterion number>": <score>, ...}, ...}} '
+        "covering every paper and criterion:\n\n"
+        f"{numbered}"
+    )
+    return [
+        {"role": "system", "content": RANK_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_scores(content: str, n: int, m: int) -> Dict[Tuple[int, int], float]:
+    """
+    Scores by 0-based (paper, criterion) position from a ranking response for n
+    papers and m criteria. Out-of-range or malformed entries are dropped,
+    duplicates averaged and scores clamped to 0-100.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    raw = data.get("scores", data) if isinstance(data, dict) else data
+    if isinstance(raw, dict):
+        items = raw.items()
+    elif isinstance(raw, list):
+        items = [(item.get("id", item.get("paper")), item.get("scores")) for item in raw if isinstance(item, dict)]
+    else:
+        return {}
+    collected = defaultdict(list)
+    for key, topic_scores in items:
+        if not isinstance(topic_scores, dict):
+            continue
+        for topic, value in topic_scores.items():
+            try:
+                index, column, score = int(key), int(topic), float(value)
+            except (TypeError, ValueError):
+                continue
+            if 1 <= index <= n and 1 <= column <= m:
+                collected[index - 1, column - 1].append(min(max(score, 0.0), 100.0))
+    return {cell: sum(values) / len(values) for cell, values in collected.items()}
+
+def score_chunk(client, topics: List[str], entries: List[str],
+                limiter: RateLimiter = None) -> Optional[Dict[Tuple[int, int], float]]:
+    """Score one chunk of papers on the given criteria in a single request. Returns None if the request failed."""
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=Config.OPENAI_API_KEY)
-
-        # Prepare paper information for ranking
-        paper_info = []
-        for i, paper in enumerate(papers, 1):
-            info = (
-                f"{i}. Title: {paper.title}\n"
-                f"   DOI: {paper.doi}\n"
-                f"   Abstract: {paper.abstract}\n"
-                f"   Summary: {paper.summary}\n"
-            )
-            paper_info.append(info)
-
-            # Create ranking prompt
-            prompt = (
-                "Here are the user's research interests and their weights (1-10, higher is more important):\n"
-                f"{preferences}\n\n"
-                "Please rank the following papers by how well they match these interests, "
-                "considering both the weights and the content. A paper should also be evaluated on its impact on the field. The user is a scientist in the field of biotechnology. Return only the numbers in order of relevance:\n\n"
-                f"{''.join(paper_info)}"
-            )
-
-        # Call OpenAI API
-        logger.info("Generating paper rankings")
-        response = client.chat.completions.create(
-            model=Config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a scientific paper ranker. Return only the numbers in order of relevance."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5
+        response = create_completion(
+            client, build_rank_messages(topics, entries), limiter,
+            completion_tokens=8 * len(entries) * len(topics),
+            temperature=0.5,
+            response_format={"type": "json_object"}
         )
+        return parse_scores(response.choices[0].message.content, len(entries), len(topics))
+    except Exception as e:
+        logger.error(f"Error scoring {len(entries)} papers: {str(e)}")
+        return None
 
-        # Parse rankings from response
-        ranked_indices = []
-        try:
-            # Extract numbers from response
-            response_text = response.choices[0].message.content
-            ranked_indices = [int(num) for num in response_text.split() if num.isdigit()]
-            
-            # Validate rankings
-            if len(ranked_indices) != len(papers):
-                logger.warning("Incomplete rankings received, using original order")
-                return papers
-                
-            # Reorder papers based on rankings
-            ranked_papers = [papers[i-1] for i in ranked_indices]
-            logger.info("Successfully ranked papers")
-            return ranked_papers
+def score_missing(client, papers: List[Paper], topics: List[str], missing: np.ndarray) -> Dict[Tuple[int, int], float]:
+    """
+    Score the (paper, topic) cells marked in missing. Papers needing the same
+    topics are scored together in chunks of RANK_CHUNK_SIZE, in parallel, so
+    adding a topic only asks about that topic. Cells left unscored are
+    re-submitted up to RANK_REPAIR_RETRIES times.
+    """
+    limiter = get_limiter()
+    entries = [paper_entry(paper) for paper in papers]
+    size = max(1, Config.RANK_CHUNK_SIZE)
+    scores: Dict[Tuple[int, int], float] = {}
+    pending = missing.copy()
+    for attempt in range(1 + Config.RANK_REPAIR_RETRIES):
+        groups = defaultdict(list)
+        for i in np.flatnonzero(pending.any(axis=1)):
+            groups[tuple(np.flatnonzero(pending[i]))].append(i)
+        jobs = [(columns, rows[k:k + size]) for columns, rows in groups.items() for k in range(0, len(rows), size)]
+        if not jobs:
+            break
+        if attempt:
+            logger.warning(f"{len(groups)} groups of papers were not fully scored, re-submitting them")
+        workers = max(1, min(Config.RANK_MAX_WORKERS, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda job: score_chunk(client, [topics[j] for j in job[0]], [entries[i] for i in job[1]], limiter),
+                jobs
+            ))
+        for (columns, rows), result in zip(jobs, results):
+            for (position, column), score in (result or {}).items():
+                scores[rows[position], columns[column]] = score
+                pending[rows[position], columns[column]] = False
+    return scores
 
-        except Exception as e:
-            logger.error(f"Error parsing rankings: {str(e)}")
-            return papers
+def weighted_relevance(scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted mean of per-topic scores (0-100), shape (papers,). Unscored topics
+    count as 0; papers with no scores at all are NaN.
+    """
+    total = weights.sum()
+    relevance = np.nan_to_num(scores) @ weights / (total if total else 1)
+    relevance[np.isnan(scores).all(axis=1)] = np.nan
+    return relevance
 
-    except Exception as e:
-        logger.error(f"Error generating rankings: {str(e)}")
-        return papers 
\ No newline at end of file
+def order_by_scores(papers: List[Paper], scores: np.ndarray, weights: np.ndarray) -> List[Paper]:
+    """Set each paper's relevance and order by it; unscored papers follow in input order."""
+    relevance = weighted_relevance(scores, weights)
+    unscored = np.isnan(relevance)
+    for paper, value, skip in zip(papers, relevance, unscored):
+        paper.relevance = None if skip else float(value)
+    order = np.lexsort((np.arange(len(papers)), -np.nan_to_num(relevance), unscored))
+    return [papers[i] for i in order]
+
+def cached_rank(papers: List[Paper], preferences: Dict[str, int], store: ScoreStore = None) -> List[Paper]:
+    """
+    Order papers by stored topic scores under the given weights, without API
+    calls. Topics a paper was never scored on count as 0.
+    """
+    topics = rank_topics(preferences)
+    own_store = store is None
+    store = store or ScoreStore(scorer=rank_scorer())
+    try:
+        scores = store.get([paper_key(paper) for paper in papers], list(topics))
+    finally:
+        if own_store:
+            store.close()
+    missing = int(np.isnan(scores).sum())
+    if missing:
+        logger.warning(f"{missing} paper/topic scores are not cached and count as 0")
+    return order_by_scores(papers, scores, np.array(list(topics.values()), dtype=float))
+
+def llm_rank(papers: List[Paper], preferences: Dict[str, int], store: ScoreStore = None) -> Optional[List[Paper]]:
+    """
+    Order papers by LLM relevance scores.
+    Each paper is scored per topic, and scores are kept in the ScoreStore, so
+    only new papers and new topics are sent to the API; changing a weight
+    costs nothing. Relevance is the weighted mean of the topic scores. Papers
+    that could not be scored follow the scored ones in their input order.
+    Returns None if no paper could be scored.
+    """
+    if not papers:
+        return papers
+    topics = rank_topics(preferences)
+    names = list(topics)
+    keys = [paper_key(paper) for paper in papers]
+    own_store = store is None
+    store = store or ScoreStore(scorer=rank_scorer())
+    try:
+        scores = store.get(keys, names)
+        missing = np.isnan(scores)
+        logger.info(f"Reusing {scores.size - missing.sum()} cached topic scores, requesting {missing.sum()}")
+        if missing.any():
+            try:
+                client = OpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0, timeout=Config.SUMMARY_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error generating rankings: {str(e)}")
+            else:
+                logger.info(f"Generating paper rankings in chunks of {max(1, Config.RANK_CHUNK_SIZE)}")
+                new = score_missing(client, papers, names, missing)
+                store.put((keys[i], names[j], score) for (i, j), score in new.items())
+                for (i, j), score in new.items():
+                    scores[i, j] = score
+                unscored = int(missing.sum()) - len(new)
+                if unscored:
+                    logger.warning(f"{unscored} paper/topic scores could not be generated and count as 0")
+    finally:
+        if own_store:
+            store.close()
+
+    if np.isnan(scores).all():
+        return None
+    ranked = order_by_scores(papers, scores, np.array(list(topics.values()), dtype=float))
+    logger.info("Successfully ranked papers")
+    return ranked
@@ -1,102 +1,124 @@
+import argparse
 import logging
+import os
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 import jinja2
-import os
 from app.models import Paper
 from app.config import Config
 
 logger = logging.getLogger(__name__)
 
-def render_digest(date: str, papers: List[Paper]) -> str:
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+
+def _label(value: str, parse: str, display: str) -> str:
+    try:
+        return datetime.strptime(value, parse).strftime(display)
+    except ValueError:
+        return value
+
+@jinja2.pass_context
+def _digest_href(context, date: str) -> str:
+    return context.get('root', '') + Config.DIGEST_PATH_FMT.format(date=date)
+
+@jinja2.pass_context
+def _archive_href(context, month: str) -> str:
+    return context.get('root', '') + Config.ARCHIVE_PATH_FMT.format(month=month)
+
+FILTERS = {
+    'date_label': lambda date: _label(date, '%Y-%m-%d', '%B %d, %Y'),
+    'month_label': lambda month: _label(month, '%Y-%m', '%B %Y'),
+    'digest_href': _digest_href,
+    'archive_href': _archive_href,
+}
+
+@lru_cache(maxsize=None)
+def get_environment(cache_dir: str) -> jinja2.Environment:
+    """
+    Shared template environment. Compiled templates are kept in memory for the
+    life of the process and their bytecode under cache_dir, so later processes
+    skip compiling them too.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(cache_dir),
+        auto_reload=False
+    )
+    env.filters.update(FILTERS)
+    return env
+
+def get_template(name: str) -> jinja2.Template:
+    return get_environment(os.path.join(Config.CACHE_DIR, 'templates')).get_template(name)
+
+def precompile() -> List[str]:
+    """Compile every template into the bytecode cache. Returns the template names."""
+    names = get_environment(os.path.join(Config.CACHE_DIR, 'templates')).list_templates()
+    for name in names:
+        get_template(name)
+    return names
+
+def render_digest(date: str, papers: List[Paper], collapse_after: Optional[int] = None) -> str:
     """
     Generate HTML for the digest.
+    With collapse_after, only that many papers are shown in full and the rest
+    are listed by title in a collapsed section.
     Returns the HTML content as a string.
     """
     if not papers:
         logger.warning("No papers to render")
         return ""
 
-    # Create template directory if it doesn't exist
-    template_dir = os.path.join(os.path.dirname(__file__), 'templates')
-    os.makedirs(template_dir, exist_ok=True)
-
-    # Create template file
-    template_path = os.path.join(template_dir, 'digest.html')
-    if not os.path.exists(template_path):
-        with open(template_path, 'w') as f:
-            f.write("""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ date }} Nature Digest</title>
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            color: #333;
-        }
-        h1 {
-            color: #2c3e50;
-            border-bottom: 2px solid #eee;
-            padding-bottom: 10px;
-        }
-        .paper {
-            margin-bottom: 30px;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 5px;
-        }
-        .paper h2 {
-            margin-top: 0;
-            color: #2c3e50;
-        }
-        .paper a {
-            color: #3498db;
-            text-decoration: none;
-        }
-        .paper a:hover {
-            text-decoration: underline;
-        }
-        .doi {
-            color: #666;
-            font-size: 0.9em;
-        }
-        .summary {
-            margin-top: 10px;
-            color: #444;
-        }
-        .journal {
-            color: #666;
-            font-style: italic;
-            margin-bottom: 10px;
-        }
-    </style>
-</head>
-<body>
-    <h1>{{ date }} Nature Digest</h1>
-    {% for paper in papers %}
-    <div class="paper">
-        <h2><a href="{{ paper.link }}">{{ paper.title }}</a></h2>
-        <div class="journal">{{ paper.journal }}</div>
-        <div class="doi">DOI: {{ paper.doi }}</div>
-        <div class="summary">{{ paper.summary }}</div>
-    </div>
-    {% endfor %}
-</body>
-</html>""")
-
-    # Load and render template
     try:
-        env = jinja2.Environment(loader=jinja2.FileSystemLoader(template_dir))
-        template = env.get_template('digest.html')
-        html = template.render(date=date, papers=papers)
+        html = get_template('digest.html').render(date=date, papers=papers, collapse_after=collapse_after)
         logger.info(f"Generated HTML digest for {date}")
         return html
     except Exception as e:
         logger.error(f"Error rendering digest: {str(e)}")
-        return "" 
\ No newline at end of file
+        return ""
+
+def write_page(path: str, template: str, **context) -> bool:
+    """
+    Render a template straight to path, streaming its output so the page is
+    never held in memory as a whole. The file is replaced only once rendering
+    has finished. Links in the page are made relative to its directory.
+    Returns True on success.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        root = os.path.relpath('.', os.path.dirname(path) or '.')
+        context.setdefault('root', '' if root == '.' else root + '/')
+        with open(tmp_path, 'w') as f:
+            f.writelines(get_template(template).generate(**context))
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.error(f"Error rendering {template} to {path}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def write_digest(path: str, date: str, papers: List[Paper], collapse_after: Optional[int] = None) -> bool:
+    """Render the digest straight to path. Returns True on success."""
+    if not papers:
+        logger.warning("No papers to render")
+        return False
+    if not write_page(path, 'digest.html', date=date, papers=papers, collapse_after=collapse_after):
+        return False
+    logger.info(f"Wrote HTML digest for {date} to {path}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage compiled templates.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('precompile', help="Compile all templates into the bytecode cache")
+    args = parser.parse_args()
+
+    if args.command == 'precompile':
+        for name in precompile():
+            print(f"Compiled {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import logging
+import os
+import time
+from typing import Optional
+from app.config import Config
+from app.models import load_papers
+from app.ranker import cached_rank, llm_rank, load_preferences
+from app.renderer import write_digest
+
+logger = logging.getLogger(__name__)
+
+def rerank_digest(date: str, digest_dir: str = 'digests', score: bool = False) -> Optional[str]:
+    """
+    Re-rank an archived digest against the current preferences.
+    Papers are read from the JSON saved next to the digest and ordered from
+    cached topic scores, without API calls; with score=True, topics not yet
+    scored are requested first. Writes digest_dir/rerank/DATE.html and returns
+    its path, or None if the digest has no saved papers.
+    """
+    source = os.path.join(digest_dir, f"{date}.json")
+    if not os.path.exists(source):
+        logger.error(f"No saved papers for {date} at {source}")
+        return None
+    started = time.perf_counter()
+    papers = load_papers(source)
+    preferences = load_preferences()
+    ranked = (llm_rank(papers, preferences) if score else None) or cached_rank(papers, preferences)
+    path = os.path.join(digest_dir, 'rerank', f"{date}.html")
+    if not write_digest(path, date, ranked):
+        return None
+    logger.info(f"Re-ranked {len(ranked)} papers in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-rank an archived digest against the current preferences.")
+    parser.add_argument('date', help="Digest date (YYYY-MM-DD)")
+    parser.add_argument('--dir', default='digests', help="Directory holding the digest (default: digests)")
+    parser.add_argument('--score', action='store_true', help="Score topics not yet cached with the LLM first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+    path = rerank_digest(args.date, args.dir, args.score)
+    if path:
+        print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    main()
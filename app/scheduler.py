@@ -0,0 +1,163 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, TypeVar
+import requests
+from app.config import Config
+from app.feed_registry import Feed
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Thread-safe token bucket; a rate of 0 disables limiting."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Block until the given number of tokens (capped at capacity) is available."""
+        if self.rate <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+@dataclass
+class FeedStats:
+    journal: str
+    url: str
+    host: str
+    latency: float = 0.0
+    attempts: int = 0
+    papers: int = 0
+    error: Optional[str] = None
+
+def is_retryable(error: Exception) -> bool:
+    """Connection problems, timeouts, rate limiting and server errors are retried."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait as requested by the server, given either as seconds or as an HTTP date."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class HostScheduler:
+    """
+    Politeness scheduler for feed fetching.
+    Limits concurrent requests and request rate per host, retries transient
+    failures with jittered exponential backoff, and records per-feed stats.
+    """
+
+    def __init__(self, max_per_host: int = None, rate: float = None, burst: float = None,
+                 retries: int = None, backoff: float = None):
+        self.max_per_host = max_per_host or Config.HOST_MAX_CONCURRENCY
+        self.rate = Config.HOST_RATE_LIMIT if rate is None else rate
+        self.burst = burst or Config.HOST_BURST
+        self.retries = Config.FETCH_RETRIES if retries is None else retries
+        self.backoff = Config.FETCH_BACKOFF if backoff is None else backoff
+        self.stats: List[FeedStats] = []
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _host_limits(self, host: str):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.max_per_host)
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._semaphores[host], self._buckets[host]
+
+    @staticmethod
+    def order(feeds: List[Feed]) -> List[Feed]:
+        """Interleave feeds round-robin by host so workers spread across hosts."""
+        by_host = defaultdict(list)
+        for feed in feeds:
+            by_host[feed.host].append(feed)
+        queues = sorted(by_host.values(), key=len, reverse=True)
+        ordered = []
+        for i in range(len(queues[0]) if queues else 0):
+            ordered.extend(queue[i] for queue in queues if i < len(queue))
+        return ordered
+
+    def run(self, feed: Feed, fetch: Callable[[], T]) -> T:
+        """Call fetch for a feed within its host's limits, retrying transient errors."""
+        semaphore, bucket = self._host_limits(feed.host)
+        stats = FeedStats(journal=feed.journal, url=feed.url, host=feed.host)
+        start = time.monotonic()
+        try:
+            while True:
+                stats.attempts += 1
+                try:
+                    bucket.acquire()
+                    with semaphore:
+                        result = fetch()
+                    if isinstance(result, list):
+                        stats.papers = len(result)
+                    return result
+                except Exception as e:
+                    if stats.attempts > self.retries or not is_retryable(e):
+                        stats.error = str(e) or type(e).__name__
+                        raise
+                    # Only our own backoff is jittered; the server's Retry-After is a lower bound
+                    backoff = self.backoff * 2 ** (stats.attempts - 1) * random.uniform(0.5, 1.5)
+                    delay = max(_retry_after(e) or 0.0, backoff)
+                    logger.warning(f"Retrying {feed.journal} in {delay:.1f}s after: {str(e)}")
+                    time.sleep(delay)
+        finally:
+            stats.latency = time.monotonic() - start
+            with self._lock:
+                self.stats.append(stats)
+
+    def report(self) -> str:
+        """Summarize per-feed latency and failures."""
+        if not self.stats:
+            return "No feeds fetched"
+        latencies = sorted(s.latency for s in self.stats)
+        failures = [s for s in self.stats if s.error]
+        hosts = len({s.host for s in self.stats})
+        lines = [
+            f"Fetched {len(self.stats)} feeds from {hosts} hosts: "
+            f"median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s, "
+            f"{sum(s.attempts - 1 for s in self.stats)} retries, {len(failures)} failures"
+        ]
+        for s in sorted(self.stats, key=lambda s: s.latency, reverse=True)[:5]:
+            lines.append(f"  {s.journal}: {s.latency:.2f}s, {s.attempts} attempt(s), {s.papers} papers")
+        for s in failures:
+            lines.append(f"  FAILED {s.journal}: {s.error}")
+        return '\n'.join(lines)
@@ -0,0 +1,120 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+def topic_key(topic: str) -> str:
+    return ' '.join(topic.lower().split())
+
+class ScoreStore:
+    """
+    Persistent per-paper, per-topic relevance scores from the LLM ranker.
+    Scores are independent of topic weights, so re-weighting preferences needs
+    no API calls; only new papers and new topics have to be scored. Entries are
+    namespaced by scorer (model and prompt version).
+    """
+
+    def __init__(self, path: str = None, scorer: str = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'topic_scores.sqlite3')
+        self.scorer = scorer or Config.OPENAI_MODEL
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS topic_scores ("
+            " scorer TEXT NOT NULL,"
+            " paper TEXT NOT NULL,"
+            " topic TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " scored_at REAL NOT NULL,"
+            " PRIMARY KEY (scorer, paper, topic))"
+        )
+        self._conn.commit()
+
+    def get(self, papers: Sequence[str], topics: Sequence[str]) -> np.ndarray:
+        """Scores of shape (papers, topics), NaN where a paper has not been scored for a topic."""
+        scores = np.full((len(papers), len(topics)), np.nan)
+        rows_of = defaultdict(list)
+        for i, paper in enumerate(papers):
+            rows_of[paper].append(i)
+        col_of = {topic_key(topic): j for j, topic in enumerate(topics)}
+        unique = list(rows_of)
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT paper, topic, score FROM topic_scores "
+                    f"WHERE scorer = ? AND paper IN ({','.join('?' * len(chunk))})",
+                    [self.scorer] + chunk
+                ).fetchall()
+                for paper, topic, score in rows:
+                    if topic in col_of:
+                        scores[rows_of[paper], col_of[topic]] = score
+        return scores
+
+    def put(self, scores: Iterable[Tuple[str, str, float]]):
+        """Store (paper, topic, score) triples."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO topic_scores (scorer, paper, topic, score, scored_at) VALUES (?, ?, ?, ?, ?)",
+                [(self.scorer, paper, topic_key(topic), score, now) for paper, topic, score in scores]
+            )
+            self._conn.commit()
+
+    def topics(self) -> List[Tuple[str, str, int]]:
+        """(scorer, topic, papers scored) for every scored topic."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT scorer, topic, COUNT(*) FROM topic_scores GROUP BY scorer, topic ORDER BY scorer, topic"
+            ).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM topic_scores").fetchone()[0]
+
+    def clear(self, topic: str = None) -> int:
+        """Forget scores for one topic, or all scores. Returns the number removed."""
+        with self._lock:
+            if topic:
+                cursor = self._conn.execute("DELETE FROM topic_scores WHERE topic = ?", (topic_key(topic),))
+            else:
+                cursor = self._conn.execute("DELETE FROM topic_scores")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage cached per-topic relevance scores.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show scored topics")
+    clear = subparsers.add_parser('clear', help="Forget cached scores")
+    clear.add_argument('--topic', help="Only forget scores for this topic")
+    args = parser.parse_args()
+
+    with ScoreStore() as store:
+        if args.command == 'clear':
+            print(f"Removed {store.clear(args.topic)} scores")
+        else:
+            for scorer, topic, papers in store.topics():
+                print(f"{scorer}  {topic}: {papers} papers")
+            print(f"{store.count()} scores in {store.path}")
+
+if __name__ == "__main__":
+    main()
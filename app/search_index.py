@@ -0,0 +1,337 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from app.config import Config
+from app.lexical import STOPWORDS, words
+from app.manifest import digest_sources, load_digest_papers
+from app.models import Paper
+from app.renderer import write_page
+from app.site_builder import file_hash
+
+logger = logging.getLogger(__name__)
+
+# Bump when the tokenizer or file layout changes; the index is then rebuilt from scratch
+INDEX_VERSION = 2
+
+def doc_terms(paper: Paper) -> Set[str]:
+    """Searchable terms of a paper: words of its title, journals, DOI and summary."""
+    return set(words(' '.join([paper.title or '', paper.journal or '', ' '.join(paper.also_in),
+                               paper.doi or '', paper.summary or ''])))
+
+def shard_name(term: str, names: Set[str]) -> str:
+    """
+    Shard holding a term's postings: the longest shard split off (see
+    SearchIndex.split) that the term starts with, or else its first
+    SEARCH_PREFIX_LEN characters.
+    """
+    for end in range(len(term), Config.SEARCH_PREFIX_LEN, -1):
+        if term[:end] in names:
+            return term[:end]
+    return term[:Config.SEARCH_PREFIX_LEN]
+
+def postings_count(shard: Dict[str, Set[int]]) -> int:
+    return sum(len(ids) for ids in shard.values())
+
+def encode_postings(ids: Set[int]) -> List[int]:
+    """Sorted document IDs as gaps from the previous ID, which keeps shards small."""
+    ordered = sorted(ids)
+    return [ordered[0]] + [b - a for a, b in zip(ordered, ordered[1:])] if ordered else []
+
+def decode_postings(gaps: List[int]) -> Set[int]:
+    ids, total = set(), 0
+    for gap in gaps:
+        total += gap
+        ids.add(total)
+    return ids
+
+def write_json(path: str, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+@dataclass
+class SearchReport:
+    digests_added: int = 0
+    digests_removed: int = 0
+    documents: int = 0
+    term_shards: int = 0  # term shards rewritten
+    doc_shards: int = 0  # document shards rewritten
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return (f"search index: {self.digests_added} digests indexed, {self.digests_removed} removed, "
+                f"{self.documents} documents, rewrote {self.term_shards} term and {self.doc_shards} "
+                f"document shards in {self.elapsed:.2f}s")
+
+class SearchIndex:
+    """
+    Prebuilt inverted index over every digest, for the static search page.
+    Document IDs are assigned in blocks of SEARCH_BLOCK_DOCS, and each block's
+    postings (term -> document IDs) are sharded by term prefix, so a query
+    loads one shard per term and block, and a new digest only rewrites shards
+    of the newest block. A shard that outgrows SEARCH_SHARD_MAX_POSTINGS is
+    split by the next letter of its terms, which keeps the shards a digest
+    touches small. Documents (title, journal, DOI, link, date) are stored in
+    chunks of SEARCH_DOC_CHUNK IDs. index.json records which IDs each digest
+    added and shards.json the shard names of each block; the digest file
+    stats and shards each digest was indexed in, which differ between
+    checkouts, are kept under CACHE_DIR.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.SEARCH_DIR
+        self.state_path = os.path.join(self.root, 'index.json')
+        self.names_path = os.path.join(self.root, 'shards.json')
+        self.local_path = os.path.join(Config.CACHE_DIR, 'search_index.json')
+        self.state = {'version': INDEX_VERSION, 'next_id': 0, 'digests': {}}
+        self.names: Dict[int, Set[str]] = defaultdict(set)
+        # An index written in another layout is rebuilt rather than updated
+        self.outdated = False
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get('version') == INDEX_VERSION:
+                self.state = state
+                with open(self.names_path) as f:
+                    self.names.update({int(block): set(names) for block, names in json.load(f).items()})
+            else:
+                self.outdated = True
+        # Per digest: stat signature, hash, first ID and the shards it was indexed in
+        self.local: Dict[str, dict] = {}
+        if os.path.exists(self.local_path):
+            with open(self.local_path) as f:
+                self.local = json.load(f)
+        self._shards: Dict[str, Dict[str, Set[int]]] = {}
+        self._docs: Dict[int, Dict[str, list]] = {}
+        self._dirty_shards: Set[str] = set()
+        self._dirty_docs: Set[int] = set()
+
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.root, 'terms', f"{key}.json")
+
+    def _docs_path(self, chunk: int) -> str:
+        return os.path.join(self.root, 'docs', f"{chunk}.json")
+
+    def shard(self, key: str) -> Dict[str, Set[int]]:
+        """Postings of a shard, keyed "<block>/<name>"."""
+        if key not in self._shards:
+            postings = {}
+            if os.path.exists(self._shard_path(key)):
+                with open(self._shard_path(key)) as f:
+                    postings = {term: decode_postings(gaps) for term, gaps in json.load(f).items()}
+            self._shards[key] = postings
+        return self._shards[key]
+
+    def docs(self, chunk: int) -> Dict[str, list]:
+        if chunk not in self._docs:
+            docs = {}
+            if os.path.exists(self._docs_path(chunk)):
+                with open(self._docs_path(chunk)) as f:
+                    docs = json.load(f)
+            self._docs[chunk] = docs
+        return self._docs[chunk]
+
+    def _known_shards(self, date: str, info: dict) -> Optional[List[str]]:
+        """Shards a digest was indexed in, if recorded locally for the indexed version of it."""
+        local = self.local.get(date)
+        if local and local['hash'] == info['hash'] and local['first'] == info['first']:
+            return local['shards']
+        return None
+
+    def remove_digest(self, date: str):
+        """
+        Drop a digest's documents and postings. Only the shards it was indexed
+        in (or split into since) are read, or every shard of its blocks if
+        that was not recorded in this checkout.
+        """
+        info = self.state['digests'].pop(date, None)
+        if not info:
+            return
+        ids = set(range(info['first'], info['last']))
+        blocks = {i // Config.SEARCH_BLOCK_DOCS for i in ids}
+        keys = [f"{block}/{name}" for block in blocks for name in self.names.get(block, ())]
+        known = self._known_shards(date, info)
+        if known is not None:
+            keys = [key for key in keys if key.startswith(tuple(known))]
+        for key in keys:
+            shard = self.shard(key)
+            for term in list(shard):
+                if not shard[term].isdisjoint(ids):
+                    shard[term] -= ids
+                    if not shard[term]:
+                        del shard[term]
+                    self._dirty_shards.add(key)
+        for chunk in {i // Config.SEARCH_DOC_CHUNK for i in ids}:
+            docs = self.docs(chunk)
+            for i in ids:
+                docs.pop(str(i), None)
+            self._dirty_docs.add(chunk)
+
+    def add_digest(self, date: str, papers: List[Paper], digest_hash: str) -> List[str]:
+        """Index a digest's papers under new document IDs. Returns the shards it was added to."""
+        first = self.state['next_id']
+        shards = set()
+        for i, paper in enumerate(papers, first):
+            chunk = i // Config.SEARCH_DOC_CHUNK
+            self.docs(chunk)[str(i)] = [paper.title, paper.journal, paper.doi, paper.link, date]
+            self._dirty_docs.add(chunk)
+            block = i // Config.SEARCH_BLOCK_DOCS
+            for term in doc_terms(paper):
+                name = shard_name(term, self.names[block])
+                self.names[block].add(name)
+                key = f"{block}/{name}"
+                self.shard(key).setdefault(term, set()).add(i)
+                shards.add(key)
+        self._dirty_shards |= shards
+        self.state['next_id'] = first + len(papers)
+        self.state['digests'][date] = {'hash': digest_hash, 'first': first, 'last': first + len(papers)}
+        return sorted(shards)
+
+    def split(self, key: str):
+        """Split a shard over SEARCH_SHARD_MAX_POSTINGS by the next letter of its terms, until each part fits."""
+        shard = self.shard(key)
+        if postings_count(shard) <= Config.SEARCH_SHARD_MAX_POSTINGS:
+            return
+        block, name = key.split('/', 1)
+        # Terms no longer than the name stay; a single oversized term cannot be split further
+        children = defaultdict(dict)
+        for term in [term for term in shard if len(term) > len(name)]:
+            children[term[:len(name) + 1]][term] = shard.pop(term)
+        for child, postings in children.items():
+            child_key = f"{block}/{child}"
+            self._shards[child_key] = postings
+            self.names[int(block)].add(child)
+            self._dirty_shards.add(child_key)
+            self.split(child_key)
+        self._dirty_shards.add(key)
+
+    def update(self, digest_dir: str = 'digests', full: bool = False) -> SearchReport:
+        """Index new and changed digests, drop removed ones, and write the touched shards."""
+        started = time.perf_counter()
+        report = SearchReport()
+        if full or self.outdated:
+            self.state = {'version': INDEX_VERSION, 'next_id': 0, 'digests': {}}
+            self.names, self._shards, self._docs = defaultdict(set), {}, {}
+            for sub in ('terms', 'docs'):
+                shutil.rmtree(os.path.join(self.root, sub), ignore_errors=True)
+            self.outdated = False
+        sources = digest_sources(digest_dir)
+        for date in sorted(set(self.state['digests']) - set(sources)):
+            self.remove_digest(date)
+            report.digests_removed += 1
+        local = {}
+        for date, path in sources.items():
+            stat = os.stat(path)
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            info = self.state['digests'].get(date)
+            known = self.local.get(date)
+            if info and known and known['signature'] == signature and self._known_shards(date, info) is not None:
+                local[date] = known
+                continue
+            digest_hash = file_hash(path)
+            if info and info['hash'] == digest_hash:
+                local[date] = {'signature': signature, 'hash': digest_hash, 'first': info['first'],
+                               'shards': self._known_shards(date, info)}
+                continue
+            self.remove_digest(date)
+            shards = self.add_digest(date, load_digest_papers(date, digest_dir), digest_hash)
+            local[date] = {'signature': signature, 'hash': digest_hash,
+                           'first': self.state['digests'][date]['first'], 'shards': shards}
+            report.digests_added += 1
+        for key in sorted(self._dirty_shards):
+            self.split(key)
+        report.term_shards, report.doc_shards = self.save()
+        self.local = local
+        os.makedirs(os.path.dirname(self.local_path) or '.', exist_ok=True)
+        write_json(self.local_path, local)
+        report.documents = sum(info['last'] - info['first'] for info in self.state['digests'].values())
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def save(self):
+        """Write the shards changed since loading. Returns (term shards, document shards) written."""
+        os.makedirs(os.path.join(self.root, 'docs'), exist_ok=True)
+        for key in self._dirty_shards:
+            shard = self._shards[key]
+            if shard:
+                os.makedirs(os.path.dirname(self._shard_path(key)), exist_ok=True)
+                write_json(self._shard_path(key), {term: encode_postings(ids) for term, ids in sorted(shard.items())})
+            else:
+                block, name = key.split('/', 1)
+                self.names[int(block)].discard(name)
+                if os.path.exists(self._shard_path(key)):
+                    os.remove(self._shard_path(key))
+        for chunk in self._dirty_docs:
+            docs = self._docs[chunk]
+            if docs:
+                write_json(self._docs_path(chunk), docs)
+            elif os.path.exists(self._docs_path(chunk)):
+                os.remove(self._docs_path(chunk))
+        written = len(self._dirty_shards), len(self._dirty_docs)
+        self._dirty_shards, self._dirty_docs = set(), set()
+        write_json(self.names_path, {str(block): sorted(names) for block, names in sorted(self.names.items()) if names})
+        write_json(self.state_path, self.state)
+        return written
+
+    def search(self, query: str, limit: int = 50) -> List[list]:
+        """Documents containing every query term, newest first, as the search page finds them."""
+        terms = words(query)
+        if not terms:
+            return []
+        matches: Optional[Set[int]] = None
+        for position, term in enumerate(terms):
+            # The last term may be incomplete while typing: match it as a prefix,
+            # in its own shard and in any shard split off below it
+            prefix = position == len(terms) - 1 and len(term) >= Config.SEARCH_PREFIX_LEN
+            ids = set()
+            for block, names in self.names.items():
+                wanted = {shard_name(term, names)}
+                if prefix:
+                    wanted |= {name for name in names if name.startswith(term)}
+                for name in wanted:
+                    for candidate, postings in self.shard(f"{block}/{name}").items():
+                        if candidate == term or (prefix and candidate.startswith(term)):
+                            ids |= postings
+            matches = ids if matches is None else matches & ids
+        return [self.docs(i // Config.SEARCH_DOC_CHUNK)[str(i)] for i in sorted(matches, reverse=True)[:limit]]
+
+def write_search_page(path: str = 'search.html') -> bool:
+    return write_page(
+        path, 'search.html',
+        search_dir=Config.SEARCH_DIR,
+        prefix_len=Config.SEARCH_PREFIX_LEN,
+        doc_chunk=Config.SEARCH_DOC_CHUNK,
+        digest_path=Config.DIGEST_PATH_FMT,
+        stopwords=sorted(STOPWORDS)
+    )
+
+def update_search(digest_dir: str = 'digests', full: bool = False) -> SearchReport:
+    """Bring the search index up to date with the digests and write the search page."""
+    report = SearchIndex().update(digest_dir, full=full)
+    write_search_page()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the client-side search index.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Index new and changed digests")
+    build.add_argument('--full', action='store_true', help="Rebuild the index from scratch")
+    query = subparsers.add_parser('query', help="Search the index as the search page does")
+    query.add_argument('terms', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(update_search(full=args.full))
+    else:
+        for title, journal, doi, link, date in SearchIndex().search(' '.join(args.terms)):
+            print(f"{date}  {journal}: {title}  {link}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+from app.config import Config
+from app.models import Paper, paper_key
+from app.summarizer import LOCAL_STATUSES, SUMMARY_FAILED, summarizer_version
+
+logger = logging.getLogger(__name__)
+
+class SeenStore:
+    """
+    Persistent index of papers already processed by earlier runs.
+    Papers are keyed by normalized DOI (see app.models.paper_key) and
+    forgotten once they have not been seen for the retention window.
+    Summaries are only reused when written with the current model and prompt
+    version (see app.summarizer.summarizer_version).
+    """
+
+    def __init__(self, path: str = None, retention_days: int = None, summarizer: str = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'seen_papers.sqlite3')
+        self.retention_days = Config.SEEN_RETENTION_DAYS if retention_days is None else retention_days
+        self.summarizer = summarizer or summarizer_version()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_papers ("
+            " key TEXT PRIMARY KEY,"
+            " doi TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " journal TEXT,"
+            " summary TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " summarizer TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(seen_papers)")}
+        if 'summarizer' not in columns:
+            # Summaries stored before the column existed are never reused
+            self._conn.execute("ALTER TABLE seen_papers ADD COLUMN summarizer TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_last_seen ON seen_papers (last_seen)")
+        self._conn.commit()
+        self.prune()
+
+    def prune(self) -> int:
+        """Forget papers not seen within the retention window. Returns the number removed."""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM seen_papers WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} papers older than {self.retention_days} days")
+        return cursor.rowcount
+
+    def get_summary(self, paper: Paper) -> Optional[str]:
+        """Return the stored summary for a paper, if it was summarized before with the current summarizer."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM seen_papers WHERE key = ? AND summarizer = ?", (paper_key(paper), self.summarizer)
+            ).fetchone()
+        return row[0] if row else None
+
+    def apply(self, papers: List[Paper]) -> List[Paper]:
+        """
+        Fill in summaries for papers seen in earlier runs and refresh their
+        last-seen time, so papers still in the feeds are not pruned.
+        Returns the papers that still need to be summarized.
+        """
+        pending, seen = [], []
+        for paper in papers:
+            summary = self.get_summary(paper)
+            if summary is None:
+                pending.append(paper)
+            else:
+                paper.summary = summary
+                paper.summary_status = "seen"
+                seen.append((time.time(), paper_key(paper)))
+        with self._lock:
+            self._conn.executemany("UPDATE seen_papers SET last_seen = ? WHERE key = ?", seen)
+            self._conn.commit()
+        logger.info(f"Reused {len(seen)} previously processed papers")
+        return pending
+
+    def record(self, papers: List[Paper]):
+        """Store successfully summarized papers and refresh their last-seen time."""
+        now = time.time()
+        rows = [
+            (paper_key(paper), paper.doi, paper.title, paper.journal, paper.summary, now, now, self.summarizer)
+            for paper in papers
+            if paper.summary and paper.summary != SUMMARY_FAILED and paper.summary_status not in LOCAL_STATUSES
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO seen_papers (key, doi, title, journal, summary, first_seen, last_seen, summarizer) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET summary = excluded.summary, last_seen = excluded.last_seen, "
+                "summarizer = excluded.summarizer",
+                rows
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Return the number of stored papers."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_papers").fetchone()[0]
+
+    def clear(self) -> int:
+        """Forget all papers. Returns the number removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM seen_papers")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the seen-paper store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show the number of stored papers")
+    subparsers.add_parser('prune', help="Forget papers older than the retention window")
+    subparsers.add_parser('clear', help="Forget all papers")
+    args = parser.parse_args()
+
+    with SeenStore() as store:
+        if args.command == 'prune':
+            print(f"Removed {store.prune()} paper(s)")
+        elif args.command == 'clear':
+            print(f"Removed {store.clear()} paper(s)")
+        else:
+            print(f"{store.count()} paper(s) in {store.path}")
+
+if __name__ == "__main__":
+    main()
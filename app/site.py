@@ -0,0 +1,71 @@
+import argparse
+import logging
+from collections import Counter
+from typing import List
+from app.config import Config
+from app.manifest import DigestEntry, DigestManifest
+from app.renderer import write_page
+
+logger = logging.getLogger(__name__)
+
+def write_index(manifest: DigestManifest) -> bool:
+    """Render index.html with the latest digests and links to every month of the archive."""
+    per_month = Counter(entry.month for entry in manifest.entries())
+    return write_page(
+        Config.INDEX_FILE, 'index.html',
+        latest=manifest.entries()[:Config.INDEX_LATEST],
+        months=[(month, per_month[month]) for month in manifest.months()]
+    )
+
+def write_month(manifest: DigestManifest, month: str) -> bool:
+    """Render the archive page of one month, linked to the months before and after it."""
+    months = manifest.months()
+    position = months.index(month)
+    return write_page(
+        Config.ARCHIVE_PATH_FMT.format(month=month), 'archive.html',
+        month=month,
+        entries=manifest.month(month),
+        newer=months[position - 1] if position > 0 else None,
+        older=months[position + 1] if position + 1 < len(months) else None
+    )
+
+def neighbouring_months(manifest: DigestManifest, month: str) -> List[str]:
+    """A month and the months next to it, whose archive pages link to it."""
+    months = manifest.months()
+    position = months.index(month)
+    return months[max(position - 1, 0):position + 2]
+
+def update_site(entry: DigestEntry, manifest: DigestManifest = None) -> bool:
+    """
+    Record a new digest in the manifest and re-render only the pages that
+    show it: the index and the archive pages of its month and neighbours.
+    """
+    manifest = manifest or DigestManifest()
+    manifest.add(entry)
+    ok = write_index(manifest)
+    for month in neighbouring_months(manifest, entry.month):
+        ok = write_month(manifest, month) and ok
+    return ok
+
+def build_site(manifest: DigestManifest = None) -> bool:
+    """Render the index and every archive page from the manifest."""
+    manifest = manifest or DigestManifest()
+    ok = write_index(manifest)
+    for month in manifest.months():
+        ok = write_month(manifest, month) and ok
+    logger.info(f"Built the index and {len(manifest.months())} archive pages")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the index and archive pages from the digest manifest.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help="Render the index and all archive pages")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        manifest = DigestManifest()
+        if build_site(manifest):
+            print(f"Built {Config.INDEX_FILE} and {len(manifest.months())} archive pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from app.config import Config
+from app.lexical import paper_text, words
+from app.manifest import digest_sources, load_digest_papers
+from app.models import Paper
+from app.ranker import load_preferences
+from app.renderer import TEMPLATE_DIR, write_page
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("journals", "topics")
+TEMPLATES = ("papers.html", "listing.html")
+# Paper fields shown on the pages; a page is rebuilt only when these change
+PAGE_FIELDS = ("title", "link", "journal", "also_in", "doi", "summary")
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'untitled'
+
+def page_path(section: str, name: str, page: str) -> str:
+    return Config.SITE_PAGE_FMT.format(section=section, slug=slugify(name), page=page)
+
+def content_hash(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def topic_matcher(topics: List[str]) -> Callable[[Paper], List[str]]:
+    """Function listing the topics a paper is about: those whose words all occur in its text."""
+    topic_words = [(topic, set(words(topic))) for topic in topics]
+    topic_words = [(topic, terms) for topic, terms in topic_words if terms]
+
+    def match(paper: Paper) -> List[str]:
+        text = set(words(paper_text(paper, title_weight=1)))
+        return [topic for topic, terms in topic_words if terms <= text]
+    return match
+
+class SiteState:
+    """
+    Dependency graph of the generated pages, kept between builds: a content
+    hash for every digest read, the pages each digest contributes to, and the
+    hash of every page's inputs when it was last written.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'site.sqlite3')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " date TEXT PRIMARY KEY,"
+            " signature TEXT NOT NULL,"
+            " hash TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS edges ("
+            " date TEXT NOT NULL,"
+            " page TEXT NOT NULL,"
+            " section TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " month TEXT NOT NULL,"
+            " PRIMARY KEY (date, page))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS edges_page ON edges (page)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " page TEXT PRIMARY KEY,"
+            " section TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " month TEXT NOT NULL,"
+            " papers INTEGER NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " built_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_meta(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+            self._conn.commit()
+
+    def source(self, date: str) -> Optional[Tuple[str, str]]:
+        """(signature, hash) recorded for a digest, or None if it was never read."""
+        with self._lock:
+            return self._conn.execute("SELECT signature, hash FROM sources WHERE date = ?", (date,)).fetchone()
+
+    def source_dates(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT date FROM sources")}
+
+    def set_source(self, date: str, signature: str, digest_hash: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sources (date, signature, hash) VALUES (?, ?, ?)",
+                               (date, signature, digest_hash))
+            self._conn.commit()
+
+    def remove_source(self, date: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE date = ?", (date,))
+            self._conn.execute("DELETE FROM edges WHERE date = ?", (date,))
+            self._conn.commit()
+
+    def edges(self, date: str) -> Dict[str, Tuple[str, str, str]]:
+        """Pages a digest contributes to, as page -> (section, name, month)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT page, section, name, month FROM edges WHERE date = ?", (date,)).fetchall()
+        return {page: (section, name, month) for page, section, name, month in rows}
+
+    def set_edges(self, date: str, pages: Dict[str, Tuple[str, str, str]]):
+        with self._lock:
+            self._conn.execute("DELETE FROM edges WHERE date = ?", (date,))
+            self._conn.executemany(
+                "INSERT INTO edges (date, page, section, name, month) VALUES (?, ?, ?, ?, ?)",
+                [(date, page, *info) for page, info in pages.items()]
+            )
+            self._conn.commit()
+
+    def dates_for(self, page: str) -> List[str]:
+        """Digests contributing to a page, newest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT date FROM edges WHERE page = ? ORDER BY date DESC", (page,)).fetchall()
+        return [row[0] for row in rows]
+
+    def page_hash(self, page: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT hash FROM pages WHERE page = ?", (page,)).fetchone()
+        return row[0] if row else None
+
+    def put_page(self, page: str, section: str, name: str, month: str, papers: int, page_hash: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (page, section, name, month, papers, hash, built_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (page, section, name, month, papers, page_hash, time.time())
+            )
+            self._conn.commit()
+
+    def remove_page(self, page: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE page = ?", (page,))
+            self._conn.commit()
+
+    def pages(self, section: str = None, name: str = None) -> List[Tuple[str, str, str, str, int]]:
+        """(page, section, name, month, papers) of built pages, newest month first."""
+        query, params = "SELECT page, section, name, month, papers FROM pages WHERE 1 = 1", []
+        if section:
+            query, params = query + " AND section = ?", params + [section]
+        if name:
+            query, params = query + " AND name = ?", params + [name]
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY name, month DESC", params).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+@dataclass
+class BuildReport:
+    rebuilt: Dict[str, str] = field(default_factory=dict)  # page -> why it was rebuilt
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0  # pages whose inputs were checked and found unchanged
+    digests_read: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        lines = [f"site build: {len(self.rebuilt)} pages rebuilt, {len(self.removed)} removed, "
+                 f"{self.unchanged} unchanged, {self.digests_read} digests read in {self.elapsed:.2f}s"]
+        lines += [f"  {page}: {reason}" for page, reason in sorted(self.rebuilt.items())]
+        lines += [f"  {page}: removed" for page in self.removed]
+        return '\n'.join(lines)
+
+class SiteBuilder:
+    """
+    Incremental builder for the per-journal and per-topic pages.
+    Each journal and preference topic gets one page per month listing its
+    papers from every digest of that month, an index of its months, and a
+    section overview. A digest is re-read only when its file changed, and only
+    the month pages it contributes to (before or after the change) are
+    re-rendered, so a daily build touches the current month only. Everything
+    is rebuilt when the templates change; topic pages when the set of topics
+    changes.
+    """
+
+    def __init__(self, digest_dir: str = 'digests', state: SiteState = None, topics: List[str] = None):
+        self.digest_dir = digest_dir
+        self.state = state
+        self.topics = topics
+        self._papers: Dict[str, List[Paper]] = {}
+
+    def papers(self, date: str) -> List[Paper]:
+        if date not in self._papers:
+            self._papers[date] = load_digest_papers(date, self.digest_dir)
+        return self._papers[date]
+
+    def contributions(self, date: str, match: Callable[[Paper], List[str]]) -> Dict[str, Tuple[str, str, str]]:
+        """Month pages a digest's papers appear on, as page -> (section, name, month)."""
+        month, pages = date[:7], {}
+        for paper in self.papers(date):
+            for journal in [paper.journal] + paper.also_in:
+                pages[page_path("journals", journal, month)] = ("journals", journal, month)
+            for topic in match(paper):
+                pages[page_path("topics", topic, month)] = ("topics", topic, month)
+        return pages
+
+    def page_papers(self, section: str, name: str, dates: List[str],
+                    match: Callable[[Paper], List[str]]) -> List[Tuple[str, List[Paper]]]:
+        """Papers listed on a page, grouped by digest date."""
+        groups = []
+        for date in dates:
+            if section == "journals":
+                papers = [paper for paper in self.papers(date) if name in [paper.journal] + paper.also_in]
+            else:
+                papers = [paper for paper in self.papers(date) if name in match(paper)]
+            if papers:
+                groups.append((date, papers))
+        return groups
+
+    def build(self, full: bool = False) -> BuildReport:
+        own_state = self.state is None
+        state = self.state or SiteState()
+        try:
+            return self._build(state, full)
+        finally:
+            if own_state:
+                state.close()
+
+    def _build(self, state: SiteState, full: bool) -> BuildReport:
+        started = time.perf_counter()
+        report = BuildReport()
+        templates_hash = content_hash(*(file_hash(os.path.join(TEMPLATE_DIR, name)) for name in TEMPLATES))
+        topics = self.topics if self.topics is not None else list(load_preferences())
+        topics_hash = content_hash(sorted(topics))
+        match = topic_matcher(topics)
+        topics_changed = state.get_meta('topics') != topics_hash
+        templates_changed = state.get_meta('templates') != templates_hash
+
+        # Pages to re-render, with the first reason found for each
+        stale: Dict[str, str] = {}
+        info: Dict[str, Tuple[str, str, str]] = {}
+
+        def mark(pages: Dict[str, Tuple[str, str, str]], reason: str):
+            info.update(pages)
+            for page in pages:
+                stale.setdefault(page, reason)
+
+        sources = digest_sources(self.digest_dir)
+        for date in sorted(state.source_dates() - set(sources)):
+            mark(state.edges(date), f"digest {date} removed")
+            state.remove_source(date)
+        for date, path in sources.items():
+            stat = os.stat(path)
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            recorded = state.source(date)
+            if recorded and recorded[0] == signature and not (full or topics_changed):
+                continue
+            digest_hash = file_hash(path)
+            if recorded and recorded[1] == digest_hash and not (full or topics_changed):
+                state.set_source(date, signature, digest_hash)
+                continue
+            if full:
+                reason = "full build"
+            elif recorded is None:
+                reason = f"digest {date} added"
+            elif recorded[1] != digest_hash:
+                reason = f"digest {date} changed"
+            else:
+                reason = "topics changed"
+            pages = self.contributions(date, match)
+            report.digests_read += 1
+            mark(state.edges(date), reason)
+            mark(pages, reason)
+            state.set_edges(date, pages)
+            state.set_source(date, signature, digest_hash)
+        if templates_changed:
+            mark({page: (section, name, month) for page, section, name, month, _ in state.pages()}, "templates changed")
+
+        touched = set()
+        for page in sorted(stale):
+            section, name, month = info[page]
+            groups = self.page_papers(section, name, state.dates_for(page), match)
+            if not groups:
+                if os.path.exists(page):
+                    os.remove(page)
+                state.remove_page(page)
+                report.removed.append(page)
+                touched.add((section, name))
+                continue
+            page_hash = content_hash(templates_hash, [
+                (date, [{key: getattr(paper, key) for key in PAGE_FIELDS} for paper in papers])
+                for date, papers in groups
+            ])
+            if not full and page_hash == state.page_hash(page) and os.path.exists(page):
+                report.unchanged += 1
+                continue
+            count = sum(len(papers) for _, papers in groups)
+            if write_page(page, 'papers.html', section=section, name=name, month=month, groups=groups):
+                state.put_page(page, section, name, month, count, page_hash)
+                report.rebuilt[page] = stale[page]
+                touched.add((section, name))
+
+        if templates_changed or full:
+            touched |= {(section, name) for _, section, name, _, _ in state.pages()}
+        self._write_listings(state, touched, report)
+        state.set_meta('topics', topics_hash)
+        state.set_meta('templates', templates_hash)
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _write_listings(self, state: SiteState, touched: Set[Tuple[str, str]], report: BuildReport):
+        """Month index of every touched journal or topic, and the overview of their sections."""
+        for section, name in sorted(touched):
+            months = state.pages(section, name)
+            path = page_path(section, name, 'index')
+            if not months:
+                if os.path.exists(path):
+                    os.remove(path)
+                    report.removed.append(path)
+                continue
+            items = [(f"{month}.html", month, papers) for _, _, _, month, papers in months]
+            if write_page(path, 'listing.html', title=name, items=items, months=True):
+                report.rebuilt[path] = "months changed"
+        for section in sorted({section for section, _ in touched}):
+            totals: Dict[str, int] = {}
+            for _, _, name, _, papers in state.pages(section):
+                totals[name] = totals.get(name, 0) + papers
+            path = Config.SITE_SECTION_FMT.format(section=section)
+            items = [(f"{slugify(name)}/index.html", name, papers) for name, papers in sorted(totals.items())]
+            if write_page(path, 'listing.html', title=section.capitalize(), items=items, months=False):
+                report.rebuilt[path] = f"{section} changed"
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the per-journal and per-topic pages.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Rebuild the pages whose inputs changed")
+    build.add_argument('--full', action='store_true', help="Rebuild every page")
+    subparsers.add_parser('stats', help="Show the pages built so far")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+    if args.command == 'build':
+        print(SiteBuilder().build(full=args.full))
+    else:
+        with SiteState() as state:
+            for section in SECTIONS:
+                pages = state.pages(section)
+                print(f"{section}: {len({name for _, _, name, _, _ in pages})} pages of {len(pages)} months")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import logging
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional
+from feedparser import FeedParserDict
+from feedparser.datetimes import _parse_date
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+NAMESPACES = {
+    'http://www.w3.org/2005/Atom': 'atom',
+    'http://purl.org/rss/1.0/': 'rss1',
+    'http://purl.org/dc/elements/1.1/': 'dc',
+    'http://purl.org/dc/terms/': 'dcterms',
+    'http://prismstandard.org/namespaces/basic/2.0/': 'prism',
+    'http://purl.org/rss/1.0/modules/content/': 'content',
+    'http://www.w3.org/1999/02/22-rdf-syntax-ns#': 'rdf',
+}
+RDF_ABOUT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about'
+
+# (prefix, local name) of entry elements: RSS 2.0 item, RSS 1.0 item, Atom entry
+ENTRY_TAGS = {('', 'item'), ('rss1', 'item'), ('atom', 'entry')}
+
+# Child element -> feedparser entry key, following feedparser's own mapping
+FIELD_MAP = {
+    'title': 'title',
+    'guid': 'id',
+    'id': 'id',
+    'description': 'summary',
+    'summary': 'summary',
+    'content:encoded': 'content',
+    'pubDate': 'published',
+    'published': 'published',
+    'dcterms:issued': 'published',
+    'updated': 'updated',
+    'dc:date': 'updated',
+    'dcterms:modified': 'updated',
+}
+
+class StreamParseError(Exception):
+    """Raised when a feed is not well-formed XML and must go through feedparser."""
+
+def _split_tag(tag: str):
+    if tag.startswith('{'):
+        uri, local = tag[1:].split('}', 1)
+        return NAMESPACES.get(uri, uri), local
+    return '', tag
+
+def _text(elem) -> str:
+    return ''.join(elem.itertext()).strip()
+
+def entry_from_element(elem) -> FeedParserDict:
+    """Convert an item/entry element into a feedparser-style entry."""
+    entry = FeedParserDict()
+    for child in elem:
+        prefix, local = _split_tag(child.tag)
+        if local == 'link':
+            href = child.get('href')
+            if href is None:
+                entry.setdefault('link', _text(child))
+            elif child.get('rel', 'alternate') == 'alternate':
+                entry.setdefault('link', href)
+            continue
+
+        # Atom and RSS 1.0 elements are the core vocabulary; modules keep their prefix
+        name = f"{prefix}:{local}" if prefix not in ('', 'atom', 'rss1') else local
+        key = FIELD_MAP.get(name, name.replace(':', '_'))
+        entry.setdefault(key, _text(child))
+
+    if 'id' not in entry and elem.get(RDF_ABOUT):
+        entry['id'] = elem.get(RDF_ABOUT)
+    if 'summary' not in entry and 'content' in entry:
+        entry['summary'] = entry['content']
+    for field in ('published', 'updated'):
+        if field in entry:
+            parsed = _parse_date(entry[field])
+            if parsed:
+                entry[f"{field}_parsed"] = parsed
+    return entry
+
+def entry_date(entry) -> Optional[date]:
+    """Date of an entry, using the same field precedence as app.fetcher.parse_date."""
+    for field in ('published_parsed', 'updated_parsed'):
+        if entry.get(field):
+            return datetime(*entry[field][:6]).date()
+    return None
+
+def iter_entries(chunks: Iterable[bytes], cutoff: date = None, stop_after: int = None) -> Iterator[FeedParserDict]:
+    """
+    Incrementally parse a feed from byte chunks, yielding entries as they complete.
+    Entries older than the cutoff are skipped, and parsing stops once stop_after
+    consecutive entries are older than the cutoff. Parsed elements are discarded
+    as soon as they are yielded, so memory stays bounded by the size of one entry.
+    Raises StreamParseError if the XML is malformed.
+    """
+    stop_after = stop_after or Config.STREAM_STOP_AFTER_OLD
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+    old_in_a_row = 0
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                if _split_tag(elem.tag) not in ENTRY_TAGS:
+                    continue
+
+                entry = entry_from_element(elem)
+                if stack:
+                    stack[-1].remove(elem)
+
+                published = entry_date(entry)
+                if cutoff and published and published < cutoff:
+                    old_in_a_row += 1
+                    if old_in_a_row >= stop_after:
+                        logger.debug(f"Stopping after {old_in_a_row} entries older than {cutoff}")
+                        return
+                    continue
+                old_in_a_row = 0
+                yield entry
+        parser.close()
+    except ET.ParseError as e:
+        raise StreamParseError(str(e)) from e
@@ -1,53 +1,319 @@
+import json
 import logging
-from typing import List
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
 from openai import OpenAI
-from app.models import Paper
+from app.models import Paper, paper_key
 from app.config import Config
-import os
+from app.batch import completion_text, run_batch
+from app.llm import RateLimiter, create_completion, estimate_tokens, failure_status, get_limiter
+from app.summary_cache import SummaryCache
 
 logger = logging.getLogger(__name__)
 
-def summarize_papers(papers: List[Paper]) -> List[Paper]:
+SUMMARY_FAILED = "Summary generation failed."
+PROMPT_VERSION = "1"  # bump when build_messages changes, so cached summaries are regenerated
+PACKED_PROMPT_VERSION = "packed-1"  # likewise for build_packed_messages
+LOCAL_STATUSES = ("local", "local_fallback")  # summaries written by local_summary rather than the LLM
+
+def summarizer_version(mode: str = None) -> str:
+    """Model and prompt version summaries are written with in the given mode."""
+    mode = mode or Config.SUMMARY_MODE
+    return f"{Config.OPENAI_MODEL}/{PACKED_PROMPT_VERSION if mode == 'packed' else PROMPT_VERSION}"
+
+PACKED_SYSTEM_PROMPT = (
+    "You are a scientific paper summarizer. Provide clear, concise summaries. "
+    "You will receive several papers, each introduced by its ID in square brackets. "
+    "For every paper, write a concise two-sentence summary focusing on the key findings and novelty: "
+    "the first sentence should describe the main discovery, the second should highlight its significance. "
+    'Reply with a JSON object of the form {"summaries": {"<ID>": "<summary>", ...}} covering every ID.'
+)
+
+def build_messages(paper: Paper) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a scientific paper summarizer. Provide clear, concise summaries."},
+        {
+            "role": "user",
+            "content": (
+                f"Title: {paper.title}\n"
+                f"Abstract: {paper.abstract}\n\n"
+                "Please provide a concise two-sentence summary focusing on the key findings and novelty. "
+                "First sentence should describe the main discovery, second should highlight its significance."
+            )
+        }
+    ]
+
+def paper_block(paper_id: str, paper: Paper) -> str:
+    return f"[{paper_id}]\nTitle: {paper.title}\nAbstract: {paper.abstract}\n"
+
+def build_packed_messages(pack: List[Tuple[str, Paper]]) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+        {"role": "user", "content": "\n".join(paper_block(paper_id, paper) for paper_id, paper in pack)}
+    ]
+
+def pack_papers(papers: List[Paper], budget: int = None) -> List[List[Tuple[str, Paper]]]:
+    """
+    Greedily group papers into requests whose estimated prompt plus completion
+    tokens stay within the budget. Papers are given IDs unique within their pack.
+    """
+    budget = budget or Config.SUMMARY_PACK_TOKENS
+    overhead = estimate_tokens([{"role": "system", "content": PACKED_SYSTEM_PROMPT}], 8)
+    packs, pack, used = [], [], overhead
+    for paper in papers:
+        paper_id = str(len(pack) + 1)
+        cost = len(paper_block(paper_id, paper)) // 4 + Config.SUMMARY_MAX_TOKENS
+        if pack and used + cost > budget:
+            packs.append(pack)
+            pack, used, paper_id = [], overhead, "1"
+        pack.append((paper_id, paper))
+        used += cost
+    if pack:
+        packs.append(pack)
+    return packs
+
+def parse_packed_response(content: str, pack: List[Tuple[str, Paper]]) -> Dict[str, str]:
+    """Valid summaries by paper ID; missing, empty or non-string entries are left out."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    summaries = data.get("summaries", data) if isinstance(data, dict) else None
+    if not isinstance(summaries, dict):
+        return {}
+    valid = {}
+    for paper_id, _ in pack:
+        summary = summaries.get(paper_id)
+        if isinstance(summary, str) and summary.strip():
+            valid[paper_id] = summary.strip()
+    return valid
+
+def summarize_pack(client, pack: List[Tuple[str, Paper]], limiter: RateLimiter = None) -> List[Paper]:
+    """
+    Summarize several papers in one JSON-mode request.
+    Returns the papers whose summaries were missing or malformed.
+    """
+    try:
+        logger.info(f"Generating {len(pack)} summaries in one request")
+        response = create_completion(
+            client, build_packed_messages(pack), limiter,
+            completion_tokens=Config.SUMMARY_MAX_TOKENS * len(pack),
+            response_format={"type": "json_object"}
+        )
+        summaries = parse_packed_response(response.choices[0].message.content, pack)
+    except Exception as e:
+        logger.error(f"Error generating {len(pack)} packed summaries: {str(e)}")
+        for _, paper in pack:
+            paper.summary = SUMMARY_FAILED
+            paper.summary_status = failure_status(e)
+        return []
+
+    missing = []
+    for paper_id, paper in pack:
+        if paper_id in summaries:
+            paper.summary = summaries[paper_id]
+            paper.summary_status = "ok"
+        else:
+            missing.append(paper)
+    if missing:
+        logger.warning(f"{len(missing)} of {len(pack)} packed summaries were missing or malformed")
+    return missing
+
+def summarize_packed(client, papers: List[Paper], limiter: RateLimiter = None, max_workers: int = None):
+    """
+    Summarize papers in token-budget packs. Only papers whose summaries were
+    missing or malformed are re-submitted; those still missing after
+    SUMMARY_PACK_RETRIES are summarized one per request.
+    """
+    pending = papers
+    for _ in range(1 + Config.SUMMARY_PACK_RETRIES):
+        if not pending:
+            return
+        packs = pack_papers(pending)
+        workers = max(1, min(max_workers or Config.SUMMARY_MAX_WORKERS, len(packs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = [paper for missing in executor.map(lambda pack: summarize_pack(client, pack, limiter), packs)
+                       for paper in missing]
+    for paper in pending:
+        summarize_paper(client, paper, limiter)
+
+def summarize_paper(client, paper: Paper, limiter: RateLimiter = None) -> Paper:
+    """Summarize one paper, recording the outcome in paper.summary_status."""
+    try:
+        logger.info(f"Generating summary for: {paper.title}")
+        response = create_completion(
+            client, build_messages(paper), limiter,
+            completion_tokens=Config.SUMMARY_MAX_TOKENS
+        )
+        paper.summary = response.choices[0].message.content.strip()
+        paper.summary_status = "ok"
+        logger.info(f"Added summary for: {paper.title}")
+    except Exception as e:
+        logger.error(f"Error generating summary for {paper.title}: {str(e)}")
+        paper.summary = SUMMARY_FAILED
+        paper.summary_status = failure_status(e)
+    return paper
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])')
+_WORD = re.compile(r'[a-z0-9][a-z0-9\-]+')
+STOPWORDS = frozenset(
+    "a an and are as at be been by can could for from has have here however in into is it its may might "
+    "not of on or our over such than that the their these they this those through to under using was we "
+    "were which while with within without also both between here show shows shown study results found "
+    "suggest suggests".split()
+)
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or '') if s.strip()]
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _WORD.findall(text.lower()) if t not in STOPWORDS]
+
+def textrank(sentences: List[str], bias: str = '', damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """
+    TextRank scores over TF-IDF cosine similarity between sentences, with the
+    random jump biased towards sentences similar to the bias text (the title).
+    """
+    rows = [_terms(s) for s in sentences] + [_terms(bias)]
+    vocab = {term: i for i, term in enumerate(sorted({t for row in rows for t in row}))}
+    tf = np.zeros((len(rows), max(len(vocab), 1)))
+    for i, row in enumerate(rows):
+        for term in row:
+            tf[i, vocab[term]] += 1
+    idf = np.log((1 + len(rows)) / (1 + np.count_nonzero(tf, axis=0))) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+
+    similarity = vectors[:-1] @ vectors[:-1].T
+    np.fill_diagonal(similarity, 0)
+    totals = similarity.sum(axis=1, keepdims=True)
+    transition = similarity / np.where(totals == 0, 1, totals)
+    jump = vectors[:-1] @ vectors[-1] + 1 / len(sentences)
+    jump /= jump.sum()
+
+    scores = np.full(len(sentences), 1 / len(sentences))
+    for _ in range(iterations):
+        updated = (1 - damping) * jump + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+def local_summary(paper: Paper, sentences: int = 2) -> str:
+    """Extractive summary: the top TextRank sentences of the abstract, in their original order."""
+    candidates = split_sentences(paper.abstract)
+    if len(candidates) <= sentences:
+        return ' '.join(candidates) or paper.title
+    scores = textrank(candidates, bias=paper.title)
+    top = sorted(np.argsort(-scores, kind='stable')[:sentences])
+    return ' '.join(candidates[i] for i in top)
+
+def summarize_locally(papers: List[Paper], status: str = "local"):
+    for paper in papers:
+        paper.summary = local_summary(paper)
+        paper.summary_status = status
+
+def summarize_batch(papers: List[Paper], **kwargs):
+    """
+    Summarize papers through the asynchronous Batch API, keyed by paper_key.
+    Papers whose results are not available yet (the job outlived BATCH_MAX_WAIT)
+    are marked "batch_pending"; the job is resumed on the next run.
+    """
+    bodies = {paper_key(paper): {"model": Config.OPENAI_MODEL, "messages": build_messages(paper)} for paper in papers}
+    try:
+        results, _ = run_batch(bodies, kind="summaries", **kwargs)
+    except Exception as e:
+        logger.error(f"Error running summary batch: {str(e)}")
+        results = None
+    for paper in papers:
+        result = results.get(paper_key(paper)) if results is not None else None
+        summary = completion_text(result)
+        if summary:
+            paper.summary = summary
+            paper.summary_status = "ok"
+        else:
+            paper.summary = SUMMARY_FAILED
+            if results is None:
+                paper.summary_status = "error"
+            else:
+                paper.summary_status = "batch_error" if result else "batch_pending"
+
+def summarize_papers(papers: List[Paper], max_workers: int = None, use_cache: bool = None,
+                     mode: str = None, llm_top_n: int = None) -> List[Paper]:
     """
     Generate summaries for a list of papers using OpenAI.
+    Summaries already in the persistent summary cache are reused; the rest are
+    requested concurrently within the client-side RPM/TPM budget, one paper
+    per request ("single" mode) or packed several to a request ("packed"),
+    or submitted as one asynchronous Batch API job ("batch"); "local" mode
+    makes no API calls at all. With llm_top_n, only the first N papers go to
+    the LLM, so callers pass papers most relevant first (run.py orders them by
+    BM25 when summarizing before ranking); the rest get local extractive
+    summaries, as do papers whose LLM summary failed when SUMMARY_LOCAL_FALLBACK is set.
     Returns the same list with summaries added.
     """
     if not papers:
         logger.warning("No papers to summarize")
         return papers
 
-    # Initialize OpenAI client
-    client = OpenAI(api_key=Config.OPENAI_API_KEY)
+    mode = mode or Config.SUMMARY_MODE
+    if mode not in ("single", "packed", "batch", "local"):
+        raise ValueError(f"Unknown summary mode: {mode}")
+    llm_top_n = Config.SUMMARY_LLM_TOP_N if llm_top_n is None else llm_top_n
+    split = 0 if mode == "local" else llm_top_n or len(papers)
+    papers_for_llm, local = papers[:split], papers[split:]
+    if local:
+        summarize_locally(local)
+        logger.info(f"Summarized {len(local)} papers locally")
 
-    # Process each paper individually
-    for paper in papers:
-        try:
-            messages = [
-                {"role": "system", "content": "You are a scientific paper summarizer. Provide clear, concise summaries."},
-                {
-                    "role": "user", 
-                    "content": (
-                        f"Title: {paper.title}\n"
-                        f"Abstract: {paper.abstract}\n\n"
-                        "Please provide a concise two-sentence summary focusing on the key findings and novelty. "
-                        "First sentence should describe the main discovery, second should highlight its significance."
-                    )
-                }
-            ]
-
-            # Call OpenAI API
-            logger.info(f"Generating summary for: {paper.title}")
-            response = client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=messages
-            )
+    use_cache = Config.SUMMARY_CACHE_ENABLED if use_cache is None else use_cache
+    prompt_version = PACKED_PROMPT_VERSION if mode == "packed" else PROMPT_VERSION
+    cache = SummaryCache(prompt_version=prompt_version) if use_cache and papers_for_llm else None
+    try:
+        pending = papers_for_llm
+        if cache:
+            pending = []
+            for paper in papers_for_llm:
+                summary = cache.get(paper)
+                if summary is None:
+                    pending.append(paper)
+                else:
+                    paper.summary = summary
+                    paper.summary_status = "cached"
+            logger.info(f"Summary cache: {cache.hits} hits, {cache.misses} misses")
+
+        if pending and mode == "batch":
+            summarize_batch(pending)
+        elif pending:
+            # Retries are handled by create_completion so that they respect the rate budget
+            client = OpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0, timeout=Config.SUMMARY_TIMEOUT)
+            limiter = get_limiter()
+            if mode == "packed":
+                summarize_packed(client, pending, limiter, max_workers)
+            else:
+                workers = max(1, min(max_workers or Config.SUMMARY_MAX_WORKERS, len(pending)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(lambda paper: summarize_paper(client, paper, limiter), pending))
 
-            # Extract summary from response
-            paper.summary = response.choices[0].message.content.strip()
-            logger.info(f"Added summary for: {paper.title}")
+        if cache:
+            for paper in pending:
+                if paper.summary_status == "ok":
+                    cache.put(paper, paper.summary)
+            cache.evict()
 
-        except Exception as e:
-            logger.error(f"Error generating summary for {paper.title}: {str(e)}")
-            paper.summary = "Summary generation failed."
+        if Config.SUMMARY_LOCAL_FALLBACK:
+            failed = [paper for paper in pending if paper.summary == SUMMARY_FAILED]
+            if failed:
+                logger.warning(f"Falling back to local summaries for {len(failed)} papers")
+                summarize_locally(failed, status="local_fallback")
+    finally:
+        if cache:
+            cache.close()
 
-    return papers 
\ No newline at end of file
+    statuses = Counter(paper.summary_status for paper in papers)
+    logger.info(f"Summarized {len(papers)} papers: {dict(statuses)}")
+    return papers
@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from app.config import Config
+from app.models import Paper
+
+logger = logging.getLogger(__name__)
+
+def content_key(paper: Paper, model: str, prompt_version: str) -> str:
+    """Hash of everything that determines a summary: the paper text, model and prompt."""
+    content = '\x1f'.join((paper.title or '', paper.abstract or '', model, prompt_version))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """
+    Persistent cache of LLM summaries keyed by paper content, model and prompt version.
+    Changing the model or prompt version only misses the entries made with the
+    old ones, which then age out. Entries are evicted after max_age_days, and the
+    least recently used beyond max_entries. Several processes may share the file.
+    """
+
+    def __init__(self, path: str = None, model: str = None, prompt_version: str = '1',
+                 max_entries: int = None, max_age_days: int = None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'summary_cache.sqlite3')
+        self.model = model or Config.OPENAI_MODEL
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries or Config.SUMMARY_CACHE_MAX_ENTRIES
+        self.max_age_days = Config.SUMMARY_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # concurrent readers alongside a writer
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " prompt_version TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+        self.evict()
+
+    def key(self, paper: Paper) -> str:
+        return content_key(paper, self.model, self.prompt_version)
+
+    def get(self, paper: Paper) -> Optional[str]:
+        """Return the cached summary for a paper, counting the hit or miss."""
+        key = self.key(paper)
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.hits += 1
+                self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, paper: Paper, summary: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, model, prompt_version, summary, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(paper), self.model, self.prompt_version, summary, now, now)
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used beyond the size limit."""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (cutoff,)).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM summaries WHERE key NOT IN "
+                "(SELECT key FROM summaries ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"Evicted {removed} cached summaries")
+        return removed
+
+    def clear(self, model: str = None) -> int:
+        """Remove cached summaries for one model, or all of them. Returns the number removed."""
+        with self._lock:
+            if model:
+                cursor = self._conn.execute("DELETE FROM summaries WHERE model = ?", (model,))
+            else:
+                cursor = self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Entries per model and prompt version."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, prompt_version, COUNT(*) FROM summaries GROUP BY model, prompt_version"
+            ).fetchall()
+        return {f"{model} v{version}": n for model, version, n in rows}
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the persistent LLM summary cache.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Show cached summaries per model and prompt version")
+    subparsers.add_parser('evict', help="Drop expired and least recently used entries")
+    clear = subparsers.add_parser('clear', help="Remove cached summaries")
+    clear.add_argument('--model', help="Only remove summaries made with this model")
+    args = parser.parse_args()
+
+    with SummaryCache() as cache:
+        if args.command == 'clear':
+            print(f"Removed {cache.clear(args.model)} cached summaries")
+        elif args.command == 'evict':
+            print(f"Evicted {cache.evict()} cached summaries")
+        else:
+            for label, n in cache.stats().items():
+                print(f"{label}: {n}")
+            print(f"{cache.count()} cached summaries in {cache.path}")
+
+if __name__ == "__main__":
+    main()
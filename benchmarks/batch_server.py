@@ -0,0 +1,186 @@
+"""
+Local stand-in for the OpenAI Files and Batch endpoints.
+
+Accepts JSONL uploads, runs chat completion batches with a canned responder
+and reports them in_progress for a configurable number of polls, so the batch
+summarization mode can be exercised (and resumed) without network access.
+
+    python -m benchmarks.batch_server --port 8001 --polls 2
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 SUMMARY_MODE=batch BATCH_POLL_INTERVAL=1 python run.py
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+def echo_summary(body: dict) -> str:
+    """Canned completion: a summary naming the paper in the prompt."""
+    prompt = body['messages'][-1]['content']
+    title = prompt.splitlines()[0].replace('Title: ', '', 1)
+    return f"Summary of {title}."
+
+class LocalBatchServer:
+    """Threaded HTTP server implementing /v1/files and /v1/batches, usable as a context manager."""
+
+    def __init__(self, respond: Callable[[dict], Optional[str]] = echo_summary, polls: int = 1,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.respond = respond  # returning None produces an error result for that request
+        self.polls = polls  # retrievals answered in_progress before a batch completes
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+        self._polled: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _new_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}-{next(self._ids)}"
+
+    def upload(self, content: bytes) -> dict:
+        file_id = self._new_id('file')
+        self.files[file_id] = content
+        return {'id': file_id, 'object': 'file', 'bytes': len(content), 'purpose': 'batch'}
+
+    def create_batch(self, request: dict) -> dict:
+        batch_id = self._new_id('batch')
+        output, errors = [], []
+        for line in self.files[request['input_file_id']].decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            content = self.respond(item['body'])
+            if content is None:
+                errors.append({'custom_id': item['custom_id'], 'response': None,
+                               'error': {'code': 'server_error', 'message': 'Canned failure'}})
+                continue
+            prompt_tokens = sum(len(m['content']) for m in item['body']['messages']) // 4
+            output.append({'custom_id': item['custom_id'], 'error': None, 'response': {
+                'status_code': 200,
+                'body': {
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content) // 4},
+                },
+            }})
+        batch = {
+            'id': batch_id,
+            'object': 'batch',
+            'endpoint': request['endpoint'],
+            'input_file_id': request['input_file_id'],
+            'status': 'validating',
+            'created_at': int(time.time()),
+            'request_counts': {'total': len(output) + len(errors), 'completed': len(output), 'failed': len(errors)},
+            'output_file_id': self.upload(self._jsonl(output))['id'] if output else None,
+            'error_file_id': self.upload(self._jsonl(errors))['id'] if errors else None,
+        }
+        self.batches[batch_id] = batch
+        self._polled[batch_id] = 0
+        return {**batch, 'output_file_id': None, 'error_file_id': None}
+
+    def retrieve(self, batch_id: str) -> Optional[dict]:
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        with self._lock:
+            self._polled[batch_id] += 1
+            done = self._polled[batch_id] > self.polls
+        if done:
+            return {**batch, 'status': 'completed'}
+        return {**batch, 'status': 'in_progress', 'output_file_id': None, 'error_file_id': None}
+
+    @staticmethod
+    def _jsonl(lines) -> bytes:
+        return ''.join(json.dumps(line) + '\n' for line in lines).encode('utf-8')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path == '/v1/files':
+                    message = BytesParser(policy=default_policy).parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                    )
+                    for part in message.iter_parts():
+                        if part.get_param('name', header='content-disposition') == 'file':
+                            return self._json(200, server.upload(part.get_payload(decode=True)))
+                    return self._json(400, {'error': {'message': 'missing file'}})
+                if self.path == '/v1/batches':
+                    request = json.loads(body)
+                    if request.get('input_file_id') not in server.files:
+                        return self._json(404, {'error': {'message': 'unknown input file'}})
+                    return self._json(200, server.create_batch(request))
+                self._json(404, {'error': {'message': 'not found'}})
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if parts[:2] == ['v1', 'batches'] and len(parts) == 3:
+                    batch = server.retrieve(parts[2])
+                    if batch:
+                        return self._json(200, batch)
+                elif parts[:2] == ['v1', 'files'] and len(parts) == 4 and parts[3] == 'content':
+                    if parts[2] in server.files:
+                        return self._reply(200, server.files[parts[2]], 'application/jsonl')
+                self._json(404, {'error': {'message': 'not found'}})
+
+            def _json(self, status, data):
+                self._reply(status, json.dumps(data).encode('utf-8'), 'application/json')
+
+            def _reply(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'LocalBatchServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--polls', type=int, default=1, help="polls answered in_progress before completion")
+    args = parser.parse_args()
+
+    server = LocalBatchServer(polls=args.polls, host=args.host, port=args.port)
+    print(f"Serving a stand-in Batch API at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
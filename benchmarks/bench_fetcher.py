@@ -0,0 +1,127 @@
+"""
+Load benchmark for fetch_today_articles against local synthetic feed servers.
+
+Starts one feed server per simulated host in a child process, points the feed
+registry at them and reports throughput, per-feed p50/p99 latency and peak memory.
+Results can be appended to a JSON Lines file to compare fetcher changes over time.
+
+    python -m benchmarks.bench_fetcher --feeds 500 --entries 200 --hosts 10 --latency 0.05
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+from benchmarks.feed_server import KINDS, FeedServerConfig, SyntheticFeedServer
+
+def _serve(hosts: int, config: FeedServerConfig, urls, stop):
+    servers = [SyntheticFeedServer(config).start() for _ in range(hosts)]
+    urls.put([server.base_url for server in servers])
+    stop.wait()
+    for server in servers:
+        server.stop()
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_benchmark(args) -> list:
+    from app.config import Config
+    from app.fetcher import fetch_today_articles
+    from app.normalizer import clear_profiles
+    from app.scheduler import HostScheduler
+
+    config = FeedServerConfig(entries=args.entries, latency=args.latency, error_rate=args.error_rate)
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(args.hosts, config, urls, stop), daemon=True)
+    server.start()
+    base_urls = urls.get(timeout=30)
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            registry = os.path.join(workdir, 'feeds.json')
+            with open(registry, 'w') as f:
+                json.dump([
+                    {'journal': f"{KINDS[i % len(KINDS)]} {i}",
+                     'url': f"{base_urls[i % len(base_urls)]}/{KINDS[i % len(KINDS)]}/{i}"}
+                    for i in range(args.feeds)
+                ], f)
+
+            overrides = {
+                'FEEDS_FILE': registry,
+                'CACHE_DIR': os.path.join(workdir, 'cache'),
+                'FEED_CACHE_ENABLED': args.cache,
+                'ARCHIVE_ENABLED': args.archive,
+                'FETCH_STREAMING': args.streaming,
+                'ADAPTIVE_POLLING': False,
+                'HOST_RATE_LIMIT': args.rate,
+            }
+            with patch.multiple(Config, **overrides):
+                for run in range(1, args.runs + 1):
+                    clear_profiles()
+                    scheduler = HostScheduler()
+                    start = time.perf_counter()
+                    papers = fetch_today_articles(max_workers=args.workers, scheduler=scheduler)
+                    elapsed = time.perf_counter() - start
+                    latencies = [s.latency for s in scheduler.stats]
+                    results.append({
+                        'timestamp': datetime.now().isoformat(timespec='seconds'),
+                        'run': run,
+                        'feeds': args.feeds,
+                        'entries': args.entries,
+                        'hosts': args.hosts,
+                        'workers': args.workers,
+                        'streaming': args.streaming,
+                        'cache': args.cache,
+                        'archive': args.archive,
+                        'seconds': round(elapsed, 3),
+                        'feeds_per_second': round(args.feeds / elapsed, 1),
+                        'entries_per_second': round(args.feeds * args.entries / elapsed, 1),
+                        'papers': len(papers),
+                        'failures': sum(1 for s in scheduler.stats if s.error),
+                        'p50_latency': round(percentile(latencies, 0.50), 4),
+                        'p99_latency': round(percentile(latencies, 0.99), 4),
+                        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                    })
+    finally:
+        stop.set()
+        server.join(timeout=10)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--feeds', type=int, default=500)
+    parser.add_argument('--entries', type=int, default=200)
+    parser.add_argument('--hosts', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05, help="mean server latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate', type=float, default=0, help="per-host request rate limit (0 = unlimited)")
+    parser.add_argument('--runs', type=int, default=1, help="repeat runs; later runs exercise the 304 path")
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--cache', action='store_true', help="enable the conditional GET feed cache")
+    parser.add_argument('--archive', action='store_true', help="enable the raw feed archive")
+    parser.add_argument('--output', help="append results to this JSON Lines file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    for result in run_benchmark(args):
+        print(f"run {result['run']}: {result['feeds']} feeds x {result['entries']} entries in "
+              f"{result['seconds']}s ({result['feeds_per_second']} feeds/s, "
+              f"{result['entries_per_second']} entries/s), p50 {result['p50_latency']}s, "
+              f"p99 {result['p99_latency']}s, peak RSS {result['peak_rss_mb']} MB, "
+              f"{result['papers']} papers, {result['failures']} failures")
+        if args.output:
+            with open(args.output, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for digest rendering.
+
+Renders several digests of synthetic papers to disk, once the old way (a new
+Environment per call and the page rendered to a string before writing) and
+once with the shared environment streaming to file, and reports time per
+digest and peak traced memory.
+
+    python -m benchmarks.bench_renderer --papers 10000 --digests 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import jinja2
+from app.models import Paper
+from app.renderer import TEMPLATE_DIR, write_digest
+
+def make_papers(n: int):
+    return [
+        Paper(
+            title=f"Paper {i}: a study of gene regulation in model organism {i % 17}",
+            doi=f"10.1038/s41586-026-{i:05d}-x",
+            link=f"https://www.nature.com/articles/s41586-026-{i:05d}-x",
+            abstract="",
+            journal=("Nature", "Cell", "Science")[i % 3],
+            published_date=datetime(2026, 10, 15),
+            summary="We show that a conserved enhancer controls expression of a developmental gene. " * 3,
+            also_in=["Nature Genetics"] if i % 10 == 0 else []
+        ) for i in range(n)
+    ]
+
+def render_by_string(path: str, date: str, papers):
+    """The renderer before the shared environment: compile, render to a string, then write."""
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_DIR))
+    html = env.get_template('digest.html').render(date=date, papers=papers, collapse_after=None)
+    with open(path, 'w') as f:
+        f.write(html)
+
+def render_streaming(path: str, date: str, papers):
+    write_digest(path, date, papers)
+
+def measure(render, papers, digests: int, out_dir: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(digests):
+        render(os.path.join(out_dir, f"digest-{i}.html"), f"2026-10-{i + 1:02d}", papers)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / digests, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--papers', type=int, default=10000)
+    parser.add_argument('--digests', type=int, default=5)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers)
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, render in (('string', render_by_string), ('streaming', render_streaming)):
+            per_digest, peak = measure(render, papers, args.digests, out_dir)
+            size = os.path.getsize(os.path.join(out_dir, 'digest-0.html'))
+            print(f"{name}: {args.digests} digests of {args.papers} papers  "
+                  f"{per_digest * 1000:.1f} ms/digest  peak {peak / 2**20:.1f} MiB  ({size / 2**20:.1f} MiB each)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Local stand-in for publisher feed servers.
+
+Serves generated feeds shaped like the real ones:
+    /nature/<n>  RSS 1.0 (RDF) with dc: and prism: metadata
+    /cell/<n>    RSS 2.0
+    /plos/<n>    Atom
+Entry counts, latency, error rate and 304 (ETag / Last-Modified) support are configurable.
+
+    python -m benchmarks.feed_server --port 8000 --entries 200 --latency 0.05
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+KINDS = ('nature', 'cell', 'plos')
+
+@dataclass
+class FeedServerConfig:
+    entries: int = 50
+    latency: float = 0.0  # mean seconds added to each response
+    error_rate: float = 0.0  # fraction of requests answered with 503
+    support_304: bool = True
+    recent_fraction: float = 0.1  # share of entries dated today or yesterday
+    today: date = field(default_factory=date.today)
+    seed: int = 0
+
+def _entry_dates(config: FeedServerConfig, n: int):
+    """Newest-first publication times: a few recent entries, the rest older."""
+    recent = max(1, int(config.entries * config.recent_fraction))
+    base = datetime.combine(config.today, datetime.min.time()) + timedelta(hours=9)
+    for i in range(config.entries):
+        if i < recent:
+            yield base - timedelta(days=i % 2, minutes=i)
+        else:
+            yield base - timedelta(days=2 + (i - recent) // 5, minutes=i)
+
+def nature_feed(config: FeedServerConfig, n: int) -> str:
+    items = []
+    for i, published in enumerate(_entry_dates(config, n)):
+        doi = f"10.1038/s41586-{published:%y}-{n:04d}{i:04d}-x"
+        url = f"https://www.nature.com/articles/s41586-{n}-{i}"
+        items.append(
+            f'<item rdf:about="{url}"><title><![CDATA[Synthetic Nature paper {n}-{i} on gene editing]]></title>'
+            f'<link>{url}</link>'
+            f'<content:encoded><![CDATA[<p>Nature, Published online: {published:%d %B %Y}; '
+            f'<a href="https://doi.org/{doi}">doi:{doi}</a></p>Abstract of paper {i} about protein engineering.]]>'
+            f'</content:encoded><dc:title>Synthetic paper {n}-{i}</dc:title>'
+            f'<dc:identifier>doi:{doi}</dc:identifier><dc:date>{published:%Y-%m-%d}</dc:date>'
+            f'<prism:doi>{doi}</prism:doi><prism:url>{url}</prism:url></item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f'<channel rdf:about="https://www.nature.com/feed{n}"><title>Nature synthetic {n}</title></channel>'
+        f'{"".join(items)}</rdf:RDF>'
+    )
+
+def cell_feed(config: FeedServerConfig, n: int) -> str:
+    items = []
+    for i, published in enumerate(_entry_dates(config, n)):
+        doi = f"10.1016/j.cell.{published:%Y}.{n:03d}.{i:04d}"
+        items.append(
+            f'<item><title>Synthetic Cell paper {n}-{i} on cell therapy</title>'
+            f'<link>https://www.cell.com/cell/fulltext/S0092-8674({n})-{i}</link>'
+            f'<guid isPermaLink="false">https://doi.org/{doi}</guid>'
+            f'<pubDate>{format_datetime(published)}</pubDate>'
+            f'<description>Abstract of paper {i} about synthetic biology.</description></item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f'<title>Cell synthetic {n}</title>{"".join(items)}</channel></rss>'
+    )
+
+def plos_feed(config: FeedServerConfig, n: int) -> str:
+    entries = []
+    for i, published in enumerate(_entry_dates(config, n)):
+        doi = f"10.1371/journal.pbio.{n:03d}{i:04d}"
+        entries.append(
+            f'<entry><title>Synthetic PLOS paper {n}-{i} on drug discovery</title>'
+            f'<id>info:doi/{doi}</id>'
+            f'<link rel="alternate" href="https://journals.plos.org/plosbiology/article?id={doi}"/>'
+            f'<published>{published:%Y-%m-%dT%H:%M:%SZ}</published>'
+            f'<updated>{published:%Y-%m-%dT%H:%M:%SZ}</updated>'
+            f'<summary>Abstract of paper {i} about antibiotic resistance.</summary></entry>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>PLOS synthetic {n}</title>{"".join(entries)}</feed>'
+    )
+
+GENERATORS = {'nature': nature_feed, 'cell': cell_feed, 'plos': plos_feed}
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (streaming parser cutoff) reset the connection
+        pass
+
+class SyntheticFeedServer:
+    """Threaded HTTP server for generated feeds, usable as a context manager."""
+
+    def __init__(self, config: FeedServerConfig = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or FeedServerConfig()
+        self.requests = 0
+        self.not_modified = 0
+        self._bodies: Dict[Tuple[str, int], Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._last_modified = format_datetime(
+            datetime.combine(self.config.today, datetime.min.time()).astimezone(), usegmt=True
+        )
+        self.httpd = _QuietHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, kind: str, n: int) -> str:
+        return f"{self.base_url}/{kind}/{n}"
+
+    def body(self, kind: str, n: int) -> Tuple[bytes, str]:
+        """Generated body and ETag for a feed, built once."""
+        key = (kind, n)
+        with self._lock:
+            if key not in self._bodies:
+                body = GENERATORS[kind](self.config, n).encode('utf-8')
+                self._bodies[key] = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+            return self._bodies[key]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    delay = server.config.latency * server._random.uniform(0.5, 1.5)
+                    failed = server._random.random() < server.config.error_rate
+                if delay:
+                    time.sleep(delay)
+
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 2 or parts[0] not in GENERATORS or not parts[1].isdigit():
+                    return self._reply(404, b'not found')
+                if failed:
+                    return self._reply(503, b'unavailable', {'Retry-After': '0'})
+
+                body, etag = server.body(parts[0], int(parts[1]))
+                if server.config.support_304 and self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    return self._reply(304, b'', {'ETag': etag})
+                self._reply(200, body, {
+                    'Content-Type': 'application/xml; charset=utf-8',
+                    'ETag': etag,
+                    'Last-Modified': server._last_modified,
+                })
+
+            def _reply(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'SyntheticFeedServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--entries', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--no-304', action='store_true')
+    args = parser.parse_args()
+
+    config = FeedServerConfig(entries=args.entries, latency=args.latency,
+                              error_rate=args.error_rate, support_304=not args.no_304)
+    server = SyntheticFeedServer(config, args.host, args.port)
+    print(f"Serving synthetic feeds at {server.base_url}/{{{','.join(KINDS)}}}/<n>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
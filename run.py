@@ -1,15 +1,23 @@
+import argparse
 import logging
 import webbrowser
-from datetime import datetime
+from datetime import date, datetime
 import os
 from app.fetcher import fetch_today_articles
+from app.dedup import deduplicate_papers
+from app.abstracts import prepare_abstracts
 from app.summarizer import summarize_papers
-from app.ranker import rank_papers
-from app.renderer import render_digest
+from app.seen_store import SeenStore
+from app.lexical import lexical_rank
+from app.ranker import load_preferences, rank_papers
+from app.renderer import write_digest
+from app.models import save_papers
+from app.manifest import digest_entry
+from app.site import update_site
+from app.site_builder import SiteBuilder
+from app.search_index import update_search
 from app.github_uploader import push_to_github
 from app.config import Config
-import glob
-from bs4 import BeautifulSoup
 
 # Configure logging
 logging.basicConfig(
@@ -18,100 +26,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def update_index_html():
-    """Update the index.html file with the latest digests."""
-    try:
-        # Get all digest files sorted by date (newest first)
-        digest_files = sorted(glob.glob('digests/*.html'), reverse=True)
-        
-        # Read the current index.html
-        with open('index.html', 'r') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-        
-        # Find the digest list
-        digest_list = soup.find('ul', class_='digest-list')
-        if not digest_list:
-            logger.error("Could not find digest list in index.html")
-            return False
-        
-        # Clear existing items
-        digest_list.clear()
-        
-        # Add new items
-        for digest_file in digest_files[:5]:  # Show only the 5 most recent digests
-            date_str = os.path.basename(digest_file).replace('.html', '')
-            try:
-                date = datetime.strptime(date_str, '%Y-%m-%d')
-                formatted_date = date.strftime('%B %d, %Y')
-            except ValueError:
-                formatted_date = date_str
-            
-            li = soup.new_tag('li')
-            a = soup.new_tag('a', href=digest_file)
-            a.string = f"{formatted_date} Digest"
-            li.append(a)
-            digest_list.append(li)
-        
-        # Write the updated index.html
-        with open('index.html', 'w') as f:
-            f.write(str(soup))
-        
-        logger.info("Successfully updated index.html with latest digests")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error updating index.html: {str(e)}")
-        return False
+def summarize(papers, offline: bool = False):
+    """
+    Generate summaries, reusing those from earlier runs.
+    Offline, summaries are built locally and no persistent store is touched.
+    """
+    if offline:
+        summarize_papers(papers, mode="local", use_cache=False)
+    elif Config.SEEN_STORE_ENABLED:
+        with SeenStore() as seen:
+            pending = seen.apply(papers)
+            summarize_papers(pending)
+            seen.record(pending)
+    else:
+        summarize_papers(papers)
+
+def rank(papers, offline: bool = False):
+    """Rank papers; offline, with the local lexical ranker and no score or embedding stores."""
+    if offline:
+        return lexical_rank(papers, load_preferences())
+    return rank_papers(papers)
 
-def main():
-    """Main orchestration function."""
+def main(force_refresh: bool = False, replay: date = None):
+    """
+    Main orchestration function.
+    With a replay date, the digest for that day is rebuilt offline from the
+    raw feed archive and saved under digests/replay/ without publishing. Replay
+    makes no API calls: papers are summarized locally and ranked lexically.
+    """
     try:
         # Get today's date
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = (replay or datetime.now()).strftime('%Y-%m-%d')
         logger.info(f"Starting digest generation for {today}")
 
         # Fetch articles
-        papers = fetch_today_articles()
+        papers = fetch_today_articles(force_refresh=force_refresh, replay=replay)
         if not papers:
             logger.error("No papers fetched, exiting")
             return
 
-        # Generate summaries
-        papers = summarize_papers(papers)
-        logger.info(f"Generated summaries for {len(papers)} papers")
+        # Merge papers carried by more than one feed
+        papers = deduplicate_papers(papers)
 
-        # Rank papers
-        papers = rank_papers(papers)
-        logger.info("Ranked papers based on preferences")
+        # Strip markup and boilerplate from abstracts and trim them to the token budget
+        prepare_abstracts(papers)
 
-        # Generate HTML
-        html = render_digest(today, papers)
-        if not html:
-            logger.error("Failed to generate HTML")
-            return
+        collapse_after = None
+        if Config.PIPELINE_MODE == "rank_first":
+            # Rank on titles and abstracts, then summarize only the papers shown in full
+            papers = rank(papers, offline=bool(replay))
+            logger.info("Ranked papers based on preferences")
+            top_k = Config.SUMMARY_TOP_K
+            summarize(papers[:top_k], offline=bool(replay))
+            if Config.SUMMARY_REST == "local" and papers[top_k:]:
+                summarize_papers(papers[top_k:], mode="local")
+            else:
+                collapse_after = top_k
+            logger.info(f"Generated summaries for the top {min(top_k, len(papers))} of {len(papers)} papers")
+        else:
+            # SUMMARY_LLM_TOP_N sends only the first papers to the LLM: put the most relevant first
+            summarize(lexical_rank(papers, load_preferences()) if Config.SUMMARY_LLM_TOP_N else papers,
+                      offline=bool(replay))
+            logger.info(f"Generated summaries for {len(papers)} papers")
 
-        # Create digests directory if it doesn't exist
-        os.makedirs('digests', exist_ok=True)
+            # Rank papers
+            papers = rank(papers, offline=bool(replay))
+            logger.info("Ranked papers based on preferences")
 
-        # Save locally
+        if replay:
+            local_path = f"digests/replay/{today}.html"
+            if not write_digest(local_path, today, papers, collapse_after=collapse_after):
+                logger.error("Failed to generate HTML")
+                return
+            save_papers(local_path.replace('.html', '.json'), papers)
+            logger.info(f"Saved replayed digest to {local_path}")
+            return
+
+        # Generate HTML, streamed straight to the local copy
         local_path = f"digests/{today}.html"
-        with open(local_path, 'w') as f:
-            f.write(html)
+        if not write_digest(local_path, today, papers, collapse_after=collapse_after):
+            logger.error("Failed to generate HTML")
+            return
+        # Keep the ranked papers so the digest can be re-ranked later (python -m app.rerank)
+        save_papers(f"digests/{today}.json", papers)
         logger.info(f"Saved digest to {local_path}")
 
-        # Update index.html
-        if update_index_html():
+        # Record the digest in the manifest and update index.html and the archive
+        if update_site(digest_entry(today, papers)):
             logger.info("Successfully updated index.html")
         else:
             logger.error("Failed to update index.html")
 
         # Push to GitHub
         github_path = Config.DIGEST_PATH_FMT.format(date=today)
+        with open(local_path) as f:
+            html = f.read()
         if push_to_github(github_path, html):
             logger.info(f"Successfully pushed to GitHub: {github_path}")
         else:
             logger.error("Failed to push to GitHub")
 
+        # Rebuild the per-journal and per-topic pages this digest touches
+        try:
+            logger.info(str(SiteBuilder().build()))
+        except Exception as e:
+            logger.error(f"Failed to build journal and topic pages: {str(e)}")
+
+        # Add the digest to the client-side search index
+        try:
+            logger.info(str(update_search()))
+        except Exception as e:
+            logger.error(f"Failed to update the search index: {str(e)}")
+
         # Open in browser
         webbrowser.open(f'file://{os.path.abspath(local_path)}')
         logger.info("Opened digest in browser")
@@ -120,4 +146,10 @@ def main():
         logger.error(f"Error in main process: {str(e)}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate today's paper digest.")
+    parser.add_argument('--force-refresh', action='store_true',
+                        help="Poll every feed, ignoring the learned update cadence")
+    parser.add_argument('--replay', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help="Rebuild that day's digest from the raw feed archive, without network or API access")
+    args = parser.parse_args()
+    main(force_refresh=args.force_refresh, replay=args.replay) 
\ No newline at end of file
@@ -0,0 +1,14 @@
+import pytest
+from app.config import Config
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep persistent caches created during tests out of the working tree."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(cache_dir))
+    return cache_dir
+
+@pytest.fixture(autouse=True)
+def no_host_rate_limit(monkeypatch):
+    """Tests fetch stubbed feeds, so per-host rate limiting only slows them down."""
+    monkeypatch.setattr(Config, 'HOST_RATE_LIMIT', 0)
@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.abstracts import clean_abstract, prepare_abstracts, trim_to_tokens
+from app.models import Paper
+
+class WordEncoding:
+    """Stand-in tokenizer with one token per space-separated word."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split(' ')
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+@pytest.fixture
+def word_encoding():
+    with patch('app.abstracts.get_encoding', return_value=WordEncoding()):
+        yield
+
+def test_clean_nature_abstract():
+    """Test that markup, the Nature dateline and the repeated title are removed."""
+    raw = (
+        '<p>Nature, Published online: 15 May 2026; '
+        '<a href="https://www.nature.com/articles/s41586-026-00001-x">doi:10.1038/s41586-026-00001-x</a></p>'
+        'Base editing in vivo<figure><img src="fig1.png"/><figcaption>Figure 1</figcaption></figure>'
+        '<p>We show that   base editors &amp; guide RNAs correct a mutation.</p>'
+    )
+    assert clean_abstract(raw, "Base editing in vivo") == "We show that base editors & guide RNAs correct a mutation."
+
+def test_clean_elsevier_abstract():
+    """Test that Cell Press header lines are dropped."""
+    raw = (
+        "Publication date: Available online 14 May 2026<br/>Source: Cell<br/>"
+        "Author(s): A. Author, B. Author<br/>Cells divide. This article is protected by copyright. All rights reserved."
+    )
+    assert clean_abstract(raw) == "Cells divide."
+
+def test_trim_prefers_sentence_boundary(word_encoding):
+    """Test that trimming ends on a sentence when one is close to the budget."""
+    text = "One two three four. Five six seven eight nine ten."
+    assert trim_to_tokens(text, 6) == "One two three four."
+    assert trim_to_tokens(text, 20) == text
+
+def test_trim_falls_back_to_word_boundary(word_encoding):
+    """Test that text without a nearby sentence end is cut at a word and marked."""
+    assert trim_to_tokens("Short. " + "word " * 20, 10) == "Short. word word word word word word word word…"
+
+@patch('app.abstracts.get_encoding', return_value=None)
+def test_prepare_abstracts_records_token_counts(mock_encoding):
+    """Test that token counts before and after cleaning are recorded per paper."""
+    paper = Paper(
+        title="Test Paper",
+        doi="10.1234/test",
+        link="https://nature.com/test",
+        abstract="<p>" + "Sentence about proteins. " * 200 + "</p>",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+
+    prepare_abstracts([paper], max_tokens=100)
+
+    assert paper.abstract_tokens_raw > paper.abstract_tokens
+    assert paper.abstract_tokens <= 100
+    assert "<p>" not in paper.abstract
+    assert paper.abstract.endswith("proteins.")
@@ -0,0 +1,108 @@
+import pytest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+from app.archive import ArchivingSession, FeedArchive, ReplaySession
+from app.fetcher import fetch_today_articles
+
+URL = "https://www.nature.com/nbt/current_issue/rss"
+
+def rss(title, day):
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>NBT</title>'
+        f'<item><title>{title}</title><guid>https://doi.org/10.1038/s41587-026-{day:05d}-x</guid>'
+        f'<link>https://www.nature.com/articles/{day}</link>'
+        f'<pubDate>{day} Oct 2026 10:00:00 GMT</pubDate></item></channel></rss>'
+    ).encode()
+
+@pytest.fixture
+def archive(tmp_path):
+    with FeedArchive(str(tmp_path / 'archive')) as archive:
+        yield archive
+
+def test_store_deduplicates_bodies(archive):
+    """Test that identical bodies are stored once but every fetch is recorded."""
+    body = rss("Paper", 15) * 50
+    digest = archive.store(URL, body, fetched_at=1.0)
+    assert archive.store(URL, body, fetched_at=2.0) == digest
+    stats = archive.stats()
+    assert stats['fetches'] == 2
+    assert stats['objects'] == 1
+    assert stats['stored_bytes'] < len(body)
+    assert archive.read(digest) == body
+
+def test_iter_body_streams_chunks(archive):
+    """Test that bodies can be decompressed incrementally."""
+    body = b''.join(rss(f"Paper {i}", 15) for i in range(500))
+    digest = archive.store(URL, body)
+    chunks = list(archive.iter_body(digest, chunk_size=1024))
+    assert len(chunks) > 1
+    assert b''.join(chunks) == body
+
+def test_lookup_as_of(archive):
+    """Test that replay picks the latest fetch at or before the requested time."""
+    archive.store(URL, rss("Old", 14), fetched_at=datetime(2026, 10, 14, 8).timestamp())
+    archive.store(URL, rss("New", 15), fetched_at=datetime(2026, 10, 15, 8).timestamp())
+    fetch = archive.lookup(URL, as_of=datetime(2026, 10, 14, 23, 59))
+    assert archive.read(fetch.digest) == rss("Old", 14)
+    assert archive.lookup(URL, as_of=datetime(2026, 10, 1)) is None
+
+def test_lookup_prefers_complete_fetch(archive):
+    """Test that a newer partial body only wins when no complete fetch exists."""
+    archive.store(URL, rss("Partial", 13)[:40], fetched_at=datetime(2026, 10, 13, 8).timestamp(), partial=True)
+    fetch = archive.lookup(URL, as_of=datetime(2026, 10, 13, 23, 59))
+    assert fetch.partial
+    archive.store(URL, rss("Complete", 14), fetched_at=datetime(2026, 10, 14, 8).timestamp())
+    archive.store(URL, rss("Cut off", 15)[:40], fetched_at=datetime(2026, 10, 15, 8).timestamp(), partial=True)
+    fetch = archive.lookup(URL, as_of=datetime(2026, 10, 15, 23, 59))
+    assert not fetch.partial
+    assert archive.read(fetch.digest) == rss("Complete", 14)
+
+def test_archiving_session_records_bodies(archive):
+    """Test that fetched bodies are archived, including streamed ones."""
+    response = MagicMock(status_code=200, content=b'<rss/>')
+    response.iter_content = lambda chunk_size=1, decode_unicode=False: iter([b'<rss>', b'</rss>'])
+    with patch('requests.Session.get', return_value=response):
+        session = ArchivingSession(archive)
+        session.get(URL)
+        streamed = session.get(URL + "?stream", stream=True)
+        assert b''.join(streamed.iter_content(1024)) == b'<rss></rss>'
+    assert archive.read(archive.lookup(URL).digest) == b'<rss/>'
+    assert archive.read(archive.lookup(URL + "?stream").digest) == b'<rss></rss>'
+
+def test_replay_session_missing_feed(archive):
+    """Test that feeds absent from the archive look like a 404."""
+    response = ReplaySession(archive).get(URL)
+    assert response.status_code == 404
+
+def test_fetch_today_articles_replay():
+    """Test that replay parses archived bodies as of the replayed day."""
+    with FeedArchive() as archive:
+        archive.store(URL, rss("Replayed paper", 15), fetched_at=datetime(2026, 10, 15, 8).timestamp())
+        archive.store(URL, rss("Later paper", 16), fetched_at=datetime(2026, 10, 16, 8).timestamp())
+
+    with patch('app.fetcher.Config.RSS_FEEDS', {"Nature Biotechnology": URL}), \
+         patch('app.fetcher.create_session', side_effect=AssertionError("network used")):
+        papers = fetch_today_articles(replay=date(2026, 10, 15))
+
+    assert [p.title for p in papers] == ["Replayed paper"]
+    assert papers[0].doi == "10.1038/s41587-026-00015-x"
+
+def test_replay_makes_no_api_calls(tmp_path, monkeypatch):
+    """Test that a replayed digest is summarized and ranked without OpenAI or the persistent stores."""
+    import run
+    with FeedArchive() as archive:
+        archive.store(URL, rss("Replayed paper", 15), fetched_at=datetime(2026, 10, 15, 8).timestamp())
+    monkeypatch.chdir(tmp_path)
+
+    offline = AssertionError("API or store used")
+    with patch('app.fetcher.Config.RSS_FEEDS', {"Nature Biotechnology": URL}), \
+         patch('app.fetcher.create_session', side_effect=offline), \
+         patch('app.summarizer.OpenAI', side_effect=offline), \
+         patch('app.ranker.OpenAI', side_effect=offline), \
+         patch('run.SeenStore', side_effect=offline), \
+         patch('run.Config.RANKER', "llm"), \
+         patch('run.Config.SEEN_STORE_ENABLED', True):
+        run.main(replay=date(2026, 10, 15))
+
+    assert (tmp_path / 'digests' / 'replay' / '2026-10-15.html').exists()
+    assert "Replayed paper" in (tmp_path / 'digests' / 'replay' / '2026-10-15.json').read_text()
@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime
+from benchmarks.batch_server import LocalBatchServer, echo_summary
+from app.batch import BatchJobStore, BatchReport, run_batch
+from app.config import Config
+from app.models import Paper
+from app.summarizer import summarize_batch, summarize_papers
+
+@pytest.fixture
+def server(monkeypatch):
+    with LocalBatchServer(polls=1) as server:
+        monkeypatch.setattr(Config, 'OPENAI_BASE_URL', server.base_url)
+        monkeypatch.setattr(Config, 'BATCH_POLL_INTERVAL', 0)
+        yield server
+
+def make_papers(n: int):
+    return [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract=f"Test abstract {i}",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(n)
+    ]
+
+def test_summarize_papers_batch_mode(server):
+    """Batch results are mapped back onto the papers they were requested for."""
+    papers = summarize_papers(make_papers(3), mode="batch")
+
+    assert [paper.summary for paper in papers] == [f"Summary of Test Paper {i}." for i in range(3)]
+    assert all(paper.summary_status == "ok" for paper in papers)
+    assert len(server.batches) == 1
+    with BatchJobStore() as store:
+        assert [job.status for job in store.all()] == ["completed"]
+
+def test_batch_resumed_after_restart(server):
+    """A job still running when the wait runs out is resumed, not resubmitted, by the next run."""
+    server.polls = 3
+    papers = make_papers(2)
+
+    summarize_batch(papers, max_wait=0)
+    assert [paper.summary_status for paper in papers] == ["batch_pending"] * 2
+
+    summarize_batch(papers)
+    assert [paper.summary_status for paper in papers] == ["ok"] * 2
+    assert len(server.batches) == 1
+
+def test_new_papers_submitted_before_waiting_on_resumed_job(server):
+    """Papers not covered by a resumed job are submitted at once, even when the old job outlives the wait again."""
+    server.polls = 3
+    yesterday, today = make_papers(2), make_papers(4)[2:]
+
+    summarize_batch(yesterday, max_wait=0)
+    summarize_batch(today, max_wait=0)
+    assert len(server.batches) == 2
+    assert [paper.summary_status for paper in today] == ["batch_pending"] * 2
+
+    # Yesterday's results come back with today's job and are dropped
+    summarize_batch(today)
+    assert [paper.summary_status for paper in today] == ["ok"] * 2
+    assert len(server.batches) == 2
+    with BatchJobStore() as store:
+        assert [job.status for job in store.all()] == ["completed"] * 2
+
+def test_batch_failures_and_report(server):
+    """Failed requests are marked per paper and excluded from the cost report."""
+    server.respond = lambda body: None if "Paper 1" in body['messages'][-1]['content'] else echo_summary(body)
+    papers = make_papers(2)
+    bodies = {paper.doi: {"model": "test", "messages": [{"role": "user", "content": f"Title: {paper.title}"}]}
+              for paper in papers}
+
+    results, reports = run_batch(bodies, kind="test")
+    summarize_batch(papers)
+
+    assert [paper.summary_status for paper in papers] == ["ok", "batch_error"]
+    assert len(results) == 2
+    report = reports[0]
+    assert (report.requests, report.succeeded, report.failed) == (2, 1, 1)
+    assert report.prompt_tokens > 0
+    assert report.cost == pytest.approx(report.sync_cost * Config.BATCH_DISCOUNT)
+
+def test_report_cost():
+    """Costs use the configured per-million-token prices."""
+    report = BatchReport("batch-1", requests=1, prompt_tokens=1_000_000, completion_tokens=1_000_000)
+    assert report.sync_cost == pytest.approx(Config.OPENAI_INPUT_PRICE + Config.OPENAI_OUTPUT_PRICE)
@@ -0,0 +1,61 @@
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from app.cadence import DAY, CadenceModel
+from app.fetcher import fetch_today_articles
+
+URL = "https://www.nature.com/nrd/current_issue/rss"
+
+@pytest.fixture
+def model(tmp_path):
+    with CadenceModel(str(tmp_path / 'cadence.sqlite3')) as model:
+        yield model
+
+def _weekly_history(model, weeks=4, start=datetime(2026, 9, 1)):
+    for week in range(weeks):
+        published = start + timedelta(weeks=week)
+        model.record_poll(URL, published, now=published.timestamp() + 3600)
+    return start + timedelta(weeks=weeks - 1)
+
+def test_new_feed_is_due(model):
+    """Test that feeds without history are always polled."""
+    assert model.is_due(URL)
+
+def test_weekly_feed_skipped_until_expected(model):
+    """Test that a weekly feed is skipped shortly after an update."""
+    last = _weekly_history(model)
+    assert model.get(URL).mean_interval == pytest.approx(7 * DAY)
+    assert not model.is_due(URL, now=(last + timedelta(days=2)).timestamp())
+    assert model.is_due(URL, now=(last + timedelta(days=6)).timestamp())
+
+def test_polls_without_new_entries_do_not_change_cadence(model):
+    """Test that empty polls only update the poll time."""
+    last = _weekly_history(model)
+    model.record_poll(URL, None, now=(last + timedelta(days=1)).timestamp())
+    cadence = model.get(URL)
+    assert cadence.changes == 4
+    assert cadence.last_change == last.timestamp()
+
+def test_window_covers_skipped_days(model):
+    """Test that entries published while a feed was skipped are still accepted."""
+    model.record_poll(URL, None, now=datetime(2026, 10, 10, 12).timestamp())
+    days = (date(2026, 10, 15), date(2026, 10, 14))
+    window = model.window(URL, days)
+    assert set(window) == {date(2026, 10, d) for d in range(10, 16)}
+
+def test_fetch_skips_feeds_not_due(model):
+    """Test that fetch_today_articles only requests due feeds unless forced."""
+    feeds = {"Nature Reviews Drug Discovery": URL, "Cell": "https://www.cell.com/cell/current.rss"}
+    with CadenceModel() as shared:
+        now = datetime.now()
+        for week in range(3, -1, -1):
+            shared.record_poll(URL, now - timedelta(weeks=week), now=(now - timedelta(weeks=week)).timestamp())
+
+    with patch('app.fetcher.Config.RSS_FEEDS', feeds), \
+         patch('app.fetcher.download_feed', return_value=None) as mock_download:
+        fetch_today_articles()
+        assert [call.args[1] for call in mock_download.call_args_list] == ["https://www.cell.com/cell/current.rss"]
+
+        mock_download.reset_mock()
+        fetch_today_articles(force_refresh=True)
+        assert mock_download.call_count == 2
@@ -0,0 +1,86 @@
+from datetime import datetime
+from app.dedup import MinHashLSH, deduplicate_papers, jaccard, split_notice, title_shingles
+from app.models import Paper, normalize_doi
+
+def _paper(title, doi, journal="Nature", abstract="Abstract"):
+    return Paper(
+        title=title,
+        doi=doi,
+        link="https://example.org/" + doi,
+        abstract=abstract,
+        journal=journal,
+        published_date=datetime.now()
+    )
+
+def test_normalize_doi_strips_url_suffix():
+    """Test that publisher path segments after the DOI are ignored."""
+    assert normalize_doi("10.1016/j.cell.2026.01.001/fulltext") == "10.1016/j.cell.2026.01.001"
+    assert normalize_doi("10.1038/s41586-026-00001-x/figures/2") == "10.1038/s41586-026-00001-x"
+
+def test_exact_doi_duplicates_merged():
+    """Test that the same DOI from two feeds becomes one paper."""
+    papers = [
+        _paper("Base editing corrects a metabolic disease", "10.1038/s41586-026-1", "Nature"),
+        _paper("Other paper about protein design", "10.1038/s41587-026-2", "Nature Biotechnology"),
+        _paper("Base editing corrects a metabolic disease", "10.1038/S41586-026-1.", "Nature Medicine",
+               abstract="A much longer abstract"),
+    ]
+    result = deduplicate_papers(papers)
+    assert len(result) == 2
+    assert result[0].also_in == ["Nature Medicine"]
+    assert result[0].abstract == "A much longer abstract"
+
+def test_near_duplicate_titles_merged():
+    """Test that near-identical titles with different DOIs are merged."""
+    papers = [
+        _paper("A single-cell atlas of the developing human heart", "10.1038/s41586-026-1", "Nature"),
+        _paper("A single-cell atlas of the developing human heart.", "10.1126/science.abc123", "Science"),
+        _paper("A single-cell atlas of the adult mouse kidney", "10.1016/j.cell.2026.1", "Cell"),
+    ]
+    result = deduplicate_papers(papers)
+    assert [p.journal for p in result] == ["Nature", "Cell"]
+    assert result[0].also_in == ["Science"]
+
+def test_short_titles_not_merged_by_similarity():
+    """Test that generic short titles with different DOIs are kept apart."""
+    papers = [
+        _paper("Research highlights", "10.1038/d41586-026-1"),
+        _paper("Research highlights", "10.1038/d41586-026-2"),
+    ]
+    assert len(deduplicate_papers(papers)) == 2
+
+def test_notices_not_merged_into_their_paper():
+    """Test that corrections and retractions stay apart from the paper they concern."""
+    title = "Loss of a conserved enhancer disrupts limb development in mice and humans"
+    papers = [
+        _paper(title, "10.1172/JCI1", "JCI"),
+        _paper(f"Author Correction: {title}", "10.1038/s41586-025-0001", "Nature"),
+        _paper(f"Retraction Note: {title}", "10.1038/s41586-025-0002", "Nature"),
+        _paper(f"Author Correction: {title}.", "10.1038/s41586-025-0003", "Nature Genetics"),
+    ]
+    assert split_notice(papers[2].title) == ("retraction", title)
+    result = deduplicate_papers(papers)
+    assert [p.doi for p in result] == ["10.1172/JCI1", "10.1038/s41586-025-0001", "10.1038/s41586-025-0002"]
+    assert result[0].also_in == []
+    assert result[1].also_in == ["Nature Genetics"]
+
+def test_non_ascii_titles():
+    """Test that non-Latin titles are compared by their own characters and never abort deduplication."""
+    papers = [
+        _paper("Μια νέα μέθοδος για την ανάλυση πρωτεϊνών", "10.1000/el-1"),
+        _paper("Μια νέα μέθοδος για την ανάλυση πρωτεϊνών.", "10.1000/el-2"),
+        _paper("— · — · — · —", "10.1000/dash-1"),
+    ]
+    assert title_shingles(papers[0].title)
+    assert title_shingles(papers[2].title) == frozenset()
+    result = deduplicate_papers(papers)
+    assert [p.doi for p in result] == ["10.1000/el-1", "10.1000/dash-1"]
+
+def test_minhash_estimates_similarity():
+    """Test that similar shingle sets collide in at least one LSH band."""
+    lsh = MinHashLSH(num_perm=64, bands=16)
+    a = title_shingles("CRISPR screens reveal regulators of T cell exhaustion")
+    b = title_shingles("CRISPR screens reveal regulators of T-cell exhaustion")
+    assert jaccard(a, b) > 0.8
+    lsh.insert(0, lsh.signature(a))
+    assert lsh.query(lsh.signature(b)) == [0]
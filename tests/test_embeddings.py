@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from app.embeddings import EmbeddingStore, HashingEmbedder, OpenAIEmbedder, embedding_rank
+from app.models import Paper
+
+def _paper(title, doi):
+    return Paper(
+        title=title,
+        doi=doi,
+        link="https://example.org/" + doi,
+        abstract="An abstract.",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+
+def test_store_append_reopen_and_compact(tmp_path):
+    """Test that vectors survive reopening and compaction drops superseded rows."""
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        store.append(["a", "b"], np.eye(4, dtype=np.float32)[:2])
+        store.append(["a"], np.full((1, 4), 0.5, dtype=np.float32))
+        assert (store.rows, store.count()) == (3, 2)
+
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        vectors, found = store.get(["a", "missing", "b"])
+        assert found.tolist() == [True, False, True]
+        assert vectors[0].tolist() == [0.5] * 4
+        assert vectors[2].tolist() == [0, 1, 0, 0]
+
+        assert store.compact() == 1
+        assert store.rows == 2
+        vectors, _ = store.get(["a", "b"])
+        assert vectors.tolist() == [[0.5] * 4, [0, 1, 0, 0]]
+
+def test_compact_switches_files_with_the_index(tmp_path):
+    """Test that compaction keeps the old vector file until the index points at the new one."""
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        store.append(["a", "b"], np.eye(4, dtype=np.float32)[:2])
+        store.append(["a"], np.full((1, 4), 0.5, dtype=np.float32))
+        old_path = store.vectors_path
+        store.compact()
+        assert store.vectors_path != old_path
+        assert not os.path.exists(old_path)
+        # A file written by a compaction that never committed is discarded on reopen
+        stray = os.path.join(store.root, 'vectors-9.f32')
+        with open(stray, 'wb') as f:
+            f.write(b'\0' * 32)
+
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        assert not os.path.exists(stray)
+        vectors, found = store.get(["a", "b"])
+        assert found.all()
+        assert vectors.tolist() == [[0.5] * 4, [0, 1, 0, 0]]
+
+def test_store_recovers_from_partial_write(tmp_path):
+    """Test that a partly written row is dropped, so later vectors are found at their recorded rows."""
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        store.append(["a"], np.eye(4, dtype=np.float32)[:1])
+        with open(store.vectors_path, 'ab') as f:
+            f.write(b'\0' * 6)
+        store.append(["b"], np.full((1, 4), 0.5, dtype=np.float32))
+        vectors, found = store.get(["a", "b"])
+        assert found.all()
+        assert vectors.tolist() == [[1, 0, 0, 0], [0.5] * 4]
+
+    with open(store.vectors_path, 'ab') as f:
+        f.write(b'\0' * 6)
+    with EmbeddingStore("test-model", 4, root=str(tmp_path)) as store:
+        assert store.rows == 2
+        assert os.path.getsize(store.vectors_path) == 2 * 4 * 4
+
+def test_store_rejects_other_dimension(tmp_path):
+    """Test that a store cannot be reopened with a different vector size."""
+    EmbeddingStore("test-model", 4, root=str(tmp_path)).close()
+    with pytest.raises(ValueError):
+        EmbeddingStore("test-model", 8, root=str(tmp_path))
+
+def test_embedding_rank_reuses_stored_vectors(tmp_path):
+    """Test ranking by topic similarity, embedding each paper and topic only once."""
+    embedder = HashingEmbedder()
+    embedder.embed = MagicMock(side_effect=embedder.embed)
+    papers = [
+        _paper("Ocean currents and climate", "10.1234/ocean"),
+        _paper("Gene editing with base editors", "10.1234/gene"),
+    ]
+    preferences = {"gene editing": 9, "cell therapy": 5}
+
+    with EmbeddingStore(embedder.name, embedder.dim, root=str(tmp_path)) as store:
+        assert embedding_rank(papers, preferences, embedder, store) == [papers[1], papers[0]]
+        assert embedding_rank(papers, preferences, embedder, store) == [papers[1], papers[0]]
+        assert store.count() == 4
+    assert embedder.embed.call_count == 2  # papers and topics, on the first call only
+
+def test_openai_embedder_batches_requests():
+    """Test that the API embedder batches texts and normalizes the vectors."""
+    client = MagicMock()
+    client.embeddings.create.side_effect = lambda model, input, dimensions: MagicMock(
+        data=[MagicMock(embedding=[3.0, 4.0]) for _ in input]
+    )
+    embedder = OpenAIEmbedder(model="test-embedding", dim=2, client=client, batch_size=2)
+
+    vectors = embedder.embed(["a", "b", "c"])
+
+    assert vectors.shape == (3, 2)
+    assert np.allclose(vectors[0], [0.6, 0.8])
+    assert client.embeddings.create.call_count == 2
@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import MagicMock
+from app.feed_cache import FeedCache
+from app.fetcher import download_feed
+
+FEED_URL = "https://nature.com/rss"
+
+@pytest.fixture
+def cache(tmp_path):
+    with FeedCache(str(tmp_path / 'feeds.sqlite3'), max_entries=3) as cache:
+        yield cache
+
+def _response(status_code=200, content=b'<rss/>', headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = content
+    response.headers = headers or {}
+    return response
+
+def test_conditional_headers(cache):
+    """Test that stored validators become conditional request headers."""
+    assert cache.conditional_headers(FEED_URL) == {}
+    cache.store(FEED_URL, etag='"abc"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT', body_hash='h')
+    assert cache.conditional_headers(FEED_URL) == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+
+def test_size_limit(cache):
+    """Test that the oldest entries are evicted beyond the size limit."""
+    for i in range(5):
+        cache.store(f"https://example.org/{i}", None, None, str(i))
+    assert cache.count() == 3
+    assert cache.get("https://example.org/0") is None
+    assert cache.get("https://example.org/4") is not None
+
+def test_invalidate(cache):
+    """Test invalidating a single feed and the whole cache."""
+    cache.store(FEED_URL, None, None, 'a')
+    cache.store("https://example.org/other", None, None, 'b')
+    assert cache.invalidate(FEED_URL) == 1
+    assert cache.get(FEED_URL) is None
+    assert cache.invalidate() == 1
+    assert cache.count() == 0
+
+def test_download_feed_not_modified(cache):
+    """Test that a 304 response skips the feed."""
+    session = MagicMock()
+    session.get.return_value = _response(headers={'ETag': '"v1"'})
+    assert download_feed(session, FEED_URL, cache=cache) == b'<rss/>'
+
+    session.get.return_value = _response(status_code=304)
+    assert download_feed(session, FEED_URL, cache=cache) is None
+    assert session.get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+
+def test_download_feed_identical_body(cache):
+    """Test that an unchanged body is skipped even without validators."""
+    session = MagicMock()
+    session.get.return_value = _response()
+    assert download_feed(session, FEED_URL, cache=cache) == b'<rss/>'
+    assert download_feed(session, FEED_URL, cache=cache) is None
+
+    session.get.return_value = _response(content=b'<rss>new</rss>')
+    assert download_feed(session, FEED_URL, cache=cache) == b'<rss>new</rss>'
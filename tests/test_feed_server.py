@@ -0,0 +1,35 @@
+import pytest
+from unittest.mock import patch
+from benchmarks.feed_server import KINDS, FeedServerConfig, SyntheticFeedServer
+from app.fetcher import fetch_today_articles
+
+@pytest.fixture
+def server():
+    with SyntheticFeedServer(FeedServerConfig(entries=20, recent_fraction=0.2)) as server:
+        yield server
+
+def _feeds(server):
+    return {f"{kind} {n}": server.url(kind, n) for n in range(2) for kind in KINDS}
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_fetch_against_local_server(server, streaming):
+    """Test an end-to-end fetch of all synthetic feed formats."""
+    with patch('app.fetcher.Config.RSS_FEEDS', _feeds(server)), \
+         patch('app.fetcher.Config.FETCH_STREAMING', streaming):
+        papers = fetch_today_articles(use_cache=False)
+
+    # 4 of 20 entries per feed are dated today or yesterday
+    assert len(papers) == 6 * 4
+    assert {p.journal for p in papers} == set(_feeds(server))
+    assert not any(p.doi.startswith('10.placeholder') for p in papers)
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_conditional_requests_against_local_server(server, streaming):
+    """Test that a second run is answered with 304s and still yields the day's papers."""
+    with patch('app.fetcher.Config.RSS_FEEDS', _feeds(server)), \
+         patch('app.fetcher.Config.FETCH_STREAMING', streaming):
+        first = fetch_today_articles(force_refresh=True)
+        second = fetch_today_articles(force_refresh=True)
+    assert server.not_modified == 6
+    assert len(first) == 6 * 4
+    assert [(p.journal, p.doi, p.title) for p in second] == [(p.journal, p.doi, p.title) for p in first]
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 from app.fetcher import fetch_today_articles, parse_date, extract_doi
 from app.models import Paper
+from feedparser import FeedParserDict as feedparser_dict
 
 def test_paper_creation():
     """Test that Paper objects are created with correct attributes."""
@@ -114,8 +115,9 @@ def test_extract_doi():
         else:
             assert doi == test_case['expected']
 
+@patch('app.fetcher.download_feed', return_value=b'')
 @patch('app.fetcher.feedparser.parse')
-def test_fetch_today_articles_empty_feed(mock_parse):
+def test_fetch_today_articles_empty_feed(mock_parse, mock_download):
     """Test handling of empty feed."""
     mock_parse.return_value.entries = []
     result = fetch_today_articles()
@@ -152,6 +154,7 @@ def test_fetch_today_articles_with_valid_entry(mock_parse):
     mock_parsed_date = datetime(2024, 3, 15, 12, 0, 0)
     with patch('app.fetcher.datetime') as mock_datetime, \
          patch('app.fetcher.Config.RSS_FEEDS', {"Nature": "https://nature.com/rss"}), \
+         patch('app.fetcher.download_feed', return_value=b''), \
          patch('app.fetcher.parse_date', return_value=mock_parsed_date):
         mock_datetime.now.return_value = mock_now
         result = fetch_today_articles()
@@ -161,8 +164,9 @@ def test_fetch_today_articles_with_valid_entry(mock_parse):
         assert result[0].title == "Test Paper"
         assert result[0].doi == "10.1234/test"
 
+@patch('app.fetcher.download_feed', return_value=b'')
 @patch('app.fetcher.feedparser.parse')
-def test_fetch_today_articles_with_old_entry(mock_parse):
+def test_fetch_today_articles_with_old_entry(mock_parse, mock_download):
     """Test that old entries are filtered out."""
     # Create mock entry with old date
     entry = MagicMock()
@@ -179,4 +183,56 @@ def test_fetch_today_articles_with_old_entry(mock_parse):
         mock_datetime.now.return_value = datetime(2024, 3, 15, 12, 0, 0)
         result = fetch_today_articles()
         
-        assert len(result) == 0 
\ No newline at end of file
+        assert len(result) == 0
+
+def _make_entry(title, doi):
+    """Build a feed entry dict as returned by feedparser."""
+    return {
+        'title': title,
+        'id': f"https://doi.org/{doi}",
+        'link': f"https://example.org/{title}",
+        'summary': f"Abstract of {title}",
+        'published_parsed': datetime.now().timetuple(),
+    }
+
+def test_fetch_today_articles_stable_order():
+    """Test that concurrent fetching preserves feed order."""
+    import time
+    feeds = {f"Journal {i}": f"https://example.org/feed{i}" for i in range(5)}
+    bodies = {url: journal for journal, url in feeds.items()}
+
+    def fake_download(session, url, timeout=None, cache=None):
+        # Later feeds answer first
+        time.sleep(0.01 * (5 - int(url[-1])))
+        return bodies[url]
+
+    def fake_parse(body):
+        feed = MagicMock()
+        feed.entries = [feedparser_dict(_make_entry(f"{body} paper", f"10.1234/{body[-1]}"))]
+        return feed
+
+    with patch('app.fetcher.Config.RSS_FEEDS', feeds), \
+         patch('app.fetcher.download_feed', side_effect=fake_download), \
+         patch('app.fetcher.feedparser.parse', side_effect=fake_parse):
+        result = fetch_today_articles(max_workers=5)
+
+    assert [p.journal for p in result] == list(feeds)
+
+def test_fetch_today_articles_feed_failure_isolated():
+    """Test that one failing feed does not affect the others."""
+    feeds = {"Good": "https://example.org/good", "Bad": "https://example.org/bad"}
+
+    def fake_download(session, url, timeout=None, cache=None):
+        if url.endswith('bad'):
+            raise ConnectionError("boom")
+        return b''
+
+    feed = MagicMock()
+    feed.entries = [feedparser_dict(_make_entry("Good paper", "10.1234/good"))]
+    with patch('app.fetcher.Config.RSS_FEEDS', feeds), \
+         patch('app.fetcher.download_feed', side_effect=fake_download), \
+         patch('app.fetcher.feedparser.parse', return_value=feed):
+        result = fetch_today_articles()
+
+    assert len(result) == 1
+    assert result[0].journal == "Good"
@@ -0,0 +1,44 @@
+from datetime import datetime
+from app.lexical import BM25Scorer, analyze, lexical_rank
+from app.models import Paper
+
+PREFERENCES = {"gene editing": 9, "cell therapy": 8, "biomaterials": 5}
+
+def _paper(title, abstract="An abstract."):
+    return Paper(
+        title=title,
+        doi="10.1234/" + title.replace(' ', '-').lower(),
+        link="https://example.org/paper",
+        abstract=abstract,
+        journal="Nature",
+        published_date=datetime.now()
+    )
+
+def test_analyze_folds_plurals_and_adds_bigrams():
+    """Test that terms are stemmed lightly and paired into bigrams."""
+    assert analyze("Cell therapies for the liver") == ["cell", "therapy", "liver", "cell therapy", "therapy liver"]
+
+def test_lexical_rank_orders_by_weighted_relevance():
+    """Test that papers matching heavier topics rank first and unmatched keep their order."""
+    papers = [
+        _paper("Galaxy formation in the early universe"),
+        _paper("Injectable biomaterials for wound healing"),
+        _paper("Ocean currents and climate"),
+        _paper("Base editing", "Gene editing with base editors corrects a liver disease."),
+        _paper("Engineered T cells", "A CAR-T cell therapy for solid tumours."),
+    ]
+    ranked = lexical_rank(papers, PREFERENCES)
+    assert [p.title for p in ranked] == [
+        "Base editing", "Engineered T cells", "Injectable biomaterials for wound healing",
+        "Galaxy formation in the early universe", "Ocean currents and climate",
+    ]
+
+def test_phrase_match_beats_scattered_terms():
+    """Test that the exact topic phrase scores above the same words apart."""
+    scorer = BM25Scorer({"gene editing": 1})
+    scores = scorer.topic_scores([
+        "editing of a text about one gene",
+        "gene editing in mice",
+        "unrelated",
+    ])
+    assert scores[1, 0] > scores[0, 0] > scores[2, 0] == 0
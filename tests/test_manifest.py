@@ -0,0 +1,43 @@
+from datetime import datetime
+from app.manifest import DigestEntry, DigestManifest, digest_entry, load_digest_papers, rebuild
+from app.models import Paper
+from app.renderer import render_digest
+
+def _papers():
+    return [
+        Paper(
+            title=f"Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Cell" if i == 1 else "Nature",
+            published_date=datetime.now(),
+            summary=f"Summary {i}"
+        ) for i in range(5)
+    ]
+
+def test_manifest_appends_and_replaces_by_date(tmp_path):
+    """Test that entries are appended per run and a later entry for the same date wins."""
+    path = str(tmp_path / "manifest.jsonl")
+    manifest = DigestManifest(path)
+    manifest.add(digest_entry("2026-04-30", _papers()))
+    manifest.add(DigestEntry(date="2026-05-01", papers=1))
+    manifest.add(DigestEntry(date="2026-05-01", papers=2))
+
+    reloaded = DigestManifest(path)
+    assert [entry.date for entry in reloaded.entries()] == ["2026-05-01", "2026-04-30"]
+    assert reloaded.get("2026-05-01").papers == 2
+    assert reloaded.get("2026-04-30").journals == ["Nature", "Cell"]
+    assert reloaded.get("2026-04-30").top_titles == ["Paper 0", "Paper 1", "Paper 2"]
+    assert reloaded.months() == ["2026-05", "2026-04"]
+
+def test_rebuild_from_rendered_digests(tmp_path):
+    """Test that digests without saved papers are recovered from their pages."""
+    (tmp_path / "2026-05-01.html").write_text(render_digest("2026-05-01", _papers()))
+    manifest = DigestManifest(str(tmp_path / "manifest.jsonl"))
+
+    assert rebuild(manifest, str(tmp_path)) == 1
+    assert DigestManifest(manifest.path).get("2026-05-01") == digest_entry("2026-05-01", _papers())
+    papers = load_digest_papers("2026-05-01", str(tmp_path))
+    assert [(p.title, p.journal, p.doi, p.summary) for p in papers] == \
+        [(p.title, p.journal, p.doi, p.summary) for p in _papers()]
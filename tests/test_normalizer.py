@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime
+from feedparser import FeedParserDict
+from app.fetcher import extract_doi, parse_date
+from app.normalizer import EntryNormalizer, FeedProfile, clear_profiles, get_profile
+
+def _entry(**fields):
+    return FeedParserDict(title="Test Paper", **fields)
+
+@pytest.fixture
+def normalizer():
+    return EntryNormalizer(FeedProfile(), parse_date, extract_doi)
+
+def test_profile_learned_from_first_entry(normalizer):
+    """Test that the first entry teaches the profile where fields live."""
+    entry = _entry(
+        updated_parsed=(2024, 3, 15, 12, 0, 0, 0, 0, 0),
+        id="urn:1",
+        summary="See doi:10.1371/journal.pbio.0001."
+    )
+    assert normalizer.parse_date(entry) == datetime(2024, 3, 15, 12, 0, 0)
+    assert normalizer.extract_doi(entry) == "10.1371/journal.pbio.0001"
+    assert normalizer.profile.date_field == 'updated_parsed'
+    assert normalizer.profile.doi_field == 'summary'
+    assert normalizer.profile.misses == 2
+
+def test_fast_path_after_learning(normalizer):
+    """Test that later entries use a single lookup per field."""
+    for i in range(3):
+        entry = _entry(published="2024-03-1%dT12:00:00+00:00" % i, id=f"https://doi.org/10.1234/paper{i}")
+        assert normalizer.parse_date(entry).day == 10 + i
+        assert normalizer.extract_doi(entry) == f"10.1234/paper{i}"
+    assert normalizer.profile.date_format == '%Y-%m-%dT%H:%M:%S%z'
+    assert normalizer.profile.misses == 2
+    assert normalizer.profile.hits == 4
+
+def test_profile_miss_falls_back_to_probing():
+    """Test that entries not matching the profile still parse."""
+    profile = FeedProfile(date_field='published_parsed', doi_field='link')
+    normalizer = EntryNormalizer(profile, parse_date, extract_doi)
+    entry = _entry(updated_parsed=(2024, 3, 15, 0, 0, 0, 0, 0, 0), id="https://doi.org/10.1234/xyz")
+    assert normalizer.parse_date(entry) == datetime(2024, 3, 15)
+    assert normalizer.extract_doi(entry) == "10.1234/xyz"
+    assert profile.date_field == 'updated_parsed'
+    assert profile.doi_field == 'id'
+
+def test_declared_profile(monkeypatch):
+    """Test that profiles declared in Config seed the cache."""
+    clear_profiles()
+    monkeypatch.setattr('app.normalizer.Config.FEED_PROFILES', {"Nature": {"doi_field": "id"}})
+    profile = get_profile("https://nature.com/rss", "Nature")
+    assert profile.doi_field == 'id'
+    assert get_profile("https://nature.com/rss", "Nature") is profile
+    clear_profiles()
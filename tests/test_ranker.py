@@ -1,5 +1,7 @@
+import json
 import pytest
 from datetime import datetime
+from unittest.mock import patch, MagicMock
 from app.models import Paper
 from app.ranker import load_preferences, rank_papers
 
@@ -28,4 +30,164 @@ def test_rank_papers_single():
     )
     ranked = rank_papers([paper])
     assert len(ranked) == 1
-    assert ranked[0] == paper 
\ No newline at end of file
+    assert ranked[0] == paper 
+@patch('app.ranker.OpenAI')
+def test_rank_papers_without_summaries(mock_openai):
+    """Test that unsummarized papers are ranked on title and abstract alone."""
+    papers = [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract=f"Test abstract {i}",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(1, 3)
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content='{"scores": {"1": {"1": 10}, "2": {"1": 90}}}'))]
+    )
+    mock_openai.return_value = mock_client
+
+    ranked = rank_papers(papers)
+
+    assert ranked == [papers[1], papers[0]]
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "Summary:" not in prompt
+
+@patch('app.ranker.load_preferences', return_value={"gene editing": 9})
+@patch('app.ranker.OpenAI')
+def test_rank_papers_falls_back_to_lexical_order(mock_openai, mock_preferences):
+    """Test that a failed LLM ranking falls back to the local BM25 order."""
+    papers = [
+        Paper(
+            title=title,
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i, title in enumerate(["Ocean currents", "Gene editing in mice"])
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = Exception("API Error")
+    mock_openai.return_value = mock_client
+
+    assert rank_papers(papers) == [papers[1], papers[0]]
+
+@patch('app.ranker.Config.RANK_IMPACT_WEIGHT', 0)
+@patch('app.ranker.Config.RANK_PREFILTER_TOP_N', 1)
+@patch('app.ranker.load_preferences', return_value={"gene editing": 9})
+@patch('app.ranker.OpenAI')
+def test_rank_papers_prefilter(mock_openai, mock_preferences):
+    """Test that only the top lexical candidates are sent to the LLM."""
+    papers = [
+        Paper(
+            title=title,
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i, title in enumerate(["Ocean currents", "Gene editing in mice"])
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content='{"scores": {"1": {"1": 50}}}'))]
+    )
+    mock_openai.return_value = mock_client
+
+    assert rank_papers(papers) == [papers[1], papers[0]]
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "Gene editing in mice" in prompt
+    assert "Ocean currents" not in prompt
+
+@patch('app.ranker.Config.RANK_IMPACT_WEIGHT', 0)
+@patch('app.ranker.Config.RANK_CHUNK_SIZE', 2)
+@patch('app.ranker.load_preferences', return_value={"gene editing": 9})
+@patch('app.ranker.OpenAI')
+def test_rank_papers_merges_chunks_and_repairs_scores(mock_openai, mock_preferences):
+    """Test that chunk scores are merged globally and unscored papers are re-submitted."""
+    papers = [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(3)
+    ]
+    responses = {
+        # First chunk: paper 1 is scored twice, paper 2 is missing
+        ("Test Paper 0", "Test Paper 1"): '{"scores": {"1": {"1": 20}, "1 ": {"1": 40}, "7": {"1": 99}}}',
+        ("Test Paper 2",): '{"scores": {"1": {"1": 80}}}',
+        ("Test Paper 1",): '{"scores": {"1": {"1": 60}}}',
+    }
+
+    def create(model, messages, **kwargs):
+        titles = tuple(line.split("Title: ")[1] for line in messages[1]["content"].splitlines() if "Title: " in line)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=responses[titles]))])
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = create
+    mock_openai.return_value = mock_client
+
+    ranked = rank_papers(papers)
+
+    assert ranked == [papers[2], papers[1], papers[0]]
+    assert [paper.relevance for paper in ranked] == [80, 60, 30]
+    assert mock_client.chat.completions.create.call_count == 3
+
+def respond_by_topic(table):
+    """Create side effect scoring each paper title on each requested criterion from table[title][topic]."""
+    def create(model, messages, **kwargs):
+        prompt = messages[1]["content"]
+        criteria = prompt.split(":\n", 1)[1].split("\n\n", 1)[0].splitlines()
+        topics = [line.split(". ", 1)[1] for line in criteria]
+        titles = [line.split("Title: ")[1] for line in prompt.splitlines() if "Title: " in line]
+        scores = {
+            str(i): {str(j): table[title][topic] for j, topic in enumerate(topics, 1)}
+            for i, title in enumerate(titles, 1)
+        }
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps({"scores": scores})))])
+    return create
+
+@patch('app.ranker.Config.RANK_IMPACT_WEIGHT', 0)
+@patch('app.ranker.OpenAI')
+def test_rank_papers_reuses_cached_topic_scores(mock_openai):
+    """Test that re-weighting needs no API calls and a new topic is scored on its own."""
+    papers = [
+        Paper(
+            title=title,
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i, title in enumerate(["Paper A", "Paper B"])
+    ]
+    table = {
+        "Paper A": {"gene editing": 90, "ecology": 10, "proteomics": 0},
+        "Paper B": {"gene editing": 20, "ecology": 80, "proteomics": 100},
+    }
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = respond_by_topic(table)
+    mock_openai.return_value = mock_client
+
+    with patch('app.ranker.load_preferences', return_value={"gene editing": 9, "ecology": 1}):
+        assert rank_papers(papers) == [papers[0], papers[1]]
+    assert mock_client.chat.completions.create.call_count == 1
+
+    with patch('app.ranker.load_preferences', return_value={"gene editing": 1, "ecology": 9}):
+        assert rank_papers(papers) == [papers[1], papers[0]]
+    assert mock_client.chat.completions.create.call_count == 1
+    assert papers[1].relevance == pytest.approx(74)
+
+    with patch('app.ranker.load_preferences', return_value={"gene editing": 1, "ecology": 1, "proteomics": 8}):
+        assert rank_papers(papers) == [papers[1], papers[0]]
+    assert mock_client.chat.completions.create.call_count == 2
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "1. proteomics\n" in prompt
+    assert "gene editing" not in prompt
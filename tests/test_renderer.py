@@ -0,0 +1,38 @@
+from datetime import datetime
+from app.models import Paper
+from app.renderer import render_digest, write_digest
+
+def _papers(n):
+    return [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract=f"Test abstract {i}",
+            journal="Nature",
+            published_date=datetime.now(),
+            summary=f"Summary {i}" if i < 2 else None
+        ) for i in range(4)
+    ]
+
+def test_render_digest_shows_all_papers():
+    """Test that every paper gets a full card by default."""
+    html = render_digest("2026-01-01", _papers(4)[:2])
+    assert html.count('class="paper"') == 2
+    assert "<details" not in html
+
+def test_render_digest_collapses_rest():
+    """Test that papers beyond collapse_after are listed in a collapsed section."""
+    html = render_digest("2026-01-01", _papers(4), collapse_after=2)
+    assert html.count('class="paper"') == 2
+    assert "2 more papers" in html
+    assert 'href="https://nature.com/test3"' in html
+    assert "None" not in html
+
+def test_write_digest_streams_same_html(tmp_path, isolated_cache_dir):
+    """Test that the streamed file matches the rendered string and the bytecode cache is filled."""
+    path = tmp_path / "digests" / "2026-01-01.html"
+    assert write_digest(str(path), "2026-01-01", _papers(4), collapse_after=2)
+    assert path.read_text() == render_digest("2026-01-01", _papers(4), collapse_after=2)
+    assert list((isolated_cache_dir / "templates").iterdir())
+    assert not write_digest(str(path), "2026-01-01", [])
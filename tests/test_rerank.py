@@ -0,0 +1,51 @@
+from datetime import datetime
+from unittest.mock import patch
+from app.models import Paper, load_papers, paper_key, save_papers
+from app.ranker import rank_scorer
+from app.rerank import rerank_digest
+from app.score_store import ScoreStore
+
+def make_papers():
+    return [
+        Paper(
+            title=title,
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime(2026, 5, 4, 9, 30),
+            summary=f"Summary of {title}",
+            summary_status="ok"
+        ) for i, title in enumerate(["Paper A", "Paper B"])
+    ]
+
+def test_save_and_load_papers(tmp_path):
+    """Test that papers saved next to a digest load back unchanged."""
+    papers = make_papers()
+    save_papers(str(tmp_path / '2026-05-04.json'), papers)
+    assert load_papers(str(tmp_path / '2026-05-04.json')) == papers
+
+@patch('app.ranker.Config.RANK_IMPACT_WEIGHT', 0)
+@patch('app.ranker.OpenAI')
+def test_rerank_digest_from_cached_scores(mock_openai, tmp_path):
+    """Test that an archived digest is re-ranked from cached scores without API calls."""
+    papers = make_papers()
+    save_papers(str(tmp_path / '2026-05-04.json'), papers)
+    with ScoreStore(scorer=rank_scorer()) as store:
+        store.put([
+            (paper_key(papers[0]), "gene editing", 90), (paper_key(papers[0]), "ecology", 10),
+            (paper_key(papers[1]), "gene editing", 20), (paper_key(papers[1]), "ecology", 80),
+        ])
+
+    with patch('app.rerank.load_preferences', return_value={"gene editing": 1, "ecology": 9}):
+        path = rerank_digest('2026-05-04', digest_dir=str(tmp_path))
+
+    assert path == str(tmp_path / 'rerank' / '2026-05-04.html')
+    with open(path) as f:
+        html = f.read()
+    assert html.index("Paper B") < html.index("Paper A")
+    mock_openai.assert_not_called()
+
+def test_rerank_digest_without_saved_papers(tmp_path):
+    """Test that a digest without saved papers is reported rather than rendered."""
+    assert rerank_digest('2026-05-04', digest_dir=str(tmp_path)) is None
@@ -0,0 +1,106 @@
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from app.config import Config
+from app.feed_registry import Feed, feed_url, load_feeds, to_opml
+from app.scheduler import HostScheduler, TokenBucket, _retry_after, is_retryable
+
+OPML = """<?xml version="1.0"?>
+<opml version="2.0"><head><title>Feeds</title></head><body>
+  <outline text="Nature Publishing Group">
+    <outline type="rss" text="Nature" xmlUrl="https://www.nature.com/nature/current_issue/rss"/>
+    <outline type="rss" text="Nature Genetics" xmlUrl="https://www.nature.com/ng/current_issue/rss"/>
+  </outline>
+  <outline type="rss" text="PLOS Biology" xmlUrl="https://journals.plos.org/plosbiology/feed/atom"/>
+  <outline type="rss" text="Nature again" xmlUrl="https://www.nature.com/nature/current_issue/rss"/>
+</body></opml>"""
+
+def test_load_feeds_from_opml(tmp_path):
+    """Test that OPML outlines become feeds with their group."""
+    path = tmp_path / 'feeds.opml'
+    path.write_text(OPML)
+    feeds = load_feeds(str(path))
+    assert [f.journal for f in feeds] == ["Nature", "Nature Genetics", "PLOS Biology"]
+    assert feeds[0].group == "Nature Publishing Group"
+    assert feeds[0].host == "www.nature.com"
+
+def test_feed_url_from_registry(tmp_path):
+    """Test that CLI feed names resolve through the feed registry, not only RSS_FEEDS."""
+    path = tmp_path / "feeds.opml"
+    path.write_text(OPML)
+    assert feed_url("PLOS Biology", str(path)) == "https://journals.plos.org/plosbiology/feed/atom"
+    assert feed_url("https://example.org/rss", str(path)) == "https://example.org/rss"
+
+def test_opml_round_trip(tmp_path):
+    """Test that exported OPML loads back to the same registry."""
+    feeds = [Feed(journal, url) for journal, url in Config.RSS_FEEDS.items()]
+    path = tmp_path / 'feeds.opml'
+    path.write_text(to_opml(feeds))
+    assert load_feeds(str(path)) == feeds
+
+def test_order_interleaves_hosts():
+    """Test that feeds are interleaved round-robin by host."""
+    feeds = [Feed(f"N{i}", f"https://nature.com/{i}") for i in range(3)] + [Feed("P", "https://plos.org/1")]
+    assert [f.journal for f in HostScheduler.order(feeds)] == ["N0", "P", "N1", "N2"]
+
+def test_per_host_concurrency():
+    """Test that no more than max_per_host requests run at once for a host."""
+    scheduler = HostScheduler(max_per_host=2, rate=0, retries=0)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fetch():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return []
+
+    feed = Feed("Nature", "https://nature.com/rss")
+    threads = [threading.Thread(target=scheduler.run, args=(feed, fetch)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+    assert len(scheduler.stats) == 6
+
+def test_retry_transient_errors():
+    """Test that transient errors are retried and permanent ones are not."""
+    scheduler = HostScheduler(rate=0, retries=2, backoff=0.001)
+    fetch = MagicMock(side_effect=[requests.ConnectionError("reset"), ["paper"]])
+    assert scheduler.run(Feed("Cell", "https://cell.com/rss"), fetch) == ["paper"]
+    assert scheduler.stats[0].attempts == 2
+    assert scheduler.stats[0].papers == 1
+
+    not_found = requests.HTTPError(response=MagicMock(status_code=404))
+    assert not is_retryable(not_found)
+    with pytest.raises(requests.HTTPError):
+        scheduler.run(Feed("JCI", "https://jci.org/rss"), MagicMock(side_effect=not_found))
+    assert scheduler.stats[1].error
+    assert "1 failures" in scheduler.report()
+
+def test_retry_after_is_honored():
+    """Test that Retry-After, in seconds or as an HTTP date, is never shortened by jitter."""
+    busy = requests.HTTPError(response=MagicMock(status_code=503, headers={'Retry-After': '30'}))
+    scheduler = HostScheduler(rate=0, retries=3, backoff=0.001)
+    with patch('app.scheduler.time.sleep') as sleep:
+        scheduler.run(Feed("Cell", "https://cell.com/rss"), MagicMock(side_effect=[busy, busy, ["paper"]]))
+    assert [call.args[0] for call in sleep.call_args_list] == [30.0, 30.0]
+
+    dated = requests.HTTPError(response=MagicMock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}))
+    assert _retry_after(dated) == 0.0
+    future = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 120))
+    dated.response.headers['Retry-After'] = future
+    assert 110 < _retry_after(dated) <= 120
+
+def test_token_bucket_rate():
+    """Test that the bucket spaces requests beyond the burst."""
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.05
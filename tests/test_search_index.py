@@ -0,0 +1,77 @@
+import json
+import os
+from datetime import datetime
+from app.config import Config
+from app.models import Paper, save_papers
+from app.search_index import SearchIndex, update_search
+
+def _papers(day, titles):
+    return [
+        Paper(
+            title=title,
+            doi=f"10.1234/{day}-{i}",
+            link=f"https://nature.com/{day}-{i}",
+            abstract="Test abstract",
+            journal="Nature",
+            published_date=datetime.now(),
+            summary="A study of therapies"
+        ) for i, title in enumerate(titles)
+    ]
+
+def test_search_index_updates_only_touched_shards(tmp_path, monkeypatch):
+    """Test that a new digest rewrites only the shards of its terms and is searchable with prefixes."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "digests").mkdir()
+    save_papers("digests/2026-05-01.json", _papers("a", ["Gene editing in mice", "Ocean currents"]))
+    first = update_search()
+    assert first.digests_added == 1 and first.documents == 2
+    assert (tmp_path / "search.html").exists()
+    ocean_shard = tmp_path / "search" / "terms" / "0" / "oc.json"
+    before = os.stat(ocean_shard).st_mtime_ns
+
+    save_papers("digests/2026-05-02.json", _papers("b", ["Gene drives in mosquitoes"]))
+    report = SearchIndex().update()
+    assert report.digests_added == 1
+    assert report.doc_shards == 1
+    assert os.stat(ocean_shard).st_mtime_ns == before
+    assert "gene" in json.loads((tmp_path / "search" / "terms" / "0" / "ge.json").read_text())
+
+    index = SearchIndex()
+    assert [doc[0] for doc in index.search("gene")] == ["Gene drives in mosquitoes", "Gene editing in mice"]
+    assert [doc[0] for doc in index.search("Gene edit")] == ["Gene editing in mice"]
+    assert [doc[0] for doc in index.search("therapy nature")] == [
+        "Gene drives in mosquitoes", "Ocean currents", "Gene editing in mice"]
+    assert [doc[4] for doc in index.search("10.1234/b-0")] == ["2026-05-02"]
+
+    os.remove("digests/2026-05-01.json")
+    assert SearchIndex().update().digests_removed == 1
+    assert SearchIndex().search("ocean") == []
+    assert not ocean_shard.exists()
+
+def test_search_index_bounds_shards(tmp_path, monkeypatch):
+    """Test that oversized shards are split, new IDs start new blocks, and checkouts share the same index files."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, 'SEARCH_SHARD_MAX_POSTINGS', 2)
+    monkeypatch.setattr(Config, 'SEARCH_BLOCK_DOCS', 3)
+    (tmp_path / "digests").mkdir()
+    save_papers("digests/2026-05-01.json", _papers("a", ["Gene editing", "Genome atlas", "Genetic drift"]))
+    save_papers("digests/2026-05-02.json", _papers("b", ["Generative models"]))
+    SearchIndex().update()
+
+    shards = json.loads((tmp_path / "search" / "shards.json").read_text())
+    assert set(shards) == {"0", "1"}
+    assert {"gene", "geno"} <= set(shards["0"]) and "ge" not in shards["0"]
+    index = SearchIndex()
+    assert [doc[0] for doc in index.search("gene editing")] == ["Gene editing"]
+    assert [doc[0] for doc in index.search("gen")] == [
+        "Generative models", "Genetic drift", "Genome atlas", "Gene editing"]
+    assert "signature" not in (tmp_path / "search" / "index.json").read_text()
+
+    # A fresh checkout has no local state, but the published index is still up to date and editable
+    os.remove(os.path.join(Config.CACHE_DIR, "search_index.json"))
+    os.utime("digests/2026-05-01.json", ns=(0, 0))
+    assert SearchIndex().update().digests_added == 0
+    os.remove(os.path.join(Config.CACHE_DIR, "search_index.json"))
+    os.remove("digests/2026-05-01.json")
+    assert SearchIndex().update().digests_removed == 1
+    assert [doc[0] for doc in SearchIndex().search("gen")] == ["Generative models"]
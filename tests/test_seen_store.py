@@ -0,0 +1,74 @@
+import time
+import pytest
+from datetime import datetime
+from app.models import Paper, normalize_doi, paper_key
+from app.seen_store import SeenStore
+from app.summarizer import SUMMARY_FAILED
+
+def _paper(doi="10.1234/test", title="Test Paper", summary=None):
+    return Paper(
+        title=title,
+        doi=doi,
+        link="https://nature.com/test",
+        abstract="Test abstract",
+        journal="Nature",
+        published_date=datetime.now(),
+        summary=summary
+    )
+
+@pytest.fixture
+def store(tmp_path):
+    with SeenStore(str(tmp_path / 'seen.sqlite3'), retention_days=30) as store:
+        yield store
+
+def test_normalize_doi():
+    """Test that DOI variants normalize to the same key."""
+    assert normalize_doi("https://doi.org/10.1038/NBT.1234.") == "10.1038/nbt.1234"
+    assert normalize_doi("doi:10.1038/nbt.1234") == "10.1038/nbt.1234"
+
+def test_paper_key_placeholder_doi():
+    """Test that placeholder DOIs fall back to a title-based key."""
+    a = _paper(doi="10.placeholder-20240315120000")
+    b = _paper(doi="10.placeholder-20240316080000")
+    assert paper_key(a) == paper_key(b)
+    assert paper_key(a).startswith("title:")
+
+def test_apply_reuses_summaries(store):
+    """Test that previously summarized papers are not summarized again."""
+    store.record([_paper(summary="Stored summary")])
+
+    seen, new = _paper(doi="10.1234/TEST."), _paper(doi="10.1234/other")
+    pending = store.apply([seen, new])
+
+    assert pending == [new]
+    assert seen.summary == "Stored summary"
+    assert seen.summary_status == "seen"
+
+def test_apply_refreshes_last_seen(store):
+    """Test that papers still in the feeds are not pruned while they keep being reused."""
+    store.record([_paper(summary="Stored summary")])
+    store._conn.execute("UPDATE seen_papers SET last_seen = ?", (time.time() - 29 * 86400,))
+    store.apply([_paper()])
+    store._conn.execute("UPDATE seen_papers SET last_seen = last_seen - 2 * 86400")
+    assert store.prune() == 0
+    assert store.get_summary(_paper()) == "Stored summary"
+
+def test_summarizer_change_invalidates(store, tmp_path):
+    """Test that summaries written with another model or prompt version are not reused."""
+    store.record([_paper(summary="Old model summary")])
+    with SeenStore(str(tmp_path / 'seen.sqlite3'), summarizer="other-model/1") as other:
+        paper = _paper()
+        assert other.apply([paper]) == [paper]
+        assert paper.summary is None
+
+def test_failed_summaries_not_recorded(store):
+    """Test that failed summaries are retried on the next run."""
+    store.record([_paper(summary=SUMMARY_FAILED)])
+    assert store.count() == 0
+
+def test_retention_window(store):
+    """Test that papers outside the retention window are pruned."""
+    store.record([_paper(summary="Old summary")])
+    store._conn.execute("UPDATE seen_papers SET last_seen = ?", (time.time() - 31 * 86400,))
+    assert store.prune() == 1
+    assert store.get_summary(_paper()) is None
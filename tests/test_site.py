@@ -0,0 +1,20 @@
+from app.manifest import DigestEntry, DigestManifest
+from app.site import update_site
+
+def test_update_site_renders_index_and_archive(tmp_path, monkeypatch):
+    """Test that a new digest updates the index and the archive pages of its month and neighbours."""
+    monkeypatch.chdir(tmp_path)
+    manifest = DigestManifest()
+    update_site(DigestEntry(date="2026-04-30", papers=3, top_titles=["Old paper"]), manifest)
+    assert "May 2026" not in (tmp_path / "digests" / "archive" / "2026-04.html").read_text()
+
+    update_site(DigestEntry(date="2026-05-01", papers=5, journals=["Nature"], top_titles=["New paper"]), manifest)
+
+    index = (tmp_path / "index.html").read_text()
+    assert index.index('href="digests/2026-05-01.html"') < index.index('href="digests/2026-04-30.html"')
+    assert 'href="digests/archive/2026-04.html">April 2026</a>' in index
+    may = (tmp_path / "digests" / "archive" / "2026-05.html").read_text()
+    assert 'href="../../digests/2026-05-01.html"' in may
+    assert "New paper" in may and "Old paper" not in may
+    assert 'href="../../digests/archive/2026-05.html"' in (tmp_path / "digests" / "archive" / "2026-04.html").read_text()
+    assert len(DigestManifest().entries()) == 2
@@ -0,0 +1,49 @@
+from datetime import datetime
+from app.models import Paper, save_papers
+from app.site_builder import SiteBuilder, SiteState
+
+def _paper(i, journal, title):
+    return Paper(
+        title=title,
+        doi=f"10.1234/test{i}",
+        link=f"https://nature.com/test{i}",
+        abstract="Test abstract",
+        journal=journal,
+        published_date=datetime.now(),
+        summary=f"Summary {i}"
+    )
+
+def test_build_rebuilds_only_pages_with_changed_inputs(tmp_path, monkeypatch):
+    """Test that a new digest rebuilds only the pages it contributes to, with reasons."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "digests").mkdir()
+    save_papers("digests/2026-04-30.json", [_paper(0, "Cell", "Gene editing in mice")])
+    save_papers("digests/2026-05-01.json", [_paper(1, "Nature", "Ocean currents")])
+    state = SiteState()
+    builder = lambda: SiteBuilder(state=state, topics=["gene editing", "ocean"])
+
+    first = builder().build()
+    assert first.rebuilt["journals/cell/2026-04.html"] == "digest 2026-04-30 added"
+    assert "topics/gene-editing/2026-04.html" in first.rebuilt
+    assert "topics/ocean/2026-05.html" in first.rebuilt
+    assert "Gene editing in mice" in (tmp_path / "topics" / "gene-editing" / "2026-04.html").read_text()
+
+    assert not builder().build().rebuilt
+
+    save_papers("digests/2026-05-02.json", [_paper(2, "Nature", "Ocean warming"), _paper(3, "Cell", "Gene editing")])
+    report = builder().build()
+    assert report.digests_read == 1
+    assert set(report.rebuilt) == {
+        "journals/nature/2026-05.html", "journals/cell/2026-05.html", "topics/gene-editing/2026-05.html",
+        "topics/ocean/2026-05.html", "journals/nature/index.html", "journals/cell/index.html",
+        "topics/gene-editing/index.html", "topics/ocean/index.html", "journals/index.html", "topics/index.html",
+    }
+    nature = (tmp_path / "journals" / "nature" / "2026-05.html").read_text()
+    assert nature.index("Ocean warming") < nature.index("Ocean currents")
+    assert '2026-04.html">April 2026</a>' in (tmp_path / "journals" / "cell" / "index.html").read_text()
+
+    report = SiteBuilder(state=state, topics=["gene editing"]).build()
+    assert report.digests_read == 3
+    assert "topics/ocean/2026-05.html" in report.removed
+    assert not (tmp_path / "topics" / "ocean" / "2026-05.html").exists()
+    assert "journals/nature/2026-05.html" not in report.rebuilt
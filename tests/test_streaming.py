@@ -0,0 +1,87 @@
+import pytest
+from datetime import date
+from unittest.mock import MagicMock, patch
+from app.fetcher import fetch_feed
+from app.normalizer import clear_profiles, get_profile
+from app.streaming import StreamParseError, iter_entries
+
+RSS1_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/"
+         xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel rdf:about="https://www.nature.com/nbt/current_issue/rss"><title>Nature Biotechnology</title></channel>
+<item rdf:about="https://www.nature.com/articles/s41587-026-00001-x">
+  <title><![CDATA[Base editing in vivo]]></title>
+  <link>https://www.nature.com/articles/s41587-026-00001-x</link>
+  <content:encoded><![CDATA[<p>Abstract text</p>]]></content:encoded>
+  <dc:identifier>doi:10.1038/s41587-026-00001-x</dc:identifier>
+  <dc:date>2026-10-15</dc:date>
+  <prism:doi>10.1038/s41587-026-00001-x</prism:doi>
+</item>
+</rdf:RDF>"""
+
+def atom_feed(dates):
+    entries = ''.join(
+        f"<entry><title>Paper {i}</title><id>https://doi.org/10.1371/journal.pbio.{i:07d}</id>"
+        f"<link rel=\"alternate\" href=\"https://journals.plos.org/a{i}\"/>"
+        f"<updated>{d}T10:00:00Z</updated><summary>Abstract {i}</summary></entry>"
+        for i, d in enumerate(dates)
+    )
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>PLOS</title>{entries}</feed>'.encode()
+
+def chunked(body, size=64):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def test_rss1_entry_fields():
+    """Test that RSS 1.0 items map to feedparser-style fields."""
+    [entry] = list(iter_entries(chunked(RSS1_FEED)))
+    assert entry['title'] == "Base editing in vivo"
+    assert entry['id'] == "https://www.nature.com/articles/s41587-026-00001-x"
+    assert entry['link'] == "https://www.nature.com/articles/s41587-026-00001-x"
+    assert entry['summary'] == "<p>Abstract text</p>"
+    assert entry['prism_doi'] == "10.1038/s41587-026-00001-x"
+    assert entry['updated_parsed'][:3] == (2026, 10, 15)
+
+def test_atom_entries_and_cutoff():
+    """Test that old entries are skipped and the stream stops early."""
+    dates = ['2026-10-16', '2026-10-15', '2026-10-01', '2026-09-30', '2026-09-29'] + ['2026-10-16'] * 50
+    consumed = []
+
+    def tracking_chunks():
+        for chunk in chunked(atom_feed(dates)):
+            consumed.append(chunk)
+            yield chunk
+
+    entries = list(iter_entries(tracking_chunks(), cutoff=date(2026, 10, 15), stop_after=3))
+    assert [e['title'] for e in entries] == ["Paper 0", "Paper 1"]
+    assert entries[0]['link'] == "https://journals.plos.org/a0"
+    assert len(consumed) < len(list(chunked(atom_feed(dates))))
+
+def test_malformed_feed_raises():
+    """Test that malformed XML is reported for the feedparser fallback."""
+    body = b"<rss version='2.0'><channel><item><title>&nbsp;</title></item></channel></rss>"
+    with pytest.raises(StreamParseError):
+        list(iter_entries(chunked(body)))
+
+def test_fetch_feed_falls_back_to_feedparser():
+    """Test that a malformed feed is parsed by feedparser and remembered as non-streamable."""
+    clear_profiles()
+    response = MagicMock(status_code=200)
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [b"<rss><channel><item>&nbsp;</item></channel></rss>"]
+    session = MagicMock()
+    session.get.return_value = response
+
+    feed = MagicMock()
+    feed.entries = []
+    with patch('app.fetcher.Config.FETCH_STREAMING', True), \
+         patch('app.fetcher.download_feed', return_value=b'<rss/>') as mock_download, \
+         patch('app.fetcher.feedparser.parse', return_value=feed) as mock_parse:
+        result = fetch_feed(session, "Science", "https://example.org/rss", (date.today(),))
+
+    assert result == []
+    mock_download.assert_called_once()
+    mock_parse.assert_called_once_with(b'<rss/>')
+    assert get_profile("https://example.org/rss").streamable is False
+    clear_profiles()
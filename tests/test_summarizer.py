@@ -1,8 +1,26 @@
+import httpx
+import json
+import openai
 import pytest
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 from app.models import Paper
-from app.summarizer import summarize_papers
+from app.summarizer import local_summary, pack_papers, summarize_papers
+
+def respond_by_title(responses):
+    """side_effect returning (or raising) the response for the paper named in the prompt."""
+    def create(model, messages, **kwargs):
+        title = messages[1]['content'].splitlines()[0][len("Title: "):]
+        response = responses[title]
+        if isinstance(response, Exception):
+            raise response
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=response))])
+    return create
+
+def rate_limit_error(retry_after="0"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
 
 def test_summarize_papers_empty():
     """Test summarizing empty paper list."""
@@ -33,12 +51,11 @@ def test_summarize_papers_single_batch(mock_openai):
     ]
     
     # Mock OpenAI responses for each paper
-    mock_responses = [
-        MagicMock(choices=[MagicMock(message=MagicMock(content="Summary 1"))]),
-        MagicMock(choices=[MagicMock(message=MagicMock(content="Summary 2"))])
-    ]
     mock_client = MagicMock()
-    mock_client.chat.completions.create.side_effect = mock_responses
+    mock_client.chat.completions.create.side_effect = respond_by_title({
+        "Test Paper 1": "Summary 1",
+        "Test Paper 2": "Summary 2",
+    })
     mock_openai.return_value = mock_client
     
     # Test summarization
@@ -65,12 +82,10 @@ def test_summarize_papers_multiple_batches(mock_openai):
     ]
     
     # Mock OpenAI responses for each paper
-    mock_responses = [
-        MagicMock(choices=[MagicMock(message=MagicMock(content=f"Summary {i}"))]) 
-        for i in range(7)
-    ]
     mock_client = MagicMock()
-    mock_client.chat.completions.create.side_effect = mock_responses
+    mock_client.chat.completions.create.side_effect = respond_by_title({
+        f"Test Paper {i}": f"Summary {i}" for i in range(7)
+    })
     mock_openai.return_value = mock_client
     
     # Test summarization
@@ -81,6 +96,7 @@ def test_summarize_papers_multiple_batches(mock_openai):
         assert paper.summary == f"Summary {i}"
     assert mock_client.chat.completions.create.call_count == 7
 
+@patch('app.summarizer.Config.SUMMARY_LOCAL_FALLBACK', False)
 @patch('app.summarizer.OpenAI')
 def test_summarize_papers_api_error(mock_openai):
     """Test handling of API error during summarization."""
@@ -105,6 +121,7 @@ def test_summarize_papers_api_error(mock_openai):
     assert len(result) == 1
     assert result[0].summary == "Summary generation failed."
 
+@patch('app.summarizer.Config.SUMMARY_LOCAL_FALLBACK', False)
 @patch('app.summarizer.OpenAI')
 def test_summarize_papers_partial_failure(mock_openai):
     """Test handling of partial failure during summarization."""
@@ -129,12 +146,11 @@ def test_summarize_papers_partial_failure(mock_openai):
     ]
     
     # Mock OpenAI response for first paper and error for second
-    mock_responses = [
-        MagicMock(choices=[MagicMock(message=MagicMock(content="Summary 1"))]),
-        Exception("API Error")
-    ]
     mock_client = MagicMock()
-    mock_client.chat.completions.create.side_effect = mock_responses
+    mock_client.chat.completions.create.side_effect = respond_by_title({
+        "Test Paper 1": "Summary 1",
+        "Test Paper 2": Exception("API Error"),
+    })
     mock_openai.return_value = mock_client
     
     # Test summarization
@@ -142,4 +158,182 @@ def test_summarize_papers_partial_failure(mock_openai):
     
     assert len(result) == 2
     assert result[0].summary == "Summary 1"
-    assert result[1].summary == "Summary generation failed." 
\ No newline at end of file
+    assert result[1].summary == "Summary generation failed." 
+    assert result[0].summary_status == "ok"
+    assert result[1].summary_status == "error"
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_retries_rate_limit(mock_openai):
+    """A 429 is retried after the server's Retry-After delay."""
+    paper = Paper(
+        title="Test Paper",
+        doi="10.1234/test",
+        link="https://nature.com/test",
+        abstract="Test abstract",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = [
+        rate_limit_error(),
+        MagicMock(choices=[MagicMock(message=MagicMock(content="Summary"))])
+    ]
+    mock_openai.return_value = mock_client
+
+    result = summarize_papers([paper])
+
+    assert result[0].summary == "Summary"
+    assert result[0].summary_status == "ok"
+    assert mock_client.chat.completions.create.call_count == 2
+
+@patch('app.summarizer.Config.SUMMARY_LOCAL_FALLBACK', False)
+@patch('app.llm.time.sleep')
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_rate_limit_exhausted(mock_openai, mock_sleep):
+    """A paper that stays rate limited is marked failed with its status."""
+    paper = Paper(
+        title="Test Paper",
+        doi="10.1234/test",
+        link="https://nature.com/test",
+        abstract="Test abstract",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = rate_limit_error("2")
+    mock_openai.return_value = mock_client
+
+    result = summarize_papers([paper])
+
+    assert result[0].summary == "Summary generation failed."
+    assert result[0].summary_status == "rate_limited"
+    mock_sleep.assert_called_with(2.0)
+
+def packed_response(summaries):
+    content = json.dumps({"summaries": summaries})
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+def test_pack_papers_respects_token_budget():
+    """Packs stay within the token budget and number papers from 1."""
+    papers = [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract="word " * 400,
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(5)
+    ]
+
+    packs = pack_papers(papers, budget=1700)
+
+    assert [len(pack) for pack in packs] == [2, 2, 1]
+    assert [paper_id for paper_id, _ in packs[1]] == ["1", "2"]
+    assert [paper for pack in packs for _, paper in pack] == papers
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_packed_resubmits_missing(mock_openai):
+    """Packed mode sends one request, then re-submits only the papers it left out."""
+    papers = [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract=f"Test abstract {i}",
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(3)
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = [
+        packed_response({"1": "Summary 0", "2": "", "3": "Summary 2"}),
+        packed_response({"1": "Summary 1"}),
+    ]
+    mock_openai.return_value = mock_client
+
+    result = summarize_papers(papers, mode="packed")
+
+    assert [paper.summary for paper in result] == ["Summary 0", "Summary 1", "Summary 2"]
+    assert all(paper.summary_status == "ok" for paper in result)
+    calls = mock_client.chat.completions.create.call_args_list
+    assert len(calls) == 2
+    assert calls[0].kwargs["response_format"] == {"type": "json_object"}
+    assert "Test Paper 1" in calls[1].kwargs["messages"][1]["content"]
+    assert "Test Paper 0" not in calls[1].kwargs["messages"][1]["content"]
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_packed_falls_back_to_single(mock_openai):
+    """Papers still malformed after the packed retries are summarized one per request."""
+    paper = Paper(
+        title="Test Paper",
+        doi="10.1234/test",
+        link="https://nature.com/test",
+        abstract="Test abstract",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = [
+        MagicMock(choices=[MagicMock(message=MagicMock(content="not json"))]),
+        packed_response({"1": ["not", "a", "string"]}),
+        MagicMock(choices=[MagicMock(message=MagicMock(content="Summary"))]),
+    ]
+    mock_openai.return_value = mock_client
+
+    result = summarize_papers([paper], mode="packed")
+
+    assert result[0].summary == "Summary"
+    assert mock_client.chat.completions.create.call_count == 3
+
+ABSTRACT = (
+    "Base editors can correct pathogenic point mutations without double-strand breaks. "
+    "The weather in the laboratory was pleasant during the experiments. "
+    "Here we deliver an adenine base editor to the liver and correct a metabolic disease mutation in mice. "
+    "Base editing of the liver mutation restored enzyme activity and normalized metabolite levels. "
+    "Funding was provided by several agencies."
+)
+
+def test_local_summary_picks_central_sentences():
+    """The extractive summary keeps two on-topic sentences in their original order."""
+    paper = Paper(
+        title="Liver base editing corrects a metabolic disease",
+        doi="10.1234/test",
+        link="https://nature.com/test",
+        abstract=ABSTRACT,
+        journal="Nature",
+        published_date=datetime.now()
+    )
+
+    summary = local_summary(paper)
+
+    assert summary == (
+        "Here we deliver an adenine base editor to the liver and correct a metabolic disease mutation in mice. "
+        "Base editing of the liver mutation restored enzyme activity and normalized metabolite levels."
+    )
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_llm_top_n(mock_openai):
+    """Only the first N papers go to the LLM; failures fall back to local summaries."""
+    papers = [
+        Paper(
+            title=f"Test Paper {i}",
+            doi=f"10.1234/test{i}",
+            link=f"https://nature.com/test{i}",
+            abstract=ABSTRACT,
+            journal="Nature",
+            published_date=datetime.now()
+        ) for i in range(4)
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = respond_by_title({
+        "Test Paper 0": "Summary 0",
+        "Test Paper 1": Exception("API Error"),
+    })
+    mock_openai.return_value = mock_client
+
+    result = summarize_papers(papers, llm_top_n=2)
+
+    assert [paper.summary_status for paper in result] == ["ok", "local_fallback", "local", "local"]
+    assert mock_client.chat.completions.create.call_count == 2
+    assert result[1].summary == result[2].summary != "Summary generation failed."
@@ -0,0 +1,82 @@
+import time
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from app.models import Paper
+from app.summary_cache import SummaryCache
+from app.summarizer import summarize_papers
+
+def make_paper(i: int = 1, abstract: str = None) -> Paper:
+    return Paper(
+        title=f"Test Paper {i}",
+        doi=f"10.1234/test{i}",
+        link=f"https://nature.com/test{i}",
+        abstract=abstract or f"Test abstract {i}",
+        journal="Nature",
+        published_date=datetime.now()
+    )
+
+def test_get_counts_hits_and_misses(tmp_path):
+    """Lookups are counted as hits or misses."""
+    with SummaryCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        assert cache.get(make_paper()) is None
+        cache.put(make_paper(), "Summary 1")
+        assert cache.get(make_paper()) == "Summary 1"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+def test_key_covers_content_model_and_prompt(tmp_path):
+    """Changing the abstract, model or prompt version misses; other entries stay valid."""
+    path = str(tmp_path / 'cache.sqlite3')
+    with SummaryCache(path, model="model-a", prompt_version="1") as cache:
+        cache.put(make_paper(1), "Summary 1")
+        cache.put(make_paper(2), "Summary 2")
+        assert cache.get(make_paper(1, abstract="Revised abstract")) is None
+    with SummaryCache(path, model="model-b", prompt_version="1") as cache:
+        assert cache.get(make_paper(1)) is None
+    with SummaryCache(path, model="model-a", prompt_version="2") as cache:
+        assert cache.get(make_paper(1)) is None
+    with SummaryCache(path, model="model-a", prompt_version="1") as cache:
+        assert cache.get(make_paper(2)) == "Summary 2"
+
+def test_evicts_least_recently_used_and_expired(tmp_path):
+    """Entries beyond the size limit or older than the age limit are dropped."""
+    with SummaryCache(str(tmp_path / 'cache.sqlite3'), max_entries=2) as cache:
+        for i in range(3):
+            cache.put(make_paper(i), f"Summary {i}")
+        cache.get(make_paper(0))
+        cache.evict()
+        assert cache.count() == 2
+        assert cache.get(make_paper(1)) is None
+        assert cache.get(make_paper(0)) == "Summary 0"
+
+        cache.max_age_days = 1
+        with patch('app.summary_cache.time.time', return_value=time.time() + 2 * 86400):
+            cache.evict()
+        assert cache.count() == 0
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_reuses_cached_summaries(mock_openai):
+    """A second run only requests summaries for papers not yet cached."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Summary"))]
+    )
+    mock_openai.return_value = mock_client
+
+    summarize_papers([make_paper(1)])
+    result = summarize_papers([make_paper(1), make_paper(2)])
+
+    assert [paper.summary_status for paper in result] == ["cached", "ok"]
+    assert result[0].summary == "Summary"
+    assert mock_client.chat.completions.create.call_count == 2
+
+@patch('app.summarizer.OpenAI')
+def test_summarize_papers_does_not_cache_failures(mock_openai):
+    """Failed summaries are retried on the next run."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = Exception("API Error")
+    mock_openai.return_value = mock_client
+
+    summarize_papers([make_paper()])
+    summarize_papers([make_paper()])
+
+    assert mock_client.chat.completions.create.call_count == 2